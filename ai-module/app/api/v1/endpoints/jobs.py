@@ -0,0 +1,76 @@
+import json
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from app.services.jobs import (
+    JobManager,
+    JobManagerClosedError,
+    JobQueueFullError,
+    get_job_manager,
+)
+from app.schemas.job import JobState, JobSubmitted
+from app.utils.logger import get_logger
+
+logger = get_logger("Jobs_Endpoint")
+
+router = APIRouter()
+
+
+@router.post("/jobs", response_model=JobSubmitted, status_code=202)
+async def submit_job(
+    request: Request,
+    image: UploadFile = File(...),
+    priority: int = 0,
+    jobs: JobManager = Depends(get_job_manager),
+):
+    """Queues a receipt and returns immediately; lower priority runs first."""
+    content = await image.read()
+    try:
+        job = jobs.submit(content, image.filename or "unknown.jpg", priority)
+    except JobManagerClosedError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "5"}
+        )
+    except JobQueueFullError as e:
+        logger.warning(f"Rejecting job: {e}")
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": "5"}
+        )
+
+    return JobSubmitted(
+        jobId=job.id,
+        status=job.status.value,
+        statusUrl=str(request.url_for("get_job", job_id=job.id)),
+        eventsUrl=str(request.url_for("stream_job", job_id=job.id)),
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobState, response_model_exclude_none=True)
+async def get_job(job_id: str, jobs: JobManager = Depends(get_job_manager)):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return JobState.from_job(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str, jobs: JobManager = Depends(get_job_manager)):
+    """Server-sent events: one 'status' event per state change, then 'result' or 'error'."""
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+
+    async def events():
+        async for job in jobs.watch(job_id):
+            state = JobState.from_job(job).to_dict()
+            if not job.done:
+                event = "status"
+            elif job.error is None:
+                event = "result"
+            else:
+                event = "error"
+            yield f"event: {event}\ndata: {json.dumps(state, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
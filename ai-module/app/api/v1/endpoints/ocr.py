@@ -1,7 +1,20 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from app.services.inference_service import InferenceService, get_inference_service
+import json
+from typing import List, Literal
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.config.settings import settings
+from app.services.inference_service import (
+    InferenceService,
+    get_inference_service_async,
+)
+from app.services.admission import AdmissionRejectedError
+from app.services.worker_pool import WorkerPoolSaturatedError
 from app.schemas.ocr import OcrResult, OcrExpenseItem
+from app.schemas.batch import BatchItemResult, BatchResult
+from app.utils.archive import BatchTooLargeError, expand_uploads
+from app.utils.image import InvalidImageError
 from app.utils.logger import get_logger
+from app.utils.tracing import stage
 
 logger = get_logger("OCR_Endpoint")
 
@@ -11,13 +24,144 @@ router = APIRouter()
 @router.post("/process", response_model=OcrResult)
 async def process_receipt(
     image: UploadFile = File(...),
-    service: InferenceService = Depends(get_inference_service),
+    service: InferenceService = Depends(get_inference_service_async),
 ):
 
     try:
         items = await service.process_receipt(image)
-        expense_items = [OcrExpenseItem.from_dict(item) for item in items]
-        return OcrResult(expenses=expense_items)
+        with stage("serialize"):
+            expense_items = [OcrExpenseItem.from_dict(item) for item in items]
+            result = OcrResult(expenses=expense_items)
+            # Rendered here so the span covers the JSON encoding too
+            return JSONResponse(content=result.model_dump(mode="json", by_alias=True))
+    except AdmissionRejectedError as e:
+        logger.warning(f"Rejecting receipt: {e}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except WorkerPoolSaturatedError as e:
+        logger.warning(f"Rejecting receipt, parser workers saturated: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error processing receipt: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _encode_event(stream_format: str, event: str, data: dict) -> str:
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n"
+
+
+@router.post("/process-stream")
+async def process_receipt_stream(
+    image: UploadFile = File(...),
+    stream_format: Literal["ndjson", "sse"] = Query("ndjson", alias="format"),
+    service: InferenceService = Depends(get_inference_service_async),
+):
+    """
+    Streams items as soon as the LLM finishes each one: an "item" event per
+    product (an OcrExpenseItem), then "done" with the count, or "error".
+    """
+    with stage("upload_read"):
+        content = await image.read()
+    events = service.stream_receipt(content, image.filename or "unknown.jpg")
+
+    # Wait for the first item so admission and early failures still map to HTTP codes
+    try:
+        first_item = await anext(events, None)
+    except AdmissionRejectedError as e:
+        logger.warning(f"Rejecting receipt: {e}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except WorkerPoolSaturatedError as e:
+        logger.warning(f"Rejecting receipt, parser workers saturated: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error processing receipt: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def body():
+        count = 0
+        try:
+            item = first_item
+            while item is not None:
+                count += 1
+                expense = OcrExpenseItem.from_dict(item).to_dict()
+                yield _encode_event(stream_format, "item", expense)
+                item = await anext(events, None)
+            yield _encode_event(stream_format, "done", {"count": count})
+        except Exception as e:
+            logger.error(f"Error while streaming receipt: {e}")
+            yield _encode_event(stream_format, "error", {"detail": str(e)})
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/process-batch", response_model=BatchResult, response_model_exclude_none=True
+)
+async def process_batch(
+    images: List[UploadFile] = File(...),
+    service: InferenceService = Depends(get_inference_service_async),
+):
+    """Processes many receipt images (or zip archives of them) in one request."""
+    with stage("upload_read"):
+        uploads = [
+            (image.filename or "unknown.jpg", await image.read()) for image in images
+        ]
+    try:
+        uploads = expand_uploads(
+            uploads,
+            max_files=settings.batch_max_files,
+            max_file_bytes=settings.batch_max_file_bytes,
+        )
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not uploads:
+        raise HTTPException(status_code=400, detail="No images found in the request.")
+
+    try:
+        outcomes = await service.process_batch(uploads)
+    except AdmissionRejectedError as e:
+        logger.warning(f"Rejecting batch of {len(uploads)} receipts: {e}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except Exception as e:
+        logger.error(f"Error processing batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    results = []
+    for (filename, _), outcome in zip(uploads, outcomes):
+        if isinstance(outcome, Exception):
+            results.append(BatchItemResult(filename=filename, error=str(outcome)))
+        else:
+            expenses = [OcrExpenseItem.from_dict(item) for item in outcome]
+            results.append(
+                BatchItemResult(filename=filename, result=OcrResult(expenses=expenses))
+            )
+    failed = sum(result.error is not None for result in results)
+    return BatchResult(results=results, succeeded=len(results) - failed, failed=failed)
@@ -0,0 +1,199 @@
+import json
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from time import monotonic
+
+from app.config.settings import settings
+from app.utils.logger import get_logger
+from app.utils.matcher import KeywordMatcher, compile_alternation
+
+logger = get_logger("RuleStore")
+
+DEFAULT_VERSION = "builtin"
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """Immutable, compiled snapshot of the cleaning and keyword rules."""
+
+    version: str
+    blacklist: tuple[str, ...]
+    garbage_markers: tuple[str, ...]
+    keywords: dict[str, tuple[str, ...]]
+    blacklist_pattern: re.Pattern
+    garbage_pattern: re.Pattern
+    keyword_matcher: KeywordMatcher
+
+    @classmethod
+    def compile(
+        cls,
+        version: str,
+        blacklist,
+        garbage_markers,
+        keywords: dict,
+    ) -> "RuleSet":
+        # Everything is matched against upper-cased text
+        blacklist = tuple(word.upper() for word in blacklist)
+        garbage_markers = tuple(word.upper() for word in garbage_markers)
+        keywords = {
+            category: tuple(word.upper() for word in words)
+            for category, words in keywords.items()
+        }
+        return cls(
+            version=version,
+            blacklist=blacklist,
+            garbage_markers=garbage_markers,
+            keywords=keywords,
+            blacklist_pattern=compile_alternation(blacklist),
+            garbage_pattern=compile_alternation(garbage_markers),
+            keyword_matcher=KeywordMatcher(keywords),
+        )
+
+    @classmethod
+    def builtin(cls) -> "RuleSet":
+        # Imported here: the cleaning module itself reads its rules from this store
+        from app.ocr.cleaning import BLACKLIST, GARBAGE_MARKERS
+        from app.nlp.config import KEYWORDS
+
+        return cls.compile(DEFAULT_VERSION, BLACKLIST, GARBAGE_MARKERS, KEYWORDS)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "blacklist": list(self.blacklist),
+            "garbage_markers": list(self.garbage_markers),
+            "keywords": {
+                category: list(words) for category, words in self.keywords.items()
+            },
+        }
+
+
+def _words(section: dict, name: str, default: tuple[str, ...]) -> tuple[str, ...]:
+    """section[name] as a tuple of strings; a bare string would be split into letters."""
+    if name not in section:
+        return default
+    words = section[name]
+    if not isinstance(words, list) or not all(isinstance(w, str) for w in words):
+        raise ValueError(f"'{name}' must be a list of strings")
+    return tuple(words)
+
+
+class RuleStore:
+    """
+    Serves the current RuleSet, reloading it from a JSON file when the file changes.
+    The check is throttled to check_interval seconds and the new rules are swapped
+    in with a single reference assignment, so readers never see a half-built set.
+    Sections missing from the file fall back to the built-in rules; a file that
+    fails to load (every section must be a list of strings) keeps the previous
+    rules in place and is retried on the next check.
+    """
+
+    def __init__(self, path: Path | None, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._rules = RuleSet.builtin()
+        self._file_state: tuple[int, int] | None = None
+        self._last_check = float("-inf")
+        self._lock = threading.Lock()
+        self.loaded_at: datetime | None = None
+        self.last_error: str | None = None
+        self.reloads = 0
+
+    def get(self) -> RuleSet:
+        if (
+            self.path is not None
+            and monotonic() - self._last_check >= self.check_interval
+        ):
+            self.reload()
+        return self._rules
+
+    def reload(self, force: bool = False) -> bool:
+        """Loads the file if it changed since the last load. Returns True on swap."""
+        if self.path is None:
+            return False
+        with self._lock:
+            self._last_check = monotonic()
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                if self._file_state is None:
+                    return False
+                # The file was removed: fall back to the built-in rules
+                self._file_state = None
+                self._rules = RuleSet.builtin()
+                logger.info(f"Rules file {self.path} removed, using built-in rules")
+                return True
+            file_state = (stat.st_mtime_ns, stat.st_size)
+            if file_state == self._file_state and not force:
+                return False
+
+            try:
+                rules = self._load(self.path)
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                # _file_state is left alone, so the file is retried on the next check
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.error(f"Rejected rules file {self.path}: {self.last_error}")
+                return False
+
+            self._file_state = file_state
+            self._rules = rules
+            self.loaded_at = datetime.now()
+            self.last_error = None
+            self.reloads += 1
+            logger.info(f"Loaded rules version {rules.version} from {self.path}")
+            return True
+
+    @staticmethod
+    def _load(path: Path) -> RuleSet:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not data.get("version"):
+            raise ValueError("rules file must be an object with a 'version' field")
+
+        builtin = RuleSet.builtin()
+        keywords = builtin.keywords
+        if "keywords" in data:
+            if not isinstance(data["keywords"], dict):
+                raise ValueError("'keywords' must map category names to word lists")
+            keywords = {
+                category: _words(data["keywords"], category, ())
+                for category in data["keywords"]
+            }
+        return RuleSet.compile(
+            version=str(data["version"]),
+            blacklist=_words(data, "blacklist", builtin.blacklist),
+            garbage_markers=_words(data, "garbage_markers", builtin.garbage_markers),
+            keywords=keywords,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "version": self._rules.version,
+            "path": str(self.path) if self.path is not None else None,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
+
+
+_store: RuleStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_rule_store() -> RuleStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RuleStore(
+                    settings.rules_file or settings.data_dir / "rules.json",
+                    check_interval=settings.rules_reload_interval_seconds,
+                )
+    return _store
+
+
+def get_rules() -> RuleSet:
+    return get_rule_store().get()
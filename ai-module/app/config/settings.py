@@ -1,19 +1,184 @@
-from pydantic import BaseSettings, Field
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Literal
 
 
 class Settings(BaseSettings):
-    environment: str = Field("dev", description="Runtime environment")
+    environment: str = Field(
+        "dev", description="Runtime environment (production disables debug output)"
+    )
     data_dir: Path = Field(Path("data"), description="Base data directory")
     enable_categorizer: bool = Field(True, description="Load product categorizer model")
     enable_detector: bool = Field(True, description="Load receipt detector model")
     enable_visualizer: bool = Field(
-        False, description="Enable visual report generation"
+        False, description="Enable visual report generation (never in production)"
+    )
+    # Debug reports are rendered in a background process, sampled and dropped on overload
+    visualizer_sample_rate: float = Field(
+        1.0, ge=0.0, le=1.0, description="Share of receipts rendered (e.g. 0.01)"
+    )
+    visualizer_render_suspicious: bool = Field(
+        True, description="Always render failed, empty or partly uncategorized receipts"
+    )
+    visualizer_max_pending: int = Field(
+        8, description="Reports waiting for the renderer before new ones are dropped"
+    )
+    visualizer_workers: int = Field(1, description="Renderer processes")
+
+    # Model engine tuning
+    gpu_layers: int = Field(
+        -1, description="Llama layers offloaded to the GPU (-1 = all, 0 = CPU only)"
+    )
+    llm_n_ctx: int = Field(4096, description="Llama context window in tokens")
+    llm_n_batch: int = Field(
+        1024, description="Prompt tokens evaluated per llama.cpp batch"
+    )
+    ocr_rec_batch_size: int = Field(
+        6, description="Text boxes per PaddleOCR recognition batch"
+    )
+    categorizer_threads: int | None = Field(
+        None, description="torch CPU threads for the SetFit model (process-wide)"
+    )
+
+    # Result cache (content-addressed, keyed on uploaded image bytes)
+    result_cache_enabled: bool = Field(
+        True, description="Answer repeated uploads from the result cache"
+    )
+    result_cache_max_entries: int = Field(
+        256, description="Maximum number of receipts kept in memory"
+    )
+    result_cache_ttl_seconds: float = Field(
+        3600.0, description="Time after which a cached result expires"
+    )
+    result_cache_persist: bool = Field(
+        False, description="Back the result cache with files under data_dir"
+    )
+
+    # LLM stage cache (cleaned OCR text -> parsed items), persisted in SQLite
+    llm_cache_enabled: bool = Field(
+        True, description="Reuse LLM answers for identical cleaned OCR text"
+    )
+    llm_cache_max_entries: int = Field(
+        10000, description="Maximum number of LLM answers kept on disk"
+    )
+
+    # Micro-batching of categorizer forward passes across concurrent receipts
+    categorizer_batching_enabled: bool = Field(
+        True, description="Share SetFit forward passes between concurrent requests"
+    )
+    categorizer_batch_max_size: int = Field(
+        64, description="Maximum number of product names per forward pass"
+    )
+    categorizer_batch_max_wait_ms: float = Field(
+        10.0, description="Maximum time a request waits for its batch to fill"
+    )
+
+    # Product name -> category cache in front of the SetFit model
+    categorizer_cache_max_entries: int = Field(
+        5000, description="Maximum number of product names kept in the cache"
+    )
+    categorizer_cache_warmup: bool = Field(
+        True,
+        description="Pre-warm the name cache at startup and export it on shutdown",
+    )
+    categorizer_cache_warmup_max_predict: int = Field(
+        500,
+        description="Names run through the model at startup when no matching export exists",
+    )
+
+    # Cleaning blacklists and category keywords, reloaded live from a JSON file
+    rules_file: Path | None = Field(
+        None, description="Rules file path (defaults to data_dir/rules.json)"
+    )
+    rules_reload_interval_seconds: float = Field(
+        5.0, description="How often the rules file is checked for changes"
     )
 
-    class Config:
-        env_prefix = "SR_"
-        case_sensitive = False
+    # Worker-process mode: each worker owns its own PaddleOCR + Llama instance
+    parser_workers: int = Field(
+        0, description="Number of parser worker processes (0 = parse in-process)"
+    )
+    parser_threads_per_worker: int | None = Field(
+        None, description="CPU threads for PaddleOCR and llama.cpp in each worker"
+    )
+    parser_max_pending: int | None = Field(
+        None, description="Jobs accepted before callers wait (default 2 per worker)"
+    )
+    parser_queue_timeout_seconds: float = Field(
+        30.0, description="How long a job waits for a free slot before rejection"
+    )
+
+    # Admission control in front of process_receipt
+    admission_max_in_flight: int | None = Field(
+        None,
+        description="Receipts processed concurrently "
+        "(default: 1 in-process, as many as the parser workers accept otherwise)",
+    )
+    admission_max_queue: int = Field(
+        16, description="Receipts allowed to wait for a slot before 429 responses"
+    )
+    admission_queue_timeout_seconds: float = Field(
+        60.0, description="Maximum wait for a slot before a 503 response"
+    )
+
+    # Asynchronous job API (submit, then poll or stream the result)
+    jobs_workers: int = Field(
+        2, description="Background tasks pulling jobs from the priority queue"
+    )
+    jobs_max_queued: int = Field(100, description="Maximum number of queued jobs")
+    jobs_retention_seconds: float = Field(
+        3600.0, description="How long finished jobs stay available"
+    )
+
+    # Batch endpoint (/process-batch)
+    batch_max_files: int = Field(
+        100, description="Maximum number of receipts in one batch request"
+    )
+    batch_max_file_bytes: int = Field(
+        20 * 1024 * 1024, description="Maximum size of a single image in a batch"
+    )
+
+    # Keep a copy of every upload in data/debug_visualizations (written in the background)
+    save_uploads: bool = Field(False, description="Persist original uploads to disk")
+
+    # Image pre-processing before OCR
+    ocr_max_side: int = Field(
+        1600, description="Downscale so the longer side is at most this (0 = off)"
+    )
+    ocr_grayscale: bool = Field(True, description="Convert to grayscale before OCR")
+    ocr_crop: bool = Field(True, description="Crop to the receipt's contour")
+    ocr_deskew: bool = Field(True, description="Straighten slightly rotated receipts")
+    ocr_angle_cls: Literal["always", "adaptive", "off"] = Field(
+        "adaptive", description="When to run PaddleOCR's text angle classifier"
+    )
+    ocr_angle_cls_sample: int = Field(
+        5, description="Boxes classified to decide if a receipt is upside down"
+    )
+
+    # Graceful shutdown
+    shutdown_drain_timeout_seconds: float = Field(
+        30.0, description="How long shutdown waits for in-flight receipts and jobs"
+    )
+
+    # Start-up warm-up: OCR, one LLM completion and one categorizer batch on a sample receipt
+    warmup_enabled: bool = Field(
+        True, description="Warm every model up before reporting ready"
+    )
+    warmup_image: Path | None = Field(
+        None, description="Warm-up receipt image (default: the bundled sample)"
+    )
+
+    # Request tracing: a Server-Timing header on every response, optionally a log line
+    trace_log: bool = Field(
+        False, description="Log every request's stage spans as one JSON line"
+    )
+
+    model_config = SettingsConfigDict(env_prefix="SR_", case_sensitive=False)
+
+    @property
+    def is_production(self) -> bool:
+        return self.environment.lower() in ("prod", "production")
 
 
 settings = Settings()
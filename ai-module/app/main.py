@@ -1,8 +1,25 @@
-from fastapi import FastAPI, Request, Depends
-from app.api.v1.endpoints import ocr
-from app.services.inference_service import get_inference_service, InferenceService
+import asyncio
+import signal
+import threading
+from functools import partial
+from typing import Callable
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.api.v1.endpoints import ocr, jobs
+from app.services.inference_service import (
+    get_inference_service,
+    loaded_inference_service,
+)
 from contextlib import asynccontextmanager
 from app.utils.logger import get_logger, configure_logging
+from app.config.rules import get_rule_store
+from app.config.settings import settings
+from app.services.lifecycle import LifecycleState, get_lifecycle
+from app.services.worker_pool import ParserWorkerPool
+from app.services.jobs import get_job_manager
+from app.utils.metrics import REGISTRY, scrape_lines
+from app.utils.tracing import start_trace
 import warnings
 from time import time
 
@@ -17,19 +34,146 @@ warnings.filterwarnings(
 )
 
 
-@asynccontextmanager
-async def lifespan(_app: FastAPI):
-    # Load ML models
-    configure_logging()
-    logger.info("Initializing AI models...")
+async def start_up() -> None:
+    """Loads the models and warms them up; readiness follows success."""
+    lifecycle = get_lifecycle()
     try:
-        get_inference_service()
+        logger.info("Initializing AI models...")
+        service = await run_in_threadpool(get_inference_service)
         logger.info("AI models loaded successfully.")
+        await get_job_manager().start()
+
+        if settings.warmup_enabled:
+            lifecycle.set(LifecycleState.WARMING_UP)
+            lifecycle.warmup = await run_in_threadpool(service.warm_up)
+            logger.info(f"Warm-up done: {lifecycle.warmup}")
+        lifecycle.set(LifecycleState.READY)
     except Exception as e:
         logger.error(f"Failed to load AI models: {e}")
+        lifecycle.set(LifecycleState.FAILED, error=str(e))
+
+
+def begin_drain() -> None:
+    """Withdraws readiness and stops admitting receipts and jobs."""
+    lifecycle = get_lifecycle()
+    if lifecycle.draining:
+        return
+    lifecycle.set(LifecycleState.DRAINING)
+    service = loaded_inference_service()
+    if service is None:
+        return
+    get_job_manager().close()
+    if service.admission is not None:
+        service.admission.close()
+
+
+async def drain(timeout: float) -> bool:
+    """
+    Stops admitting receipts and jobs, then waits up to timeout seconds for
+    the ones already accepted. Returns False if work was still running.
+    """
+    begin_drain()
+    service = loaded_inference_service()
+    if service is None:
+        return True
+
+    job_manager = get_job_manager()
+    deadline = time() + timeout
+    drained = await job_manager.drain(timeout)
+    if service.admission is not None:
+        drained = await service.admission.drain(max(0.0, deadline - time())) and drained
+    return drained
+
+
+# Drains started by SIGTERM; referenced so the tasks are not garbage collected
+_drain_tasks: set[asyncio.Task] = set()
+
+
+def start_draining(stop_server: Callable[[], None]) -> asyncio.Task:
+    """
+    Withdraws readiness at once, while the server still accepts connections
+    (so the load balancer sees /ready fail), waits for accepted receipts and
+    jobs, then lets the server stop.
+    """
+    begin_drain()
+    logger.info(
+        f"Draining before shutdown "
+        f"(up to {settings.shutdown_drain_timeout_seconds:.0f}s)..."
+    )
+
+    async def drain_then_stop() -> None:
+        drained = await drain(settings.shutdown_drain_timeout_seconds)
+        get_lifecycle().drained = drained
+        if not drained:
+            logger.warning("Drain deadline passed, stopping anyway.")
+        stop_server()
+
+    task = asyncio.get_running_loop().create_task(drain_then_stop())
+    _drain_tasks.add(task)
+    task.add_done_callback(_drain_tasks.discard)
+    return task
+
+
+def _chain_signal(previous, signum: int, frame) -> None:
+    if callable(previous):
+        previous(signum, frame)
+        return
+    signal.signal(signum, previous or signal.SIG_DFL)
+    signal.raise_signal(signum)
+
+
+def install_sigterm_drain() -> None:
+    """
+    Runs start_draining() on SIGTERM before handing the signal to uvicorn,
+    which would otherwise close the listening socket first and only then run
+    the lifespan shutdown. A second SIGTERM goes to uvicorn straight away.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        # Test clients and embedded servers run the app off the main thread
+        return
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def on_sigterm(signum, frame):
+        if get_lifecycle().draining:
+            _chain_signal(previous, signum, frame)
+            return
+        loop.call_soon_threadsafe(
+            start_draining, partial(_chain_signal, previous, signum, frame)
+        )
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    configure_logging()
+    # Models load in the background so /health answers during start-up;
+    # /ready turns true once loading and warm-up are done
+    startup_task = asyncio.create_task(start_up())
+    install_sigterm_drain()
 
     yield
 
+    lifecycle = get_lifecycle()
+    if not startup_task.done():
+        startup_task.cancel()
+    if lifecycle.drained is None:
+        # Not drained on SIGTERM (e.g. stopped with Ctrl+C)
+        logger.info(
+            f"Shutting down, draining in-flight work "
+            f"(up to {settings.shutdown_drain_timeout_seconds:.0f}s)..."
+        )
+        lifecycle.drained = await drain(settings.shutdown_drain_timeout_seconds)
+        if not lifecycle.drained:
+            logger.warning("Drain deadline passed, cancelling remaining work.")
+
+    service = loaded_inference_service()
+    if service is not None:
+        await get_job_manager().stop()
+        service.shutdown()
+    lifecycle.set(LifecycleState.STOPPED)
+
 
 app = FastAPI(title="SmartReceipt AI Module", version="1.0.0", lifespan=lifespan)
 
@@ -37,10 +181,21 @@ app = FastAPI(title="SmartReceipt AI Module", version="1.0.0", lifespan=lifespan
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     start_time = time()
+    # Set before call_next, so the endpoint's task sees the same trace
+    trace = start_trace(request.headers.get("X-Request-ID"))
     response = await call_next(request)
 
     process_time = time() - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    response.headers["X-Request-ID"] = trace.request_id
+    # For streaming responses this only covers the time until the first item
+    response.headers["Server-Timing"] = trace.server_timing()
+    if settings.trace_log:
+        trace.log(
+            method=request.method,
+            path=request.url.path,
+            status=response.status_code,
+        )
 
     if "ocr" in request.url.path:
         logger.info(f"Request to OCR endpoint processed in {process_time:.4f} seconds")
@@ -48,15 +203,105 @@ async def add_process_time_header(request: Request, call_next):
 
 
 app.include_router(ocr.router, prefix="/api/v1.0/ai/ocr", tags=["OCR"])
+app.include_router(jobs.router, prefix="/api/v1.0/ai/ocr", tags=["Jobs"])
 
 
 @app.get("/health")
-def health(service: InferenceService = Depends(get_inference_service)):
+def health():
+    """Liveness: answers as long as the process is up, including start-up and drain."""
+    lifecycle = get_lifecycle()
+    service = loaded_inference_service()
     status = {
-        "status": "ok",
+        # "ok" only once warm-up is done; until then the lifecycle state
+        "status": "ok" if lifecycle.ready else lifecycle.state.value,
+        "lifecycle": lifecycle.stats(),
         "models": {
-            "parser": service.parser is not None,
-            "categorizer": service.categorizer is not None,
+            "parser": service is not None and service.parser is not None,
+            "categorizer": service is not None and service.categorizer is not None,
+            "load_seconds": service.load_times if service is not None else None,
         },
     }
+    if service is None:
+        return status
+
+    cache_stats = service.cache_stats()
+    if cache_stats:
+        status["cache"] = cache_stats
+    status["rules"] = get_rule_store().stats()
+    ocr_pipeline = getattr(service.parser, "ocr_pipeline", None)
+    if ocr_pipeline is not None:
+        status["ocr"] = ocr_pipeline.stats()
+    if service.admission is not None:
+        status["admission"] = service.admission.stats()
+    status["jobs"] = get_job_manager().stats()
+    if isinstance(service.parser, ParserWorkerPool):
+        status["workers"] = service.parser.stats()
+    visualizer_stats = getattr(service.visualizer, "stats", None)
+    if visualizer_stats is not None:
+        status["visualizer"] = visualizer_stats()
+    batcher = getattr(service.categorizer, "batcher", None)
+    if batcher is not None:
+        status["categorizer_batching"] = batcher.stats()
     return status
+
+
+@app.get("/ready")
+def ready():
+    """Readiness: 200 only after models are loaded and warmed up, 503 otherwise."""
+    lifecycle = get_lifecycle()
+    return JSONResponse(
+        status_code=200 if lifecycle.ready else 503,
+        content={"status": lifecycle.state.value, "ready": lifecycle.ready},
+    )
+
+
+def _scraped_metrics(service) -> list[str]:
+    """Queue depths and cache counters, read from the components' stats()."""
+    lifecycle = get_lifecycle()
+    lines = scrape_lines(
+        "smartreceipt_ready",
+        "1 once models are loaded and warm",
+        {(): int(lifecycle.ready)},
+    )
+    if service is None:
+        return lines
+
+    queues = {(("queue", "jobs"),): get_job_manager().stats()["queue_depth"]}
+    in_flight = {(("stage", "jobs"),): get_job_manager().stats()["running"]}
+    if service.admission is not None:
+        admission = service.admission.stats()
+        queues[(("queue", "admission"),)] = admission["queue_depth"]
+        in_flight[(("stage", "admission"),)] = admission["in_flight"]
+    if isinstance(service.parser, ParserWorkerPool):
+        queues[(("queue", "parser_workers"),)] = service.parser.stats()["pending"]
+    batcher = getattr(service.categorizer, "batcher", None)
+    if batcher is not None:
+        queues[(("queue", "categorizer_batcher"),)] = batcher.stats()["queue_depth"]
+    visualizer_stats = getattr(service.visualizer, "stats", None)
+    if visualizer_stats is not None:
+        queues[(("queue", "visualizer"),)] = visualizer_stats()["pending"]
+    lines += scrape_lines("smartreceipt_queue_depth", "Work waiting per queue", queues)
+    lines += scrape_lines(
+        "smartreceipt_in_flight", "Work currently being processed", in_flight
+    )
+
+    lookups, ratios = {}, {}
+    for cache, stats in service.cache_stats().items():
+        lookups[(("cache", cache), ("result", "hit"))] = stats["hits"]
+        lookups[(("cache", cache), ("result", "miss"))] = stats["misses"]
+        ratios[(("cache", cache),)] = stats["hit_rate"]
+    lines += scrape_lines(
+        "smartreceipt_cache_lookups_total",
+        "Cache lookups by result",
+        lookups,
+        "counter",
+    )
+    lines += scrape_lines("smartreceipt_cache_hit_ratio", "Share of cache hits", ratios)
+    return lines
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of stage latencies, tokens, queues and caches."""
+    body = REGISTRY.render(_scraped_metrics(loaded_inference_service()))
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
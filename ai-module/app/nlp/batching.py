@@ -0,0 +1,166 @@
+import queue
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from time import monotonic
+
+from app.nlp.categorizer import PredictFn, ProductCategorizer, assign_categories
+from app.services.interfaces import BaseCategorizer
+from app.utils.logger import get_logger
+
+logger = get_logger("CategorizerBatcher")
+
+
+class _BatchRequest:
+    __slots__ = ("names", "future")
+
+    def __init__(self, names: list[str]):
+        self.names = names
+        self.future: Future = Future()
+
+
+class MicroBatcher:
+    """
+    Collects product names from concurrent callers and runs them through the
+    model in one forward pass. A batch is flushed when it reaches max_batch_size
+    names or when the oldest request has waited max_wait_ms.
+    Requests are never split, so a single large receipt forms its own batch.
+    """
+
+    def __init__(
+        self, predict_fn: PredictFn, max_batch_size: int = 64, max_wait_ms: float = 10
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: queue.Queue[_BatchRequest | None] = queue.Queue()
+        self._carry_over: _BatchRequest | None = None
+        self.batches = 0
+        self.requests = 0
+        self.names = 0
+        self._worker = threading.Thread(
+            target=self._run, name="categorizer-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, names: list[str]) -> Future:
+        request = _BatchRequest(names)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, names: list[str]) -> list[tuple[str, float]]:
+        """Blocking helper: submits the names and waits for their predictions."""
+        if not names:
+            return []
+        return self.submit(names).result()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+
+    def _next_batch(self) -> list[_BatchRequest] | None:
+        first = self._carry_over or self._queue.get()
+        self._carry_over = None
+        if first is None:
+            return None
+
+        batch = [first]
+        size = len(first.names)
+        deadline = monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # Finish the current batch, then stop
+                self._queue.put(None)
+                break
+            if size + len(request.names) > self.max_batch_size:
+                self._carry_over = request
+                break
+            batch.append(request)
+            size += len(request.names)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            names = [name for request in batch for name in request.names]
+            try:
+                predictions = self.predict_fn(names)
+            except Exception as e:
+                logger.error(f"Batched categorization failed: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.names += len(names)
+
+            offset = 0
+            for request in batch:
+                end = offset + len(request.names)
+                request.future.set_result(predictions[offset:end])
+                offset = end
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "names": self.names,
+            "avg_batch_size": round(self.names / self.batches, 2)
+            if self.batches
+            else 0.0,
+            "queue_depth": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+class BatchingCategorizer(BaseCategorizer):
+    """Categorizer that shares model forward passes between concurrent receipts."""
+
+    def __init__(
+        self,
+        categorizer: ProductCategorizer,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 10,
+    ):
+        self.categorizer = categorizer
+        self.batcher = MicroBatcher(
+            categorizer.predict_uncached, max_batch_size, max_wait_ms
+        )
+
+    @property
+    def model(self):
+        return self.categorizer.model
+
+    @property
+    def name_cache(self):
+        return self.categorizer.name_cache
+
+    def export_cache(self, path: Path) -> int:
+        return self.categorizer.export_cache(path)
+
+    def warm_up(self, product_names: list[str]) -> None:
+        # Through the batcher, so its worker thread is exercised too
+        self.batcher.predict(product_names)
+
+    def categorize_items(self, items: list) -> list:
+        if not items:
+            return []
+
+        logger.info(f"Queueing {len(items)} products for batched categorization...")
+        # Cached names are answered directly, only misses wait for a batch
+        predictions = self.categorizer.predict(
+            [item["productName"] for item in items], model_fn=self.batcher.predict
+        )
+        return assign_categories(items, predictions)
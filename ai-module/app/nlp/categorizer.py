@@ -1,28 +1,75 @@
-from setfit import SetFitModel
+import hashlib
+import json
+import numpy as np
 from pathlib import Path
+from typing import Callable
+from app.ocr.llm_cache import fingerprint_model
+from app.utils.cache import LRUCache
 from app.utils.logger import get_logger
+from app.utils.matcher import KeywordMatcher
 from app.services.interfaces import BaseCategorizer
-from app.nlp.config import KEYWORDS, CONFIDENCE_THRESHOLD
+from app.config.rules import get_rules
+from app.nlp.config import CONFIDENCE_THRESHOLD
 
 logger = get_logger("ProductCategorizer")
 
+PredictFn = Callable[[list[str]], list[tuple[str, float]]]
 
-def _check_keywords(product_name: str) -> str | None:
+
+def _check_keywords(
+    product_name: str, matcher: KeywordMatcher | None = None
+) -> str | None:
     """Helper function to check for keywords in the product name."""
-    name_upper = product_name.upper()
-    for category, words in KEYWORDS.items():
-        if any(word in name_upper for word in words):
-            return category
-    return None
+    # Compiled from KEYWORDS (or the live rules file); category order is priority
+    matcher = matcher or get_rules().keyword_matcher
+    return matcher.first_group(product_name.upper())
+
+
+def assign_categories(items: list, predictions: list[tuple[str, float]]) -> list:
+    """Sets categoryName on each item: keywords first, then confident model output."""
+    matcher = get_rules().keyword_matcher
+    for item, (ai_category, conf) in zip(items, predictions):
+        name = item["productName"]
+
+        keyword_category = _check_keywords(name, matcher)
+
+        if keyword_category:
+            item["categoryName"] = keyword_category
+            continue
+
+        if conf >= CONFIDENCE_THRESHOLD:
+            item["categoryName"] = ai_category
+        else:
+            item["categoryName"] = "Other"
+
+    return items
+
+
+def normalize_name(product_name: str) -> str:
+    """Cache key for a product name: upper case with collapsed whitespace."""
+    return " ".join(product_name.upper().split())
 
 
 class ProductCategorizer(BaseCategorizer):
-    def __init__(self):
+    def __init__(self, cache_max_entries: int = 0, n_threads: int | None = None):
         self.model_path = Path(__file__).parent / "models/my-receipt-categorizer"
+        self._labels: list[str] | None = None
+        self._fingerprint: str | None = None
+        # normalized product name -> (category, confidence) predicted by the model
+        self.name_cache = LRUCache(cache_max_entries) if cache_max_entries else None
 
         logger.info("Loading SetFit model...")
 
         if self.model_path.exists():
+            # Imported here: setfit pulls in torch, which only a loaded categorizer needs
+            from setfit import SetFitModel
+
+            if n_threads:
+                import torch
+
+                # Process-wide: leaves the remaining cores to PaddleOCR and llama.cpp
+                torch.set_num_threads(n_threads)
+
             # force model to use cpu for llama resource optimization
             self.model = SetFitModel.from_pretrained(str(self.model_path), device="cpu")
 
@@ -31,31 +78,166 @@ class ProductCategorizer(BaseCategorizer):
             logger.error(f"Error: SetFit model not found at {self.model_path}")
             raise FileNotFoundError("SetFit model not found.")
 
-    def categorize_items(self, items: list) -> list:
-        if not items:
+    def _class_labels(self, n_classes: int) -> list[str]:
+        """Column order of predict_proba, mapped to category names the same way predict() does."""
+        if self._labels is None:
+            classes = getattr(self.model.model_head, "classes_", None)
+            labels = list(classes) if classes is not None else list(range(n_classes))
+            if self.model.labels and all(
+                isinstance(label, (int, np.integer)) for label in labels
+            ):
+                labels = [self.model.labels[int(label)] for label in labels]
+            self._labels = [str(label) for label in labels]
+        return self._labels
+
+    def model_fingerprint(self) -> str:
+        """Fingerprint of every file in the model directory; exported predictions carry it."""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for path in sorted(self.model_path.rglob("*")):
+                if path.is_file():
+                    relative = path.relative_to(self.model_path).as_posix()
+                    digest.update(f"{relative}:{fingerprint_model(path)}".encode())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def predict_uncached(self, product_names: list[str]) -> list[tuple[str, float]]:
+        """Runs the model over the names, bypassing the name cache."""
+        if not product_names:
             return []
 
-        logger.info(f"Categorizing {len(items)} products...")
-        productNames = [item["productName"] for item in items]
-
-        # Inference
-        categories = self.model.predict(productNames)
-        probs = self.model.predict_proba(productNames)
-
-        for i, item in enumerate(items):
-            ai_category = str(categories[i])
-            conf = probs[i].max().item()
-            name = item["productName"]
+        # Single forward pass: label and confidence both come from the probability matrix
+        probs = np.asarray(self.model.predict_proba(product_names, as_numpy=True))
+        best = probs.argmax(axis=1)
+        confidences = probs.max(axis=1)
+        labels = self._class_labels(probs.shape[1])
+
+        return [
+            (labels[index], conf)
+            for index, conf in zip(best.tolist(), confidences.tolist())
+        ]
+
+    def warm_up(self, product_names: list[str]) -> None:
+        self.predict_uncached(product_names)
+
+    def predict(
+        self,
+        product_names: list[str],
+        model_fn: PredictFn | None = None,
+    ) -> list[tuple[str, float]]:
+        """
+        Returns the model's (category, confidence) for each product name.
+        Only names missing from the cache go through model_fn (the model by default).
+        """
+        if not product_names:
+            return []
 
-            keyword_category = _check_keywords(name)
+        model_fn = model_fn or self.predict_uncached
+        if self.name_cache is None:
+            return model_fn(product_names)
 
-            if keyword_category:
-                item["categoryName"] = keyword_category
+        keys = [normalize_name(name) for name in product_names]
+        predictions = {}
+        missing_names = []
+        missing_keys = []
+        for key, name in zip(keys, product_names):
+            if key in predictions or key in missing_keys:
                 continue
-
-            if conf >= CONFIDENCE_THRESHOLD:
-                item["categoryName"] = ai_category
+            cached = self.name_cache.get(key)
+            if cached is None:
+                missing_keys.append(key)
+                missing_names.append(name)
             else:
-                item["categoryName"] = "Other"
+                predictions[key] = cached
+
+        if missing_names:
+            for key, prediction in zip(missing_keys, model_fn(missing_names)):
+                self.name_cache.put(key, prediction)
+                predictions[key] = prediction
+
+        return [predictions[key] for key in keys]
+
+    def warm_up_cache(
+        self, path: Path, max_predict: int = 500, batch_size: int = 64
+    ) -> int:
+        """
+        Pre-fills the name cache from a file written by export_cache or a
+        frequency list (one name per line, most frequent first, optional
+        tab-separated count). Exported predictions of the same model are loaded
+        as they are; anything else goes through the model, at most max_predict
+        names, so a model change or a long list does not hold up start-up.
+        """
+        if self.name_cache is None or not path.exists():
+            return 0
+
+        predictions = None
+        if path.suffix == ".json":
+            with open(path, "r", encoding="utf-8") as f:
+                exported = json.load(f)
+            # Exports without a fingerprint predate it and are re-predicted
+            entries = (
+                exported.get("entries", []) if isinstance(exported, dict) else exported
+            )
+            names = [entry["productName"] for entry in entries]
+            if (
+                isinstance(exported, dict)
+                and exported.get("model") == self.model_fingerprint()
+            ):
+                predictions = [
+                    (entry["categoryName"], entry["confidence"]) for entry in entries
+                ]
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                names = [line.split("\t")[0].strip() for line in f]
+
+        unique = {}
+        for index, name in enumerate(names):
+            if name:
+                unique.setdefault(normalize_name(name), index)
+        indices = list(unique.values())[: self.name_cache.max_entries]
+        if predictions is None:
+            indices = indices[:max_predict]
+            names = [names[index] for index in indices]
+            predictions = []
+            for start in range(0, len(names), batch_size):
+                predictions.extend(
+                    self.predict_uncached(names[start : start + batch_size])
+                )
+        else:
+            names = [names[index] for index in indices]
+            predictions = [predictions[index] for index in indices]
+
+        # Most frequent names go in last, so they are the last to be evicted
+        for name, prediction in reversed(list(zip(names, predictions))):
+            self.name_cache.put(normalize_name(name), prediction)
+
+        logger.info(f"Pre-warmed categorizer cache with {len(names)} product names.")
+        return len(names)
+
+    def export_cache(self, path: Path) -> int:
+        """Writes the cached predictions, most recently used first, with the model fingerprint."""
+        if self.name_cache is None:
+            return 0
+
+        entries = [
+            {"productName": name, "categoryName": category, "confidence": conf}
+            for name, (category, conf) in reversed(self.name_cache.items())
+        ]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"model": self.model_fingerprint(), "entries": entries},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        return len(entries)
+
+    def categorize_items(self, items: list) -> list:
+        if not items:
+            return []
+
+        logger.info(f"Categorizing {len(items)} products...")
+        productNames = [item["productName"] for item in items]
 
-        return items
+        return assign_categories(items, self.predict(productNames))
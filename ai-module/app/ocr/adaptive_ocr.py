@@ -0,0 +1,141 @@
+import copy
+import threading
+from time import perf_counter
+
+import numpy as np
+from paddleocr import PaddleOCR
+
+from app.utils.logger import get_logger
+from app.utils.tracing import record_stage
+
+logger = get_logger("AdaptiveOcr")
+
+try:
+    # PaddleOCR puts its bundled "tools" package on sys.path when it is imported
+    from tools.infer.predict_system import sorted_boxes
+    from tools.infer.utility import get_rotate_crop_image
+except ImportError:
+    # Internals of PaddleOCR 2.7; without them the stages can't be run separately
+    sorted_boxes = get_rotate_crop_image = None
+
+ANGLE_CLS_MODES = ("always", "adaptive", "off")
+
+
+class AdaptiveOcr:
+    """
+    Runs PaddleOCR's detection, angle classification and recognition stages
+    separately. In "adaptive" mode the angle classifier first looks at a small,
+    evenly spread sample of text boxes and only classifies every box when the
+    sample contains an upside-down line; "always" classifies every box like
+    PaddleOCR.ocr(cls=True), "off" never does. Per-stage timings are collected.
+    If the PaddleOCR release does not ship the internals this relies on, every
+    image goes through plain PaddleOCR.ocr() instead ("adaptive" then
+    classifies every box) and only the total time is recorded.
+    """
+
+    def __init__(self, engine: PaddleOCR, mode: str = "adaptive", sample_size: int = 5):
+        if mode not in ANGLE_CLS_MODES:
+            raise ValueError(f"angle cls mode must be one of {ANGLE_CLS_MODES}")
+        if mode != "off" and getattr(engine, "text_classifier", None) is None:
+            raise ValueError("PaddleOCR was created without use_angle_cls")
+        self.engine = engine
+        self.mode = mode
+        self.sample_size = max(1, sample_size)
+        self._lock = threading.Lock()
+        self._totals = {"det": 0.0, "cls": 0.0, "rec": 0.0, "all": 0.0}
+        self.images = 0
+        self.boxes = 0
+        self.cls_skipped = 0
+        self.cls_full = 0
+        self.staged = sorted_boxes is not None and get_rotate_crop_image is not None
+        if not self.staged:
+            logger.warning(
+                "PaddleOCR internals (tools.infer) not found, using plain ocr()."
+            )
+
+    def __call__(self, image: np.ndarray) -> list[str]:
+        """Returns the recognized lines in reading order."""
+        if not self.staged:
+            return self._ocr_whole(image)
+
+        start = perf_counter()
+        timings = {"det": 0.0, "cls": 0.0, "rec": 0.0}
+
+        dt_boxes, timings["det"] = self.engine.text_detector(image)
+        if dt_boxes is None or len(dt_boxes) == 0:
+            self._record(timings, perf_counter() - start, 0, None)
+            return []
+
+        dt_boxes = sorted_boxes(dt_boxes)
+        crops = [get_rotate_crop_image(image, copy.deepcopy(box)) for box in dt_boxes]
+
+        classified_all = None
+        if self.mode == "always" or (
+            self.mode == "adaptive" and self._sample_is_rotated(crops, timings)
+        ):
+            crops, _, elapsed = self.engine.text_classifier(crops)
+            timings["cls"] += elapsed
+            classified_all = True
+        elif self.mode == "adaptive":
+            classified_all = False
+
+        rec_res, timings["rec"] = self.engine.text_recognizer(crops)
+        lines = [text for text, score in rec_res if score >= self.engine.drop_score]
+
+        self._record(timings, perf_counter() - start, len(crops), classified_all)
+        logger.info(
+            f"OCR {len(crops)} boxes: det {timings['det'] * 1000:.0f} ms, "
+            f"cls {timings['cls'] * 1000:.0f} ms, rec {timings['rec'] * 1000:.0f} ms"
+        )
+        return lines
+
+    def _ocr_whole(self, image: np.ndarray) -> list[str]:
+        start = perf_counter()
+        result = self.engine.ocr(image, cls=self.mode != "off")
+        # One page per image; None when nothing was detected
+        page = (result[0] if result else None) or []
+        elapsed = perf_counter() - start
+        record_stage("ocr", elapsed)
+        self._record({}, elapsed, len(page), True if self.mode != "off" else None)
+        return [text for _, (text, _) in page]
+
+    def _sample_is_rotated(self, crops: list, timings: dict) -> bool:
+        if len(crops) <= self.sample_size:
+            return True
+        indices = np.linspace(0, len(crops) - 1, self.sample_size).round().astype(int)
+        # The classifier rotates the images of the list it gets, so hand it a new list
+        _, cls_res, elapsed = self.engine.text_classifier([crops[i] for i in indices])
+        timings["cls"] += elapsed
+        threshold = self.engine.args.cls_thresh
+        return any("180" in label and score > threshold for label, score in cls_res)
+
+    def _record(
+        self, timings: dict, total: float, boxes: int, classified_all: bool | None
+    ) -> None:
+        for stage, elapsed in timings.items():
+            record_stage(f"ocr_{stage}", elapsed)
+        with self._lock:
+            for stage, elapsed in timings.items():
+                self._totals[stage] += elapsed
+            self._totals["all"] += total
+            self.images += 1
+            self.boxes += boxes
+            if classified_all is True:
+                self.cls_full += 1
+            elif classified_all is False:
+                self.cls_skipped += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            images = self.images or 1
+            return {
+                "angle_cls_mode": self.mode,
+                "images": self.images,
+                "avg_boxes": round(self.boxes / images, 1),
+                "avg_ms": {
+                    stage: round(total * 1000 / images, 1)
+                    for stage, total in self._totals.items()
+                },
+                "cls_full_runs": self.cls_full,
+                "cls_skipped": self.cls_skipped,
+            }
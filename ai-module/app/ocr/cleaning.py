@@ -1,84 +1,134 @@
 import re
 
+from app.config.rules import get_rules
+
+# Built-in rules. The compiled rules in use come from app.config.rules and can be
+# overridden live through the rules file under data_dir.
+BLACKLIST = (
+    "OBNIZKA",
+    "RABAT",
+    "PROMOCJA",
+    "GRATIS",
+    "ZYSKUJESZ",
+    "SUMA",
+    "PODSUMOWANIE",
+    "RAZEM",
+    "DO ZAPŁATY",
+    "DO ZAPLATY",
+    "DOZAPLATY",
+    "PŁATNOŚĆ",
+    "PLATNOSC",
+    "RESZTA",
+    "KARTA",
+    "GOTÓWKA",
+    "GOTOWKA",
+    "ROZLICZENIE",
+    "ROZLICZEE",
+    "WALUTA",
+    "KREDYT",
+    "PLN",
+    "FISKALNY",
+    "NIEFISKALNY",
+    "PTU",
+    "VAT",
+    "NETTO",
+    "BRUTTO",
+    "OPODATKOWANA",
+    "STAWKA",
+    "PODATEK",
+    "KWOTA",
+    "NIP",
+    "REGON",
+    "BDO",
+    "ADRES",
+    "UL.",
+    "ULICA",
+    "SPÓŁKA",
+    "SPOLKA",
+    "SPOTKA",
+    "TOWA",
+    "KOUANDY",
+    "SPRZEDAZ",
+    "SPRZEDAŻ",
+    "DATA",
+    "GODZINA",
+    "NR SYS",
+    "PARAGON",
+    "KASJER",
+    "KASA",
+    "WYDRUK",
+    "HANDLOWA",
+    "SKLEP",
+    "FIRMA",
+    "EAG",
+    "F200",
+)
+
+GARBAGE_MARKERS = (
+    "NIP",
+    "REGON",
+    "BDO",
+    "SPÓŁKA",
+    "SPOLKA",
+    "ADRES:",
+    "UL.",
+    "PARAGON FISKALNY",
+    "F20",
+    "EAG",
+    "SPRZEDAZ",
+    "SPRZEDAŻ",
+    "OPODATKOWANA",
+    "PTU",
+    "PODATEK",
+    "NETTO",
+    "BRUTTO",
+    "KWOTA",
+    "ROZLICZENIE",
+    "PLATNOSC",
+    "PŁATNOŚĆ",
+    "GOTÓWKA",
+    "KARTA",
+    "RESZTA",
+    "SUMA:",
+    "DO ZAPLATY",
+    "DO ZAPŁATY",
+    "DOZAPLATY",
+    "RAZEM",
+    "NR SYS",
+    "KASJER",
+    "WYDRUK",
+    "DATA",
+    "GODZINA",
+    "PLN",
+    "EUR",
+    "WALUTA",
+    "KREDYT",
+)
+
+# Compiled once at import; the cleaning functions run for every OCR line and item
+_DATE_PATTERN = re.compile(r"\d{2}[-.]\d{2}[-.]\d{2,4}")
+_TIME_PATTERN = re.compile(r"\d{2}:\d{2}")
+_PRICE_PATTERN = re.compile(r"\d+[.,]\d{2}")
+_TRASH_TAIL_PATTERN = re.compile(r"(\*|\s\d+[\s]?szt|\s\d+[\s]?kg).*", re.IGNORECASE)
+_SINGLE_CHAR_SUFFIX_PATTERN = re.compile(r"\s+[A-Z0-9]$")
+_NUMERIC_LINE_PATTERN = re.compile(r"^[\d.,\s]+[A-Za-z]?$")
+
 
 def clean_items(items: list[dict]) -> list[dict]:
     clean_items = []
-
-    BLACKLIST = [
-        "OBNIZKA",
-        "RABAT",
-        "PROMOCJA",
-        "GRATIS",
-        "ZYSKUJESZ",
-        "SUMA",
-        "PODSUMOWANIE",
-        "RAZEM",
-        "DO ZAPŁATY",
-        "DO ZAPLATY",
-        "DOZAPLATY",
-        "PŁATNOŚĆ",
-        "PLATNOSC",
-        "RESZTA",
-        "KARTA",
-        "GOTÓWKA",
-        "GOTOWKA",
-        "ROZLICZENIE",
-        "ROZLICZEE",
-        "WALUTA",
-        "KREDYT",
-        "PLN",
-        "FISKALNY",
-        "NIEFISKALNY",
-        "PTU",
-        "VAT",
-        "NETTO",
-        "BRUTTO",
-        "OPODATKOWANA",
-        "STAWKA",
-        "PODATEK",
-        "KWOTA",
-        "NIP",
-        "REGON",
-        "BDO",
-        "ADRES",
-        "UL.",
-        "ULICA",
-        "SPÓŁKA",
-        "SPOLKA",
-        "SPOTKA",
-        "TOWA",
-        "KOUANDY",
-        "SPRZEDAZ",
-        "SPRZEDAŻ",
-        "DATA",
-        "GODZINA",
-        "NR SYS",
-        "PARAGON",
-        "KASJER",
-        "KASA",
-        "WYDRUK",
-        "HANDLOWA",
-        "SKLEP",
-        "FIRMA",
-        "EAG",
-        "F200",
-    ]
-
-    date_pattern = re.compile(r"\d{2}[-.]\d{2}[-.]\d{2,4}")
-    time_pattern = re.compile(r"\d{2}:\d{2}")
-    trash_tail_pattern = re.compile(r"(\*|\s\d+[\s]?szt|\s\d+[\s]?kg).*", re.IGNORECASE)
+    blacklist_pattern = get_rules().blacklist_pattern
 
     for item in items:
         name = item.get("productName", "Nieznany")
         name_upper = name.upper()
 
-        if any(bad_word in name_upper for bad_word in BLACKLIST):
+        if blacklist_pattern.search(name_upper):
             continue
 
         if len(name) > 20 and " " not in name:
             continue
 
-        if date_pattern.search(name) or time_pattern.search(name):
+        if _DATE_PATTERN.search(name) or _TIME_PATTERN.search(name):
             continue
 
         if len(name) < 3:
@@ -94,7 +144,7 @@ def clean_items(items: list[dict]) -> list[dict]:
             price = float(price_raw)
         elif isinstance(price_raw, str):
             try:
-                found_prices = re.findall(r"\d+[.,]\d{2}", price_raw.replace(",", "."))
+                found_prices = _PRICE_PATTERN.findall(price_raw.replace(",", "."))
                 if found_prices:
                     price = float(found_prices[-1])
                 else:
@@ -115,8 +165,8 @@ def clean_items(items: list[dict]) -> list[dict]:
         if price > 2000.0:
             continue
 
-        name = trash_tail_pattern.sub("", name)
-        name = re.sub(r"\s+[A-Z0-9]$", "", name)
+        name = _TRASH_TAIL_PATTERN.sub("", name)
+        name = _SINGLE_CHAR_SUFFIX_PATTERN.sub("", name)
         name = name.lstrip(".,-* ")
 
         if not name.strip():
@@ -132,62 +182,22 @@ def clean_items(items: list[dict]) -> list[dict]:
 def clean_raw_text(raw_text: str) -> str:
     lines = raw_text.split("\n")
     filtered_lines = []
-
-    GARBAGE_MARKERS = [
-        "NIP",
-        "REGON",
-        "BDO",
-        "SPÓŁKA",
-        "SPOLKA",
-        "ADRES:",
-        "UL.",
-        "PARAGON FISKALNY",
-        "F20",
-        "EAG",
-        "SPRZEDAZ",
-        "SPRZEDAŻ",
-        "OPODATKOWANA",
-        "PTU",
-        "PODATEK",
-        "NETTO",
-        "BRUTTO",
-        "KWOTA",
-        "ROZLICZENIE",
-        "PLATNOSC",
-        "PŁATNOŚĆ",
-        "GOTÓWKA",
-        "KARTA",
-        "RESZTA",
-        "SUMA:",
-        "DO ZAPLATY",
-        "DO ZAPŁATY",
-        "DOZAPLATY",
-        "RAZEM",
-        "NR SYS",
-        "KASJER",
-        "WYDRUK",
-        "DATA",
-        "GODZINA",
-        "PLN",
-        "EUR",
-        "WALUTA",
-        "KREDYT",
-    ]
+    garbage_pattern = get_rules().garbage_pattern
 
     for line in lines:
         line_clean = line.strip()
         line_upper = line_clean.upper()
 
-        if any(marker in line_upper for marker in GARBAGE_MARKERS):
+        if garbage_pattern.search(line_upper):
             continue
 
         if len(line_clean) < 3:
             continue
 
-        if re.search(r"\d{2}[-.]\d{2}[-.]\d{2,4}", line_clean):
+        if _DATE_PATTERN.search(line_clean):
             continue
 
-        if re.match(r"^[\d.,\s]+[A-Za-z]?$", line_clean):
+        if _NUMERIC_LINE_PATTERN.match(line_clean):
             continue
 
         if len(line_clean) > 20 and " " not in line_clean:
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+
+from app.utils.logger import get_logger
+
+logger = get_logger("LLMResponseCache")
+
+# Bytes hashed from each end of the model file; hashing a multi-GB GGUF in full
+# would add seconds to every start.
+_FINGERPRINT_CHUNK = 1024 * 1024
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so OCR spacing differences map to the same key."""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def fingerprint_model(model_path: Path) -> str:
+    """Cheap, stable fingerprint of a model file: name, size, head and tail."""
+    digest = hashlib.sha256()
+    stat = model_path.stat()
+    digest.update(f"{model_path.name}:{stat.st_size}".encode())
+    with open(model_path, "rb") as f:
+        digest.update(f.read(_FINGERPRINT_CHUNK))
+        if stat.st_size > _FINGERPRINT_CHUNK:
+            f.seek(max(stat.st_size - _FINGERPRINT_CHUNK, _FINGERPRINT_CHUNK))
+            digest.update(f.read(_FINGERPRINT_CHUNK))
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Persistent SQLite cache of the OCR text -> LLM items step.
+    Keys combine the normalized text with a namespace (model + prompt fingerprint),
+    so swapping the model or editing the prompt never returns stale answers.
+    """
+
+    def __init__(self, db_path: Path, max_entries: int = 10000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " items TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_hit REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(namespace: str, text: str) -> str:
+        return hashlib.sha256(
+            f"{namespace}\n{normalize_text(text)}".encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> list[dict] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT items FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET last_hit = ? WHERE key = ?", (time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, items: list[dict]) -> None:
+        payload = json.dumps(items, ensure_ascii=False)
+        now = time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, items, created, last_hit)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, payload, now, now),
+                )
+                self._prune()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to store LLM cache entry: {e}")
+
+    def _prune(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN"
+                " (SELECT key FROM llm_cache ORDER BY last_hit ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,9 +1,13 @@
 import json
-import signal
 import os
+import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator
 
 import llama_cpp
+import numpy as np
 from llama_cpp import Llama
 from llama_cpp.llama_types import (
     ChatCompletionRequestSystemMessage,
@@ -12,32 +16,99 @@ from llama_cpp.llama_types import (
 )
 from paddleocr import PaddleOCR
 from app.utils.logger import get_logger
+from app.utils import tracing
+from app.utils.metrics import LLM_TOKENS, LLM_TOKENS_PER_SECOND
+from app.utils.warmup import WARMUP_LINES
 from app.services.interfaces import BaseParser
 from .cleaning import clean_items, clean_raw_text
+from .adaptive_ocr import AdaptiveOcr
+from .llm_cache import LLMResponseCache, fingerprint_model
+from .preprocessing import PreprocessConfig, preprocess
+from .stream_json import IncrementalItemParser
 
 logger = get_logger("LocalLlmParser")
 
-try:
-    signal.signal(signal.SIGINT, signal.default_int_handler)
-    signal.signal(signal.SIGTERM, signal.SIG_DFL)
-except (ValueError, OSError):
-    pass
+JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "productName": {"type": "string"},
+                    "price": {"type": "number"},
+                    "quantity": {"type": "number"},
+                },
+                "required": ["productName", "price", "quantity"],
+            },
+        }
+    },
+    "required": ["items"],
+}
+
+SYSTEM_PROMPT = "Jesteś parserem paragonów. Zwracaj TYLKO JSON zgodnie ze schematem."
+
+USER_PROMPT_TEMPLATE = """
+        Wyciągnij listę produktów.
+
+        ZASADY:
+        1. Analizuj linia po linii.
+        2. Quantity zawsze 1.0 (chyba że tekst mówi inaczej).
+        3. Zachowaj każde wystąpienie produktu.
+        4. Poprawiaj literówki.
+
+        INPUT (OCR):
+        '''
+        {text_to_process}
+        '''
+        """
+
+MODEL_DIRECTORY = Path("app/ocr/models")
+
+GENERATION_PARAMS = {"temperature": 0.1, "max_tokens": 4096, "repeat_penalty": 1.05}
 
 
 class LLMReceiptParser(BaseParser):
-    def __init__(self):
+    def __init__(
+        self,
+        llm_cache: LLMResponseCache | None = None,
+        n_threads: int | None = None,
+        preprocess_config: PreprocessConfig | None = None,
+        angle_cls: str = "adaptive",
+        angle_cls_sample: int = 5,
+        n_ctx: int = 4096,
+        n_batch: int = 1024,
+        gpu_layers: int | None = None,
+        rec_batch_size: int = 6,
+    ):
+        self.preprocess_config = preprocess_config or PreprocessConfig()
+        # n_threads caps both PaddleOCR and llama.cpp, so several parsers can share a box
+        thread_kwargs = {"cpu_threads": n_threads} if n_threads else {}
         logger.info("Loading PaddleOCR (CPU mode)...")
         self.ocr = PaddleOCR(
-            use_angle_cls=True, lang="pl", show_log=False, use_gpu=False
+            use_angle_cls=angle_cls != "off",
+            lang="pl",
+            show_log=False,
+            use_gpu=False,
+            rec_batch_num=rec_batch_size,
+            **thread_kwargs,
+        )
+        self.ocr_pipeline = AdaptiveOcr(
+            self.ocr, mode=angle_cls, sample_size=angle_cls_sample
         )
+        # Neither engine is thread-safe; parse_batch still overlaps OCR of one
+        # receipt with the LLM pass of another, so each engine has its own lock
+        self._ocr_lock = threading.Lock()
+        self._llm_lock = threading.Lock()
 
-        MODEL_DIRECTORY_PATH = "app/ocr/models"
-        model_files = Path(MODEL_DIRECTORY_PATH).glob("*.gguf")
-        if not model_files:
-            raise FileNotFoundError(f"No model files found in {MODEL_DIRECTORY_PATH}")
-        MODEL_PATH = str(next(model_files))
+        model_file = next(MODEL_DIRECTORY.glob("*.gguf"), None)
+        if model_file is None:
+            raise FileNotFoundError(f"No model files found in {MODEL_DIRECTORY}")
+        MODEL_PATH = str(model_file)
 
-        gpu_layers = int(os.getenv("SR_GPU_LAYERS", -1))
+        if gpu_layers is None:
+            gpu_layers = int(os.getenv("SR_GPU_LAYERS", -1))
         logger.info(
             f"Loading model from {MODEL_PATH} on GPU with {gpu_layers} GPU layers..."
         )
@@ -47,49 +118,88 @@ class LLMReceiptParser(BaseParser):
             )
         else:
             logger.info("Llama CPP supports GPU offload.")
+        llama_kwargs = dict(
+            model_path=MODEL_PATH,
+            n_ctx=n_ctx,
+            n_gpu_layers=gpu_layers,
+            n_batch=n_batch,
+            n_threads=n_threads,
+            n_threads_batch=n_threads,
+            verbose=False,
+        )
         try:
-            self.llm = Llama(
-                model_path=MODEL_PATH,
-                n_ctx=4096,
-                n_gpu_layers=gpu_layers,
-                n_batch=1024,
-                flash_attn=True,
-                verbose=False,
-            )
+            self.llm = Llama(**llama_kwargs, flash_attn=True)
             logger.info("Model loaded.")
         except Exception as e:
             logger.error(f"Failed to load Llama model (trying without flash_attn): {e}")
             try:
-                self.llm = Llama(
-                    model_path=MODEL_PATH,
-                    n_ctx=4096,
-                    n_gpu_layers=gpu_layers,
-                    n_batch=1024,
-                    verbose=False,
-                )
+                self.llm = Llama(**llama_kwargs)
                 logger.info("Model loaded (fallback mode).")
             except Exception as e2:
                 logger.error(f"Fatal error loading model: {e2}")
                 raise e2
 
-    def _extract_text(self, image_path: Path) -> str:
+        self.llm_cache = llm_cache
+        if self.llm_cache is not None:
+            prompt_fingerprint = json.dumps(
+                [SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, JSON_SCHEMA, GENERATION_PARAMS],
+                sort_keys=True,
+            )
+            self._cache_namespace = (
+                f"{fingerprint_model(Path(MODEL_PATH))}:{prompt_fingerprint}"
+            )
+
+    def _extract_text(self, image: np.ndarray) -> str:
         try:
-            result = self.ocr.ocr(str(image_path), cls=True)
-            raw_lines = []
-            if result and result[0]:
-                for line in result[0]:
-                    raw_lines.append(line[1][0])
+            with tracing.stage("preprocess"):
+                image = preprocess(image, self.preprocess_config)
+            with self._ocr_lock:
+                raw_lines = self.ocr_pipeline(image)
             return "\n".join(raw_lines)
         except Exception as e:
             logger.error(f"OCR failed: {e}")
-            return ""
+            raise
 
-    def parse(self, image_path: Path) -> dict:
-        raw_text = self._extract_text(image_path)
-        if not raw_text:
-            return {"items": []}
+    def parse(self, image: np.ndarray) -> dict:
+        return self._parse_text(self._extract_text(image))
+
+    def warm_up(self, image: np.ndarray) -> dict[str, float]:
+        """
+        OCR of the sample receipt and one LLM completion over its text. The LLM
+        cache is skipped on purpose: a hit would leave llama.cpp cold.
+        """
+        start = perf_counter()
+        raw_text = self._extract_text(image)
+        ocr_seconds = perf_counter() - start
 
-        clean_text = clean_raw_text(raw_text)
+        start = perf_counter()
+        self._complete(self._text_for_llm(raw_text or "\n".join(WARMUP_LINES)))
+        return {"ocr": ocr_seconds, "llm": perf_counter() - start}
+
+    def parse_batch(self, images: list[np.ndarray]) -> list[dict | Exception]:
+        """
+        Parses several receipts with OCR and the LLM pipelined: while the LLM
+        works on one receipt, PaddleOCR is already reading the next one.
+        """
+        results: list[dict | Exception] = []
+        if not images:
+            return results
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr") as ocr_pool:
+            pending = ocr_pool.submit(self._extract_text, images[0])
+            for next_image in [*images[1:], None]:
+                ocr = pending
+                if next_image is not None:
+                    pending = ocr_pool.submit(self._extract_text, next_image)
+                try:
+                    results.append(self._parse_text(ocr.result()))
+                except Exception as e:
+                    results.append(e)
+        return results
+
+    def _text_for_llm(self, raw_text: str) -> str:
+        with tracing.stage("clean_text"):
+            clean_text = clean_raw_text(raw_text)
 
         logger.info(
             f"Original Text Len: {len(raw_text)} -> Cleaned Len: {len(clean_text)}"
@@ -99,79 +209,153 @@ class LLMReceiptParser(BaseParser):
             logger.warning(
                 "Pre-processing removed too much text. Using raw OCR fallback."
             )
-            text_to_process = raw_text
-        else:
-            text_to_process = clean_text
-
-        json_schema = {
-            "type": "object",
-            "properties": {
-                "items": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "productName": {"type": "string"},
-                            "price": {"type": "number"},
-                            "quantity": {"type": "number"},
-                        },
-                        "required": ["productName", "price", "quantity"],
-                    },
-                }
-            },
-            "required": ["items"],
-        }
+            return raw_text
+        return clean_text
 
-        system_prompt = (
-            "Jesteś parserem paragonów. Zwracaj TYLKO JSON zgodnie ze schematem."
-        )
-        user_prompt = f"""
-        Wyciągnij listę produktów.
+    def _cached_items(self, text_to_process: str) -> tuple[str | None, list | None]:
+        """Returns the LLM cache key for the text and the cached raw items, if any."""
+        if self.llm_cache is None:
+            return None, None
+        cache_key = self.llm_cache.key_for(self._cache_namespace, text_to_process)
+        return cache_key, self.llm_cache.get(cache_key)
 
-        ZASADY:
-        1. Analizuj linia po linii.
-        2. Quantity zawsze 1.0 (chyba że tekst mówi inaczej).
-        3. Zachowaj każde wystąpienie produktu.
-        4. Poprawiaj literówki.
+    def _parse_text(self, raw_text: str) -> dict:
+        if not raw_text:
+            return {"items": []}
 
-        INPUT (OCR):
-        '''
-        {text_to_process}
-        '''
+        text_to_process = self._text_for_llm(raw_text)
+
+        cache_key, items = self._cached_items(text_to_process)
+        if items is not None:
+            cleaned_items = clean_items(items)
+            logger.info(f"LLM cache hit: {len(cleaned_items)} valid items.")
+            return {"items": cleaned_items}
+
+        try:
+            items = self._complete(text_to_process)
+            if items is None:
+                return {"items": []}
+
+            with tracing.stage("clean_items"):
+                cleaned_items = clean_items(items)
+        except Exception as e:
+            # Raised rather than returned as an empty receipt, which callers
+            # would take for a valid result and cache
+            logger.error(f"LLM Processing error: {e}")
+            raise
+
+        if cache_key is not None:
+            self.llm_cache.put(cache_key, items)
+
+        logger.info(f"Parsed {len(cleaned_items)} valid items.")
+        return {"items": cleaned_items}
+
+    def parse_stream(self, image: np.ndarray) -> Iterator[dict]:
+        """
+        Like parse(), but yields each cleaned item as soon as the LLM closes its
+        JSON object, instead of waiting for the whole completion.
         """
+        raw_text = self._extract_text(image)
+        if not raw_text:
+            return
+
+        text_to_process = self._text_for_llm(raw_text)
 
+        cache_key, items = self._cached_items(text_to_process)
+        if items is not None:
+            logger.info(f"LLM cache hit: streaming {len(items)} cached items.")
+            yield from clean_items(items)
+            return
+
+        raw_items = []
+        emitted = 0
         try:
-            response = self.llm.create_chat_completion(
-                messages=[
-                    ChatCompletionRequestSystemMessage(
-                        role="system", content=system_prompt
-                    ),
-                    ChatCompletionRequestUserMessage(role="user", content=user_prompt),
-                ],
-                temperature=0.1,
-                max_tokens=4096,
-                repeat_penalty=1.05,
+            for item in self._complete_stream(text_to_process):
+                raw_items.append(item)
+                # clean_items judges every item on its own, so it can run per item
+                for cleaned_item in clean_items([item]):
+                    emitted += 1
+                    yield cleaned_item
+        except Exception as e:
+            # The items already sent are only part of the receipt; let the
+            # caller report the failure instead of a finished stream
+            logger.error(f"LLM Processing error after {emitted} items: {e}")
+            raise
+
+        if cache_key is not None and raw_items:
+            self.llm_cache.put(cache_key, raw_items)
+
+        logger.info(f"Streamed {emitted} valid items.")
+
+    def _messages(self, text_to_process: str) -> list:
+        user_prompt = USER_PROMPT_TEMPLATE.format(text_to_process=text_to_process)
+        return [
+            ChatCompletionRequestSystemMessage(role="system", content=SYSTEM_PROMPT),
+            ChatCompletionRequestUserMessage(role="user", content=user_prompt),
+        ]
+
+    def _generate(self, text_to_process: str) -> Iterator[str]:
+        """
+        Streams the completion's content pieces (one per generated token) and
+        records prompt evaluation time (until the first token), generation
+        time and token counts.
+        """
+        # Held until the stream ends; n_tokens is read before the next call
+        with self._llm_lock:
+            start = perf_counter()
+            chunks = self.llm.create_chat_completion(
+                messages=self._messages(text_to_process),
+                **GENERATION_PARAMS,
                 response_format=ChatCompletionRequestResponseFormat(
-                    type="json_object", schema=json_schema
+                    type="json_object", schema=JSON_SCHEMA
                 ),
+                stream=True,
             )
+            first_token_at = None
+            completion_tokens = 0
+            try:
+                for chunk in chunks:
+                    content = chunk["choices"][0]["delta"].get("content")
+                    if not content:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = perf_counter()
+                    completion_tokens += 1
+                    yield content
+            finally:
+                # Stops token generation when the consumer goes away early
+                chunks.close()
+                self._record_generation(start, first_token_at, completion_tokens)
 
-            content = response["choices"][0]["message"]["content"]
-
-            start = content.find("{")
-            end = content.rfind("}") + 1
+    def _record_generation(
+        self, start: float, first_token_at: float | None, completion_tokens: int
+    ) -> None:
+        end = perf_counter()
+        first_token_at = first_token_at or end
+        tracing.record_stage("llm_prompt_eval", first_token_at - start)
+        tracing.record_stage("llm_generate", end - first_token_at)
+        LLM_TOKENS.inc(completion_tokens, kind="completion")
+        # Tokens in the context after the call: the prompt plus what was generated
+        context_tokens = getattr(self.llm, "n_tokens", 0)
+        if context_tokens > completion_tokens:
+            LLM_TOKENS.inc(context_tokens - completion_tokens, kind="prompt")
+        if completion_tokens and end > first_token_at:
+            LLM_TOKENS_PER_SECOND.observe(completion_tokens / (end - first_token_at))
 
-            if start != -1 and end != -1:
-                json_obj = json.loads(content[start:end])
-                items = json_obj.get("items", [])
+    def _complete_stream(self, text_to_process: str) -> Iterator[dict]:
+        """Streams the completion and yields raw items as their objects close."""
+        item_parser = IncrementalItemParser()
+        for content in self._generate(text_to_process):
+            yield from item_parser.feed(content)
 
-                cleaned_items = clean_items(items)
+    def _complete(self, text_to_process: str) -> list[dict] | None:
+        """Runs the LLM over the OCR text and returns the raw (uncleaned) items."""
+        content = "".join(self._generate(text_to_process))
 
-                logger.info(f"Parsed {len(cleaned_items)} valid items.")
-                return {"items": cleaned_items}
-            else:
-                return {"items": []}
+        start = content.find("{")
+        end = content.rfind("}") + 1
 
-        except Exception as e:
-            logger.error(f"LLM Processing error: {e}")
-            return {"items": []}
+        if start != -1 and end != -1:
+            json_obj = json.loads(content[start:end])
+            return json_obj.get("items", [])
+        return None
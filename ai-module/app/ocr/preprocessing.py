@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    """
+    Image clean-up applied before OCR. max_side of None or 0 keeps the
+    original resolution; every step can be switched off on its own.
+    """
+
+    max_side: int | None = 1600
+    grayscale: bool = True
+    crop: bool = True
+    deskew: bool = True
+    # A receipt contour must cover at least this share of the photo to be cropped
+    crop_min_area_ratio: float = 0.2
+    # Skew below this is left alone, above max_skew is assumed to be a misdetection
+    min_skew_degrees: float = 0.5
+    max_skew_degrees: float = 15.0
+
+
+def resize_long_side(image: np.ndarray, max_side: int | None) -> np.ndarray:
+    """Downscales so the longer side is at most max_side; never upscales."""
+    height, width = image.shape[:2]
+    long_side = max(height, width)
+    if not max_side or long_side <= max_side:
+        return image
+    scale = max_side / long_side
+    return cv2.resize(
+        image,
+        (round(width * scale), round(height * scale)),
+        interpolation=cv2.INTER_AREA,
+    )
+
+
+def to_gray(image: np.ndarray) -> np.ndarray:
+    return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def find_receipt(image: np.ndarray, min_area_ratio: float = 0.2) -> np.ndarray | None:
+    """
+    Contour of the largest bright region (the paper) when it clearly stands out
+    from a darker background, or None when the photo is all paper or no paper.
+    """
+    gray = cv2.GaussianBlur(to_gray(image), (5, 5), 0)
+    _, paper = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Close the gaps left by printed text so the receipt becomes one blob
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
+    paper = cv2.morphologyEx(paper, cv2.MORPH_CLOSE, kernel)
+    contours, _ = cv2.findContours(paper, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    contour = max(contours, key=cv2.contourArea)
+    _, _, w, h = cv2.boundingRect(contour)
+    height, width = image.shape[:2]
+    area_ratio = (w * h) / (width * height)
+    if area_ratio < min_area_ratio or area_ratio > 0.95:
+        return None
+    return contour
+
+
+def crop_to_receipt(
+    image: np.ndarray, contour: np.ndarray | None = None, min_area_ratio: float = 0.2
+) -> np.ndarray:
+    """Crops to the receipt's bounding box plus a small margin, if one is found."""
+    if contour is None:
+        contour = find_receipt(image, min_area_ratio)
+        if contour is None:
+            return image
+
+    x, y, w, h = cv2.boundingRect(contour)
+    height, width = image.shape[:2]
+    margin = max(4, round(0.01 * max(width, height)))
+    x0, y0 = max(0, x - margin), max(0, y - margin)
+    x1, y1 = min(width, x + w + margin), min(height, y + h + margin)
+    return image[y0:y1, x0:x1]
+
+
+def _fold_angle(rect_angle: float) -> float:
+    # minAreaRect reports [0, 90); fold it to the nearest axis
+    if rect_angle > 45:
+        rect_angle -= 90
+    return -rect_angle
+
+
+def estimate_skew(image: np.ndarray, contour: np.ndarray | None = None) -> float:
+    """
+    Angle in degrees (counter-clockwise positive) the receipt is rotated by.
+    Uses the paper contour when there is one, otherwise the minimum-area
+    rectangle around the dark (printed) pixels.
+    """
+    if contour is not None:
+        return _fold_angle(cv2.minAreaRect(contour)[-1])
+
+    # The angle does not depend on scale, so estimate it on a small copy
+    gray = resize_long_side(to_gray(image), 800)
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    points = cv2.findNonZero(ink)
+    if points is None or len(points) < 50:
+        return 0.0
+    return _fold_angle(cv2.minAreaRect(points)[-1])
+
+
+def rotate(image: np.ndarray, angle: float) -> np.ndarray:
+    """Rotates counter-clockwise by angle degrees, filling corners with white."""
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    border = 255 if image.ndim == 2 else (255, 255, 255)
+    return cv2.warpAffine(
+        image,
+        matrix,
+        (width, height),
+        flags=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_CONSTANT,
+        borderValue=border,
+    )
+
+
+def preprocess(image: np.ndarray, config: PreprocessConfig) -> np.ndarray:
+    """
+    Runs the configured steps: grayscale, resize, crop, deskew. Grayscale and
+    resizing go first so the later steps work on a small single-channel
+    image. The result is always three-channel BGR, which PaddleOCR expects.
+    """
+    if config.grayscale:
+        image = to_gray(image)
+    image = resize_long_side(image, config.max_side)
+
+    contour = None
+    if config.crop or config.deskew:
+        contour = find_receipt(image, config.crop_min_area_ratio)
+    # Measured before cropping: the crop would cut the background the angle comes from
+    skew = estimate_skew(image, contour) if config.deskew else 0.0
+    if config.crop and contour is not None:
+        image = crop_to_receipt(image, contour)
+    if config.min_skew_degrees <= abs(skew) <= config.max_skew_degrees:
+        image = rotate(image, -skew)
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    return image
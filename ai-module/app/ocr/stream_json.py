@@ -0,0 +1,65 @@
+import json
+
+from app.utils.logger import get_logger
+
+logger = get_logger("IncrementalItemParser")
+
+
+class IncrementalItemParser:
+    """
+    Pulls item objects out of a JSON document that arrives in pieces, such as
+    streamed LLM tokens. Every object that is an element of an array directly
+    inside the root object ({"items": [{...}, {...}]}) is returned by feed() as
+    soon as its closing brace arrives. Text before the root object is ignored.
+    """
+
+    def __init__(self):
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._item: list[str] | None = None
+        self.items_seen = 0
+
+    def feed(self, chunk: str) -> list[dict]:
+        completed = []
+        for char in chunk:
+            if self._item is not None:
+                self._item.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                if self._stack:
+                    self._in_string = True
+            elif char in "{[":
+                if not self._stack and char == "[":
+                    continue
+                if char == "{" and self._stack == ["{", "["]:
+                    self._item = ["{"]
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._item is not None and self._stack == ["{", "["]:
+                    item = self._decode("".join(self._item))
+                    self._item = None
+                    if item is not None:
+                        completed.append(item)
+        return completed
+
+    def _decode(self, text: str) -> dict | None:
+        try:
+            item = json.loads(text)
+        except ValueError as e:
+            logger.warning(f"Skipping malformed streamed item: {e}")
+            return None
+        if not isinstance(item, dict):
+            return None
+        self.items_seen += 1
+        return item
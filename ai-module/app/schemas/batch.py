@@ -0,0 +1,29 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.schemas.ocr import OcrResult
+
+
+class BatchItemResult(BaseModel):
+    """
+    BatchItemResult
+    """
+
+    filename: str
+    result: Optional[OcrResult] = None
+    error: Optional[str] = None
+
+    model_config = {"populate_by_name": True}
+
+
+class BatchResult(BaseModel):
+    """
+    BatchResult
+    """
+
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
+    model_config = {"populate_by_name": True}
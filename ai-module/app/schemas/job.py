@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.schemas.ocr import OcrExpenseItem, OcrResult
+
+
+class JobSubmitted(BaseModel):
+    """
+    JobSubmitted
+    """
+
+    jobId: str
+    status: str
+    statusUrl: str
+    eventsUrl: str
+
+    model_config = {"populate_by_name": True}
+
+
+class JobState(BaseModel):
+    """
+    JobState
+    """
+
+    jobId: str
+    status: str
+    priority: int
+    createdAt: datetime
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
+    result: Optional[OcrResult] = None
+    error: Optional[str] = None
+
+    model_config = {"populate_by_name": True}
+
+    def to_dict(self):
+        return self.model_dump(mode="json", exclude_none=True)
+
+    @classmethod
+    def from_job(cls, job) -> "JobState":
+        result = None
+        if job.items is not None:
+            result = OcrResult(
+                expenses=[OcrExpenseItem.from_dict(item) for item in job.items]
+            )
+        return cls(
+            jobId=job.id,
+            status=job.status.value,
+            priority=job.priority,
+            createdAt=job.created_at,
+            startedAt=job.started_at,
+            finishedAt=job.finished_at,
+            result=result,
+            error=job.error,
+        )
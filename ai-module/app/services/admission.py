@@ -0,0 +1,139 @@
+import asyncio
+import math
+from contextlib import asynccontextmanager
+from time import monotonic
+
+from app.utils.logger import get_logger
+
+logger = get_logger("AdmissionController")
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when a job cannot be admitted; carries the HTTP status and Retry-After."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _ewma(average: float, sample: float) -> float:
+    return sample if average == 0.0 else 0.9 * average + 0.1 * sample
+
+
+class AdmissionController:
+    """
+    Caps the number of receipts processed at once. Up to max_queue further jobs
+    wait in FIFO order for at most queue_timeout seconds; beyond that, callers are
+    turned away immediately (429) so clients can back off instead of timing out.
+    """
+
+    def __init__(
+        self, max_in_flight: int = 2, max_queue: int = 16, queue_timeout: float = 60.0
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        # Exponentially weighted averages, cheap enough to update on every job
+        self.avg_wait = 0.0
+        self.avg_service = 0.0
+        self.max_wait = 0.0
+        self.closed = False
+
+    def retry_after(self) -> int:
+        """Rough seconds until a slot frees up, for the Retry-After header."""
+        backlog = (self.queued + self.in_flight) / self.max_in_flight
+        return max(1, math.ceil(backlog * (self.avg_service or 1.0)))
+
+    @asynccontextmanager
+    async def admit(self, wait_for_slot: bool = False):
+        """
+        Holds a processing slot for the duration of the block. With wait_for_slot
+        the caller skips the queue limit and timeout (used by already-queued jobs).
+        """
+        if self.closed and not wait_for_slot:
+            self.rejected += 1
+            raise AdmissionRejectedError(
+                "Service is shutting down.",
+                status_code=503,
+                retry_after=self.retry_after(),
+            )
+        # Counted before awaiting: wait_for() acquires in a separate task, so a
+        # burst of arrivals would all still see the semaphore unlocked
+        slot_free = not self._semaphore.locked() and not self.queued
+        if not wait_for_slot and not slot_free and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejectedError(
+                f"Too many receipts in progress ({self.in_flight} running, "
+                f"{self.queued} queued).",
+                status_code=429,
+                retry_after=self.retry_after(),
+            )
+
+        start = monotonic()
+        if slot_free:
+            # Returns without suspending, so nobody can take the slot first
+            await self._semaphore.acquire()
+        else:
+            self.queued += 1
+            try:
+                await asyncio.wait_for(
+                    self._semaphore.acquire(),
+                    None if wait_for_slot else self.queue_timeout,
+                )
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise AdmissionRejectedError(
+                    f"Receipt waited {self.queue_timeout:.0f}s without a free slot.",
+                    status_code=503,
+                    retry_after=self.retry_after(),
+                )
+            finally:
+                self.queued -= 1
+
+        waited = monotonic() - start
+        self.avg_wait = _ewma(self.avg_wait, waited)
+        self.max_wait = max(self.max_wait, waited)
+        self.in_flight += 1
+        self.admitted += 1
+        started = monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self.avg_service = _ewma(self.avg_service, monotonic() - started)
+
+    def close(self) -> None:
+        """Turns away new receipts; those already admitted or queued still run."""
+        self.closed = True
+
+    async def drain(self, timeout: float) -> bool:
+        """Waits until nothing is running or queued. Returns False on timeout."""
+        deadline = monotonic() + timeout
+        while self.in_flight or self.queued:
+            if monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "closed": self.closed,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.avg_wait * 1000, 1),
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "avg_service_ms": round(self.avg_service * 1000, 1),
+        }
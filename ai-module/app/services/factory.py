@@ -0,0 +1,186 @@
+"""
+Builds the pipeline components from app.config.settings. Every implementation
+choice and tuning knob (threads, batch sizes, context size, cache sizes) is
+read here, so the rest of the service only sees the Base* interfaces. Heavy
+libraries (paddleocr, llama_cpp, setfit/torch, matplotlib) are imported only
+by the builder that needs them.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from app.config.settings import settings
+from app.ocr.llm_cache import LLMResponseCache
+from app.ocr.preprocessing import PreprocessConfig
+from app.services.admission import AdmissionController
+from app.services.interfaces import BaseCategorizer, BaseParser, BaseVisualizer
+from app.services.result_cache import ResultCache
+from app.services.worker_pool import ParserWorkerPool
+from app.utils.logger import get_logger
+from app.utils.noop_visualizer import NoopVisualizer
+from app.utils.warmup import WARMUP_IMAGE
+
+logger = get_logger("ComponentFactory")
+
+LLM_CACHE_FILE = settings.data_dir / "cache" / "llm.sqlite3"
+
+# Product names cached by the categorizer, exported on shutdown and pre-warmed on start
+CATEGORIZER_CACHE_FILE = settings.data_dir / "cache" / "categorizer_names.json"
+
+
+def build_result_cache() -> ResultCache | None:
+    if not settings.result_cache_enabled:
+        return None
+    return ResultCache(
+        max_entries=settings.result_cache_max_entries,
+        ttl_seconds=settings.result_cache_ttl_seconds,
+        disk_dir=(
+            settings.data_dir / "cache" / "results"
+            if settings.result_cache_persist
+            else None
+        ),
+    )
+
+
+def build_llm_cache() -> LLMResponseCache | None:
+    if not settings.llm_cache_enabled:
+        return None
+    return LLMResponseCache(
+        db_path=LLM_CACHE_FILE,
+        max_entries=settings.llm_cache_max_entries,
+    )
+
+
+def build_preprocess_config() -> PreprocessConfig:
+    return PreprocessConfig(
+        max_side=settings.ocr_max_side or None,
+        grayscale=settings.ocr_grayscale,
+        crop=settings.ocr_crop,
+        deskew=settings.ocr_deskew,
+    )
+
+
+def parser_options() -> dict:
+    """LLMReceiptParser arguments shared by the in-process parser and the workers."""
+    return {
+        "preprocess_config": build_preprocess_config(),
+        "angle_cls": settings.ocr_angle_cls,
+        "angle_cls_sample": settings.ocr_angle_cls_sample,
+        "rec_batch_size": settings.ocr_rec_batch_size,
+        "n_ctx": settings.llm_n_ctx,
+        "n_batch": settings.llm_n_batch,
+        "gpu_layers": settings.gpu_layers,
+    }
+
+
+def build_parser() -> BaseParser:
+    if settings.parser_workers <= 0:
+        from app.ocr.llm_parser import LLMReceiptParser
+
+        return LLMReceiptParser(
+            llm_cache=build_llm_cache(),
+            n_threads=settings.parser_threads_per_worker,
+            **parser_options(),
+        )
+    return ParserWorkerPool(
+        workers=settings.parser_workers,
+        threads_per_worker=settings.parser_threads_per_worker,
+        max_pending=settings.parser_max_pending,
+        queue_timeout=settings.parser_queue_timeout_seconds,
+        llm_cache_path=LLM_CACHE_FILE if settings.llm_cache_enabled else None,
+        llm_cache_max_entries=settings.llm_cache_max_entries,
+        parser_options=parser_options(),
+        warmup_image=(
+            (settings.warmup_image or WARMUP_IMAGE) if settings.warmup_enabled else None
+        ),
+    )
+
+
+def build_admission() -> AdmissionController:
+    max_in_flight = settings.admission_max_in_flight
+    if max_in_flight is None:
+        # One in-process Llama/PaddleOCR pair handles one receipt at a time;
+        # a worker pool takes as many as its own queue accepts
+        max_in_flight = (
+            1
+            if settings.parser_workers <= 0
+            else settings.parser_max_pending or 2 * settings.parser_workers
+        )
+    return AdmissionController(
+        max_in_flight=max_in_flight,
+        max_queue=settings.admission_max_queue,
+        queue_timeout=settings.admission_queue_timeout_seconds,
+    )
+
+
+def build_categorizer() -> BaseCategorizer | None:
+    if not settings.enable_categorizer:
+        return None
+    from app.nlp.batching import BatchingCategorizer
+    from app.nlp.categorizer import ProductCategorizer
+
+    categorizer = ProductCategorizer(
+        cache_max_entries=settings.categorizer_cache_max_entries,
+        n_threads=settings.categorizer_threads,
+    )
+    if settings.categorizer_cache_warmup:
+        categorizer.warm_up_cache(
+            CATEGORIZER_CACHE_FILE,
+            max_predict=settings.categorizer_cache_warmup_max_predict,
+        )
+    if not settings.categorizer_batching_enabled:
+        return categorizer
+    return BatchingCategorizer(
+        categorizer,
+        max_batch_size=settings.categorizer_batch_max_size,
+        max_wait_ms=settings.categorizer_batch_max_wait_ms,
+    )
+
+
+def build_visualizer() -> BaseVisualizer:
+    if not settings.enable_visualizer:
+        return NoopVisualizer()
+    if settings.is_production:
+        logger.warning("SR_ENABLE_VISUALIZER is ignored in production.")
+        return NoopVisualizer()
+    # Rendering happens in a separate process, which is the only one importing matplotlib
+    from app.utils.background_visualizer import BackgroundVisualizer
+
+    return BackgroundVisualizer(
+        sample_rate=settings.visualizer_sample_rate,
+        render_suspicious=settings.visualizer_render_suspicious,
+        max_pending=settings.visualizer_max_pending,
+        workers=settings.visualizer_workers,
+    )
+
+
+def load_components() -> tuple[dict, dict[str, float]]:
+    """
+    Builds the parser (PaddleOCR + Llama), categorizer (SetFit) and visualizer
+    on separate threads. Most of the time goes into reading weights and native
+    initialization, which release the GIL, so the loads overlap. Returns the
+    components and the seconds each one took to load.
+    """
+    builders = {
+        "parser": build_parser,
+        "categorizer": build_categorizer,
+        "visualizer": build_visualizer,
+    }
+
+    def timed(build):
+        start = perf_counter()
+        component = build()
+        return component, perf_counter() - start
+
+    start = perf_counter()
+    with ThreadPoolExecutor(
+        max_workers=len(builders), thread_name_prefix="model-load"
+    ) as pool:
+        futures = {name: pool.submit(timed, build) for name, build in builders.items()}
+        loaded = {name: future.result() for name, future in futures.items()}
+
+    components = {name: component for name, (component, _) in loaded.items()}
+    load_times = {name: round(seconds, 3) for name, (_, seconds) in loaded.items()}
+    load_times["total"] = round(perf_counter() - start, 3)
+    logger.info(f"Components loaded (seconds): {load_times}")
+    return components, load_times
@@ -1,15 +1,28 @@
+import asyncio
+import threading
 import uuid
 import copy
+from contextlib import nullcontext
+from typing import AsyncIterator
+import numpy as np
 from fastapi.concurrency import run_in_threadpool
 from datetime import datetime
+from time import perf_counter
 from pathlib import Path
 from fastapi import UploadFile
-from app.ocr.llm_parser import LLMReceiptParser
-from app.nlp.categorizer import ProductCategorizer
-from app.utils.visualizer import Visualizer
+from app.utils.image import InvalidImageError, decode_image
 from app.utils.logger import get_logger
-from functools import lru_cache
+from app.utils import tracing
+from app.utils.metrics import ITEMS_PER_RECEIPT, RECEIPT_SECONDS, RECEIPTS
+from app.utils.warmup import WARMUP_PRODUCTS, load_warmup_image
+from functools import partial
 from app.services.interfaces import BaseParser, BaseCategorizer, BaseVisualizer
+from app.services.admission import AdmissionController, AdmissionRejectedError
+from app.services import factory
+from app.services.result_cache import ResultCache
+from app.services.worker_pool import ParserWorkerPool, WorkerPoolSaturatedError
+from app.config.settings import settings
+from app.config.rules import get_rules
 
 logger = get_logger("InferenceService")
 
@@ -17,88 +30,477 @@ logger = get_logger("InferenceService")
 DEBUG_DIR = Path("data/debug_visualizations")
 DEBUG_DIR.mkdir(parents=True, exist_ok=True)
 
+# Marks the end of a parser stream handed over from the worker thread
+_STREAM_END = object()
+
+
+def _outcome(error: Exception | None) -> str:
+    """Label for the receipts counter."""
+    if error is None:
+        return "ok"
+    if isinstance(error, (AdmissionRejectedError, WorkerPoolSaturatedError)):
+        return "rejected"
+    if isinstance(error, InvalidImageError):
+        return "invalid"
+    return "error"
+
+
+def _record_receipt(start: float, items: list | None, error: Exception | None) -> None:
+    RECEIPTS.inc(outcome=_outcome(error))
+    if error is None:
+        RECEIPT_SECONDS.observe(perf_counter() - start)
+        ITEMS_PER_RECEIPT.observe(len(items))
+
+
+def _request_id() -> str:
+    """The HTTP request's id when there is one, so logs match its trace line."""
+    trace = tracing.current_trace()
+    return trace.request_id if trace is not None else str(uuid.uuid4())[:8]
+
+
+def _artifact_stem(request_id: str) -> str:
+    """Debug file name stem, unique even when a client reuses its X-Request-ID."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{timestamp}_{request_id}_{uuid.uuid4().hex[:6]}"
+
+
+def _write_upload(path: Path, content: bytes) -> None:
+    try:
+        with open(path, "wb") as f:
+            f.write(content)
+    except OSError as e:
+        logger.warning(f"Failed to save upload {path.name}: {e}")
+
 
 class InferenceService:
     def __init__(
         self,
         parser: BaseParser,
-        categorizer: BaseCategorizer,
+        categorizer: BaseCategorizer | None,
         visualizer: BaseVisualizer,
+        result_cache: ResultCache | None = None,
+        admission: AdmissionController | None = None,
     ):
         self.parser = parser
         self.categorizer = categorizer
         self.visualizer = visualizer
+        self.result_cache = result_cache
+        self.admission = admission
+        self._pending_writes: set[asyncio.Task] = set()
+        self.warmup_timings: dict[str, float] | None = None
+        # Seconds each component took to load, set by get_inference_service
+        self.load_times: dict[str, float] = {}
 
-    async def process_receipt(self, file: UploadFile) -> list[dict]:
-        request_id = str(uuid.uuid4())[:8]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    def cache_stats(self) -> dict:
+        stats = {}
+        if self.result_cache is not None:
+            stats["results"] = self.result_cache.stats()
+        llm_cache = getattr(self.parser, "llm_cache", None)
+        if llm_cache is not None:
+            stats["llm"] = llm_cache.stats()
+        name_cache = getattr(self.categorizer, "name_cache", None)
+        if name_cache is not None:
+            stats["categorizer"] = name_cache.stats()
+        return stats
+
+    def shutdown(self) -> None:
+        """Stops worker processes and persists warm state for the next start."""
+        if isinstance(self.parser, ParserWorkerPool):
+            self.parser.close()
+        close_visualizer = getattr(self.visualizer, "close", None)
+        if close_visualizer is not None:
+            close_visualizer()
+        if settings.categorizer_cache_warmup and hasattr(
+            self.categorizer, "export_cache"
+        ):
+            exported = self.categorizer.export_cache(factory.CATEGORIZER_CACHE_FILE)
+            logger.info(f"Exported {exported} categorizer cache entries.")
+
+    def warm_up(self, image: np.ndarray | None = None) -> dict[str, float]:
+        """
+        Runs a synthetic receipt through every stage (OCR, one LLM completion,
+        one categorizer batch) so lazy initialization - allocations, kernel
+        selection, tokenizer set-up - happens before the first real receipt.
+        Returns the milliseconds spent per stage.
+        """
+        start = perf_counter()
+        timings: dict[str, float] = {}
+        if self.parser is not None:
+            if image is None:
+                image = load_warmup_image(settings.warmup_image)
+            timings.update(self.parser.warm_up(image))
+        if self.categorizer is not None:
+            categorizer_start = perf_counter()
+            self.categorizer.warm_up(WARMUP_PRODUCTS)
+            timings["categorizer"] = perf_counter() - categorizer_start
+        timings["total"] = perf_counter() - start
+        self.warmup_timings = {
+            f"{stage}_ms": round(seconds * 1000, 1)
+            for stage, seconds in timings.items()
+        }
+        return self.warmup_timings
+
+    async def _visualize(self, **kwargs) -> None:
+        with tracing.stage("visualize"):
+            await run_in_threadpool(self.visualizer.visualize, **kwargs)
 
-        original_filename = file.filename or "unknown.jpg"
+    def _save_upload(self, content: bytes, original_filename: str, stem: str) -> None:
+        """Keeps the original upload for debugging, written off the request path."""
+        if not settings.save_uploads:
+            return
         suffix = Path(original_filename).suffix or ".jpg"
+        task = asyncio.ensure_future(
+            run_in_threadpool(_write_upload, DEBUG_DIR / f"{stem}{suffix}", content)
+        )
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
 
-        saved_filename = f"{timestamp}_{request_id}{suffix}"
+    async def process_receipt(self, file: UploadFile) -> list[dict]:
+        with tracing.stage("upload_read"):
+            content = await file.read()
+        return await self.process_bytes(content, file.filename or "unknown.jpg")
 
-        logger.info(
-            f"[{request_id}] Processing receipt: {original_filename} -> {saved_filename}"
+    async def process_bytes(
+        self, content: bytes, original_filename: str, wait_for_slot: bool = False
+    ) -> list[dict]:
+        """
+        Runs the pipeline over an uploaded image. wait_for_slot is used by queued
+        jobs, which already passed their own queue and should not be rejected.
+        """
+        compute = partial(
+            self._process_admitted, content, original_filename, wait_for_slot
         )
+        start = perf_counter()
+        try:
+            if self.result_cache is None:
+                items = await compute()
+            else:
+                # Cache hits and coalesced duplicates never take an admission slot
+                key = ResultCache.key_for(content, get_rules().version)
+                items = await self.result_cache.get_or_compute(key, compute)
+        except Exception as e:
+            _record_receipt(start, None, e)
+            raise
+        _record_receipt(start, items, None)
+        return items
 
-        target_path = DEBUG_DIR / saved_filename
+    async def _process_admitted(
+        self, content: bytes, original_filename: str, wait_for_slot: bool = False
+    ) -> list[dict]:
+        if self.admission is None:
+            return await self._process_content(content, original_filename)
+        async with self.admission.admit(wait_for_slot):
+            return await self._process_content(content, original_filename)
 
-        # Saving an uploaded file
-        with open(target_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+    async def stream_receipt(
+        self, content: bytes, original_filename: str
+    ) -> AsyncIterator[dict]:
+        """
+        Yields categorized items one by one as the parser produces them. Cached
+        results are replayed immediately; a result is cached only when the
+        stream ran to its end without an error.
+        """
+        start = perf_counter()
+        key = None
+        if self.result_cache is not None:
+            key = ResultCache.key_for(content, get_rules().version)
+            cached = await self.result_cache.get(key)
+            if cached is not None:
+                for item in cached:
+                    yield item
+                _record_receipt(start, cached, None)
+                return
 
+        items = []
+        admission = self.admission.admit() if self.admission else nullcontext()
         try:
+            async with admission:
+                async for item in self._stream_content(content, original_filename):
+                    items.append(copy.deepcopy(item))
+                    yield item
+        except Exception as e:
+            _record_receipt(start, None, e)
+            raise
+        _record_receipt(start, items, None)
 
-            # OCR & Parsing (Llama)
-            logger.info(f"[{request_id}] Running OCR on {target_path.name}...")
+        if key is not None:
+            await self.result_cache.put(key, items)
+
+    async def _stream_content(
+        self, content: bytes, original_filename: str
+    ) -> AsyncIterator[dict]:
+        request_id = _request_id()
+        stem = _artifact_stem(request_id)
+        logger.info(f"[{request_id}] Streaming receipt: {original_filename}")
+
+        if self.parser is None:
+            raise RuntimeError("Parser not initialized.")
+
+        with tracing.stage("decode"):
+            image = await run_in_threadpool(decode_image, content)
+        self._save_upload(content, original_filename, stem)
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce() -> None:
+            # Runs on a worker thread; hands items to the event loop as they appear
+            stream = self.parser.parse_stream(image)
+            try:
+                for item in stream:
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+                    if stop.is_set():
+                        break
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                stream.close()
+                loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+        producer = asyncio.ensure_future(run_in_threadpool(produce))
+        raw_items, items = [], []
+        try:
+            while (item := await queue.get()) is not _STREAM_END:
+                if isinstance(item, Exception):
+                    raise item
+                if self.visualizer.enabled:
+                    raw_items.append(copy.deepcopy(item))
+                if self.categorizer:
+                    with tracing.stage("categorize"):
+                        await run_in_threadpool(
+                            self.categorizer.categorize_items, [item]
+                        )
+                items.append(item)
+                yield item
+        finally:
+            # Client went away or the stream failed: stop the LLM at the next item
+            stop.set()
+            await producer
 
+        if not self.visualizer.enabled:
+            return
+        summary_path = DEBUG_DIR / f"{stem}_summary.jpg"
+        logger.info(f"[{request_id}] Saving visual report to {summary_path}")
+        await self._visualize(
+            image=image,
+            raw_items=raw_items,
+            final_items=items,
+            output_path=summary_path,
+        )
+
+    async def process_batch(
+        self, uploads: list[tuple[str, bytes]]
+    ) -> list[list[dict] | Exception]:
+        """
+        Runs many receipts through the pipeline as one unit of work: the parser
+        receives them together (OCR and LLM pipelined) and all product names go
+        through a single categorizer pass. Returns the items, or the exception,
+        for each upload in order.
+        """
+        start = perf_counter()
+        version = get_rules().version
+        keys = [ResultCache.key_for(content, version) for _, content in uploads]
+        outcomes: dict[str, list[dict] | Exception] = {}
+        if self.result_cache is not None:
+            for key in set(keys):
+                cached = await self.result_cache.get(key)
+                if cached is not None:
+                    outcomes[key] = cached
+
+        # Identical images within one batch are processed once
+        pending: dict[str, tuple[str, bytes]] = {}
+        for key, upload in zip(keys, uploads):
+            if key not in outcomes:
+                pending.setdefault(key, upload)
+
+        if pending:
+            # The whole batch holds a single admission slot
+            if self.admission is None:
+                computed = await self._process_batch_content(list(pending.values()))
+            else:
+                async with self.admission.admit():
+                    computed = await self._process_batch_content(list(pending.values()))
+            for key, outcome in zip(pending, computed):
+                outcomes[key] = outcome
+                if self.result_cache is not None and not isinstance(outcome, Exception):
+                    await self.result_cache.put(key, outcome)
+
+        for key in keys:
+            outcome = outcomes[key]
+            if isinstance(outcome, Exception):
+                _record_receipt(start, None, outcome)
+            else:
+                _record_receipt(start, outcome, None)
+        return [
+            outcome if isinstance(outcome, Exception) else copy.deepcopy(outcome)
+            for outcome in (outcomes[key] for key in keys)
+        ]
+
+    async def _process_batch_content(
+        self, uploads: list[tuple[str, bytes]]
+    ) -> list[list[dict] | Exception]:
+        batch_id = str(uuid.uuid4())[:8]
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        if self.parser is None:
+            raise RuntimeError("Parser not initialized.")
+
+        outcomes: list[list[dict] | Exception] = []
+        decoded: dict[int, np.ndarray] = {}
+        for index, (original_filename, content) in enumerate(uploads):
+            try:
+                with tracing.stage("decode"):
+                    decoded[index] = await run_in_threadpool(decode_image, content)
+            except InvalidImageError as e:
+                outcomes.append(e)
+                continue
+            outcomes.append([])
+            self._save_upload(
+                content, original_filename, f"{timestamp}_{batch_id}_{index:03d}"
+            )
+
+        logger.info(f"[{batch_id}] Running OCR on {len(decoded)} receipts...")
+        parsed = await run_in_threadpool(
+            self.parser.parse_batch, list(decoded.values())
+        )
+        for index, result in zip(decoded, parsed):
+            outcomes[index] = (
+                result if isinstance(result, Exception) else result.get("items", [])
+            )
+        raw_items_copies = copy.deepcopy(outcomes) if self.visualizer.enabled else None
+
+        # One categorizer pass over every product in the batch; items are updated in place
+        all_items = [
+            item
+            for items in outcomes
+            if not isinstance(items, Exception)
+            for item in items
+        ]
+        if all_items and self.categorizer:
+            logger.info(
+                f"[{batch_id}] Categorizing {len(all_items)} items "
+                f"from {len(decoded)} receipts..."
+            )
+            with tracing.stage("categorize"):
+                await run_in_threadpool(self.categorizer.categorize_items, all_items)
+
+        for index, (original_filename, _) in enumerate(uploads):
+            items = outcomes[index]
+            failed = isinstance(items, Exception)
+            if failed:
+                logger.error(f"[{batch_id}] {original_filename} failed: {items}")
+            # Failed receipts are reported too, if their image could be decoded
+            if not self.visualizer.enabled or index not in decoded:
+                continue
+            summary_path = DEBUG_DIR / f"{timestamp}_{batch_id}_{index:03d}_summary.jpg"
+            try:
+                await self._visualize(
+                    image=decoded[index],
+                    raw_items=[] if failed else raw_items_copies[index],
+                    final_items=[] if failed else items,
+                    output_path=summary_path,
+                )
+            except Exception as e:
+                logger.warning(
+                    f"[{batch_id}] Visual report for {original_filename} failed: {e}"
+                )
+
+        return outcomes
+
+    async def _process_content(
+        self, content: bytes, original_filename: str
+    ) -> list[dict]:
+        request_id = _request_id()
+        stem = _artifact_stem(request_id)
+
+        logger.info(f"[{request_id}] Processing receipt: {original_filename}")
+        summary_path = DEBUG_DIR / f"{stem}_summary.jpg"
+        image = None
+
+        try:
             if self.parser is None:
                 raise RuntimeError("Parser not initialized.")
 
-            parsed_result = await run_in_threadpool(self.parser.parse, target_path)
+            # Decoded once; OCR and the visualizer share the same array
+            with tracing.stage("decode"):
+                image = await run_in_threadpool(decode_image, content)
+            self._save_upload(content, original_filename, stem)
+
+            # OCR & Parsing (Llama)
+            logger.info(f"[{request_id}] Running OCR...")
+            with tracing.stage("parse"):
+                parsed_result = await run_in_threadpool(self.parser.parse, image)
             items = parsed_result.get("items", [])
             # Copy for visualization
-            raw_items_copy = copy.deepcopy(items)
+            raw_items_copy = copy.deepcopy(items) if self.visualizer.enabled else None
 
             # Categorization (SetFit)
             if items and self.categorizer:
                 logger.info(f"[{request_id}] Categorizing {len(items)} items...")
-                await run_in_threadpool(self.categorizer.categorize_items, items)
+                with tracing.stage("categorize"):
+                    await run_in_threadpool(self.categorizer.categorize_items, items)
 
-            # Visualization
-            summary_filename = f"{timestamp}_{request_id}_summary.jpg"
-            summary_path = DEBUG_DIR / summary_filename
+            # Visualization (off the event loop: matplotlib rendering is slow)
+            if self.visualizer.enabled:
+                logger.info(f"[{request_id}] Saving visual report to {summary_path}")
 
-            logger.info(f"[{request_id}] Saving visual report to {summary_path}")
-
-            self.visualizer.visualize(
-                original_path=target_path,
-                raw_items=raw_items_copy,
-                final_items=items,
-                output_path=summary_path,
-            )
+                await self._visualize(
+                    image=image,
+                    raw_items=raw_items_copy,
+                    final_items=items,
+                    output_path=summary_path,
+                )
 
             return items
 
         except Exception as e:
             logger.exception(f"[{request_id}] Processing failed")
+            if image is not None and self.visualizer.enabled:
+                # Failed receipts are the ones most worth a debug report
+                await self._visualize(
+                    image=image,
+                    raw_items=[],
+                    final_items=[],
+                    output_path=summary_path,
+                )
             raise e
-        finally:
-            pass
 
 
 _inference_service_instance: InferenceService | None = None
+_inference_service_lock = threading.Lock()
+
+
+def loaded_inference_service() -> InferenceService | None:
+    """The service once it has finished loading; never triggers or waits for a load."""
+    return _inference_service_instance
 
 
-@lru_cache()
 def get_inference_service() -> InferenceService:
     global _inference_service_instance
-    if _inference_service_instance is None:
-        _inference_service_instance = InferenceService(
-            parser=LLMReceiptParser(),
-            categorizer=ProductCategorizer(),
-            visualizer=Visualizer(),
-        )
+    if _inference_service_instance is not None:
+        return _inference_service_instance
+    # Requests arriving during start-up wait here instead of loading a second copy
+    with _inference_service_lock:
+        if _inference_service_instance is None:
+            components, load_times = factory.load_components()
+            service = InferenceService(
+                **components,
+                result_cache=factory.build_result_cache(),
+                admission=factory.build_admission(),
+            )
+            service.load_times = load_times
+            _inference_service_instance = service
     return _inference_service_instance
+
+
+async def get_inference_service_async() -> InferenceService:
+    """
+    The FastAPI dependency. A plain def dependency would run in the threadpool
+    on every request and, under load, queue behind busy parser threads.
+    """
+    service = loaded_inference_service()
+    if service is not None:
+        return service
+    # Still loading: wait on the load lock off the event loop
+    return await run_in_threadpool(get_inference_service)
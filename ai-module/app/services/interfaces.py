@@ -1,16 +1,48 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Dict, Any
+from time import perf_counter
+from typing import List, Dict, Any, Iterator
+
+import numpy as np
 
 
 class BaseParser(ABC):
     @abstractmethod
-    def parse(self, image_path: Path) -> List[Dict[str, Any]]:
+    def parse(self, image: np.ndarray) -> List[Dict[str, Any]]:
         """
-        Parse the receipt image and return a list of extracted items.
+        Parse the decoded (BGR) receipt image and return a list of extracted items.
         """
         pass
 
+    def parse_batch(self, images: List[np.ndarray]) -> List[Any]:
+        """
+        Parse several receipt images. Each entry is the parse result for the
+        matching image, or the exception raised while parsing it.
+        """
+        results = []
+        for image in images:
+            try:
+                results.append(self.parse(image))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def parse_stream(self, image: np.ndarray) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the extracted items one by one. Parsers that cannot stream
+        yield the full parse result once it is ready.
+        """
+        yield from self.parse(image).get("items", [])
+
+    def warm_up(self, image: np.ndarray) -> Dict[str, float]:
+        """
+        Run the sample receipt through the models once, bypassing any caches,
+        and return the time in seconds spent in each stage.
+        """
+        start = perf_counter()
+        self.parse(image)
+        return {"parse": perf_counter() - start}
+
 
 class BaseCategorizer(ABC):
     @abstractmethod
@@ -20,17 +52,31 @@ class BaseCategorizer(ABC):
         """
         pass
 
+    def warm_up(self, product_names: List[str]) -> None:
+        """
+        Run one batch of names through the model, bypassing any caches.
+        """
+        self.categorize_items(
+            [
+                {"productName": name, "price": 1.0, "quantity": 1.0}
+                for name in product_names
+            ]
+        )
+
 
 class BaseVisualizer(ABC):
+    # False for visualizers that draw nothing; callers then skip preparing input
+    enabled: bool = True
+
     @abstractmethod
     def visualize(
         self,
-        original_path: Path,
+        image: np.ndarray | None,
         raw_items: list,
         final_items: list,
         output_path: Path,
     ) -> Path:
         """
-        Visualize the extracted items on the receipt image and return the path to the visualized image.
+        Visualize the extracted items next to the decoded (BGR) receipt image and return the path to the visualized image.
         """
         pass
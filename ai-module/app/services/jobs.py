@@ -0,0 +1,228 @@
+import asyncio
+import itertools
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from time import monotonic
+from typing import AsyncIterator
+
+from app.config.settings import settings
+from app.services.inference_service import InferenceService, get_inference_service
+from app.utils.logger import get_logger
+
+logger = get_logger("JobManager")
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the job queue already holds max_queued jobs."""
+
+
+class JobManagerClosedError(RuntimeError):
+    """Raised when a job is submitted while the service is shutting down."""
+
+
+@dataclass
+class Job:
+    id: str
+    filename: str
+    priority: int
+    created_at: datetime = field(default_factory=datetime.now)
+    status: JobStatus = JobStatus.QUEUED
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    items: list[dict] | None = None
+    error: str | None = None
+    content: bytes | None = field(default=None, repr=False)
+    finished_mono: float | None = field(default=None, repr=False)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def notify(self) -> None:
+        """Wakes every subscriber waiting for the next state change."""
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class JobManager:
+    """
+    Runs receipts submitted through the job API on background tasks.
+    Jobs wait in a priority queue (lower number first, FIFO within a priority)
+    and finished jobs are kept for retention_seconds so clients can collect them.
+    """
+
+    def __init__(
+        self,
+        service: InferenceService,
+        workers: int = 2,
+        max_queued: int = 100,
+        retention_seconds: float = 3600.0,
+    ):
+        self.service = service
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self._jobs: dict[str, Job] = {}
+        self._queue: asyncio.PriorityQueue | None = None
+        self._sequence = itertools.count()
+        self._tasks: list[asyncio.Task] = []
+        self.running = 0
+        self.closed = False
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._janitor(), name="job-janitor"))
+
+    async def start(self) -> None:
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def close(self) -> None:
+        """Stops taking new jobs; queued and running jobs are still processed."""
+        self.closed = True
+
+    async def drain(self, timeout: float) -> bool:
+        """Waits until every accepted job has finished. Returns False on timeout."""
+        deadline = monotonic() + timeout
+        while self.running or (self._queue is not None and self._queue.qsize()):
+            if monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def submit(self, content: bytes, filename: str, priority: int = 0) -> Job:
+        if self.closed:
+            raise JobManagerClosedError("Service is shutting down.")
+        self._ensure_started()
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFullError(f"Job queue is full ({self.max_queued} jobs).")
+
+        job = Job(
+            id=uuid.uuid4().hex,
+            filename=filename,
+            priority=priority,
+            content=content,
+        )
+        self._jobs[job.id] = job
+        self._queue.put_nowait((priority, next(self._sequence), job.id))
+        logger.info(f"[job {job.id[:8]}] Queued {filename} (priority {priority})")
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    async def watch(self, job_id: str) -> AsyncIterator[Job]:
+        """Yields the job now and after every state change until it finishes."""
+        job = self._jobs.get(job_id)
+        while job is not None:
+            changed = job._changed
+            yield job
+            if job.done:
+                return
+            await changed.wait()
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now()
+            job.notify()
+            content, job.content = job.content, None
+            self.running += 1
+            try:
+                job.items = await self.service.process_bytes(
+                    content, job.filename, wait_for_slot=True
+                )
+                job.status = JobStatus.SUCCEEDED
+                self.completed += 1
+            except asyncio.CancelledError:
+                job.status = JobStatus.FAILED
+                job.error = "Service shutting down."
+                raise
+            except Exception as e:
+                logger.exception(f"[job {job.id[:8]}] Processing failed")
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+                self.failed += 1
+            finally:
+                self.running -= 1
+                job.finished_at = datetime.now()
+                job.finished_mono = monotonic()
+                job.notify()
+
+    async def _janitor(self) -> None:
+        while True:
+            await asyncio.sleep(min(60.0, self.retention_seconds))
+            cutoff = monotonic() - self.retention_seconds
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.finished_mono is not None and job.finished_mono < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+            self.expired += len(expired)
+
+    def stats(self) -> dict:
+        by_status = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            by_status[job.status.value] += 1
+        return {
+            "closed": self.closed,
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queued": self.max_queued,
+            "workers": self.workers,
+            "jobs": by_status,
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+        }
+
+
+_job_manager: JobManager | None = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _job_manager
+    if _job_manager is None:
+        service = get_inference_service()
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = JobManager(
+                    service,
+                    workers=settings.jobs_workers,
+                    max_queued=settings.jobs_max_queued,
+                    retention_seconds=settings.jobs_retention_seconds,
+                )
+    return _job_manager
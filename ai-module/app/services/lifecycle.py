@@ -0,0 +1,62 @@
+from datetime import datetime
+from enum import Enum
+from functools import lru_cache
+
+from app.utils.logger import get_logger
+
+logger = get_logger("Lifecycle")
+
+
+class LifecycleState(str, Enum):
+    STARTING = "starting"
+    WARMING_UP = "warming_up"
+    READY = "ready"
+    DRAINING = "draining"
+    STOPPED = "stopped"
+    FAILED = "failed"
+
+
+class Lifecycle:
+    """
+    Where the process is between start and shutdown. Liveness (/health) only
+    needs the process to answer; readiness (/ready) needs the models loaded and
+    a warm-up inference done, and is withdrawn as soon as draining starts.
+    """
+
+    def __init__(self):
+        self.state = LifecycleState.STARTING
+        self.changed_at = datetime.now()
+        self.error: str | None = None
+        self.drained: bool | None = None
+        # Milliseconds per stage of the start-up warm-up, once it has run
+        self.warmup: dict[str, float] | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state is LifecycleState.READY
+
+    @property
+    def draining(self) -> bool:
+        return self.state is LifecycleState.DRAINING
+
+    def set(self, state: LifecycleState, error: str | None = None) -> None:
+        logger.info(f"Lifecycle: {self.state.value} -> {state.value}")
+        self.state = state
+        self.changed_at = datetime.now()
+        if error is not None:
+            self.error = error
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state.value,
+            "ready": self.ready,
+            "since": self.changed_at.isoformat(),
+            "error": self.error,
+            "drained": self.drained,
+            "warmup": self.warmup,
+        }
+
+
+@lru_cache()
+def get_lifecycle() -> Lifecycle:
+    return Lifecycle()
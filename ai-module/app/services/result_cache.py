@@ -0,0 +1,148 @@
+import asyncio
+import copy
+import hashlib
+import json
+import os
+from functools import partial
+from pathlib import Path
+from time import time
+from typing import Awaitable, Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.utils.cache import LRUCache
+from app.utils.logger import get_logger
+
+logger = get_logger("ResultCache")
+
+
+class ResultCache:
+    """
+    Content-addressed cache of receipt results keyed on the SHA-256 of the
+    uploaded bytes. Concurrent requests for the same key share one computation.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600.0,
+        disk_dir: Path | None = None,
+    ):
+        self.memory = LRUCache(max_entries, ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self.disk_hits = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key_for(content: bytes, version: str = "") -> str:
+        """Hash of the upload, salted with the rules version that shaped the result."""
+        digest = hashlib.sha256(content)
+        digest.update(version.encode())
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> list[dict] | None:
+        """Cached result from memory or disk, without computing anything."""
+        cached = self.memory.get(key)
+        if cached is None:
+            cached = await self._load_from_disk(key)
+            if cached is None:
+                return None
+            self.memory.put(key, copy.deepcopy(cached))
+        return copy.deepcopy(cached)
+
+    async def put(self, key: str, items: list[dict]) -> None:
+        # Empty results usually mean a transient OCR/LLM failure, let retries recompute
+        if items:
+            self.memory.put(key, copy.deepcopy(items))
+            await self._store_on_disk(key, items)
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[list[dict]]]
+    ) -> list[dict]:
+        cached = self.memory.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+        else:
+            # Detached from the caller: a client that disconnects cancels only
+            # its own wait, not the computation the duplicates are waiting for
+            pending = asyncio.create_task(self._compute(key, compute))
+            self._in_flight[key] = pending
+            pending.add_done_callback(partial(self._finished, key))
+        return copy.deepcopy(await asyncio.shield(pending))
+
+    async def _compute(
+        self, key: str, compute: Callable[[], Awaitable[list[dict]]]
+    ) -> list[dict]:
+        items = await self._load_from_disk(key)
+        if items is None:
+            items = await compute()
+            await self.put(key, items)
+        else:
+            self.memory.put(key, copy.deepcopy(items))
+        return items
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller has gone
+            task.exception()
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    async def _load_from_disk(self, key: str) -> list[dict] | None:
+        if self.disk_dir is None:
+            return None
+        items = await run_in_threadpool(self._read_entry, self._disk_path(key))
+        if items is not None:
+            self.disk_hits += 1
+        return items
+
+    def _read_entry(self, path: Path) -> list[dict] | None:
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if self.ttl_seconds and time() - entry.get("created", 0) > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        return entry.get("items")
+
+    async def _store_on_disk(self, key: str, items: list[dict]) -> None:
+        if self.disk_dir is None:
+            return
+        try:
+            await run_in_threadpool(self._write_entry, self._disk_path(key), items)
+        except OSError as e:
+            logger.warning(f"Failed to persist cache entry {key[:12]}: {e}")
+
+    @staticmethod
+    def _write_entry(path: Path, items: list[dict]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created": time(), "items": items}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        stats["disk_enabled"] = self.disk_dir is not None
+        stats["disk_hits"] = self.disk_hits
+        stats["coalesced"] = self.coalesced
+        stats["in_flight"] = len(self._in_flight)
+        return stats
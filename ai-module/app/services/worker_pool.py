@@ -0,0 +1,326 @@
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from time import perf_counter, time
+from typing import Callable
+
+import numpy as np
+
+from app.services.interfaces import BaseParser
+from app.utils.logger import get_logger
+from app.utils.metrics import REGISTRY
+from app.utils.tracing import trace_replayed
+
+logger = get_logger("ParserWorkerPool")
+
+
+class WorkerPoolSaturatedError(RuntimeError):
+    """Raised when every worker is busy and the pending queue is full."""
+
+
+# Parser owned by the current worker process (set by _init_worker)
+_worker_parser = None
+
+
+def _init_worker(
+    n_threads: int | None,
+    llm_cache_path: str | None,
+    cache_size: int,
+    parser_options: dict,
+    warmup_image: str | None,
+    parser_factory: Callable[..., BaseParser] | None,
+    started: multiprocessing.Queue,
+):
+    global _worker_parser
+    # Stage metrics travel back with each result and land in the parent's registry
+    REGISTRY.buffer()
+    if n_threads:
+        # Must be set before Paddle/llama.cpp spin up their OpenMP pools
+        os.environ["OMP_NUM_THREADS"] = str(n_threads)
+
+    try:
+        from app.ocr.llm_cache import LLMResponseCache
+
+        if parser_factory is None:
+            from app.ocr.llm_parser import LLMReceiptParser as parser_factory
+
+        llm_cache = (
+            LLMResponseCache(Path(llm_cache_path), max_entries=cache_size)
+            if llm_cache_path
+            else None
+        )
+        _worker_parser = parser_factory(
+            llm_cache=llm_cache, n_threads=n_threads, **parser_options
+        )
+        warmup = None
+        if warmup_image is not None:
+            from app.utils.warmup import load_warmup_image
+
+            warmup = _worker_parser.warm_up(load_warmup_image(Path(warmup_image)))
+            REGISTRY.take_buffered()
+    except Exception as e:
+        started.put((os.getpid(), None, f"{type(e).__name__}: {e}"))
+        raise
+    # Every worker reports itself, whichever one picks up the start-up pings
+    started.put((os.getpid(), warmup, None))
+
+
+def _ping() -> None:
+    pass
+
+
+class _Startup:
+    """Start-up handshake of one executor: which workers have reported in."""
+
+    def __init__(self, pings: list):
+        self.pings = pings
+        self.warmups: dict[int, dict[str, float] | None] = {}
+        self.errors: list[str] = []
+        self.done = threading.Event()
+
+    def failed(self) -> bool:
+        # A worker dying in its initializer breaks the executor and the pings
+        return any(
+            future.done() and (future.cancelled() or future.exception() is not None)
+            for future in self.pings
+        )
+
+
+def _parse_in_worker(image: np.ndarray) -> tuple[dict, int, float, dict, list]:
+    start = perf_counter()
+    result = _worker_parser.parse(image)
+    ocr_pipeline = getattr(_worker_parser, "ocr_pipeline", None)
+    ocr_stats = ocr_pipeline.stats() if ocr_pipeline is not None else None
+    elapsed = perf_counter() - start
+    return result, os.getpid(), elapsed, ocr_stats, REGISTRY.take_buffered()
+
+
+class ParserWorkerPool(BaseParser):
+    """
+    Runs the OCR + LLM parser in separate worker processes, each owning its own
+    PaddleOCR and Llama instance, so receipts are parsed in parallel instead of
+    queueing on one thread-unsafe model. At most max_pending jobs are accepted
+    at once; further callers wait up to queue_timeout seconds, then get
+    WorkerPoolSaturatedError. parser_options are passed on to every worker's
+    LLMReceiptParser (pre-processing, angle classifier, context size, ...).
+    With warmup_image set, every worker warms its models on that receipt
+    before it reports itself started. parser_factory replaces LLMReceiptParser
+    (it must be importable by the spawned workers, e.g. for tests).
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        threads_per_worker: int | None = None,
+        max_pending: int | None = None,
+        queue_timeout: float = 30.0,
+        llm_cache_path: Path | None = None,
+        llm_cache_max_entries: int = 10000,
+        parser_options: dict | None = None,
+        warmup_image: Path | None = None,
+        parser_factory: Callable[..., BaseParser] | None = None,
+    ):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.max_pending = max_pending or workers * 2
+        self.queue_timeout = queue_timeout
+        self._initargs = (
+            threads_per_worker,
+            str(llm_cache_path) if llm_cache_path else None,
+            llm_cache_max_entries,
+            parser_options or {},
+            str(warmup_image) if warmup_image else None,
+            parser_factory,
+        )
+        self._startup: _Startup | None = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.restarts = 0
+        self._worker_stats: dict[int, dict] = {}
+        self._executor = self._start_executor()
+
+    def _start_executor(self) -> ProcessPoolExecutor:
+        logger.info(
+            f"Starting {self.workers} parser workers "
+            f"({self.threads_per_worker or 'default'} threads each)..."
+        )
+        # spawn: Paddle and llama.cpp are not fork-safe once initialized
+        context = multiprocessing.get_context("spawn")
+        started = context.Queue()
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(*self._initargs, started),
+        )
+        # The executor spawns a process per submitted task while none is idle,
+        # so this starts every worker now and models load before the first
+        # request. Which worker answers which ping says nothing, though:
+        # readiness comes from each worker reporting on the started queue.
+        startup = _Startup([executor.submit(_ping) for _ in range(self.workers)])
+        self._startup = startup
+        threading.Thread(
+            target=self._collect_started,
+            args=(startup, started),
+            name="parser-worker-startup",
+            daemon=True,
+        ).start()
+        return executor
+
+    def _collect_started(self, startup: _Startup, started) -> None:
+        while len(startup.warmups) + len(startup.errors) < self.workers:
+            try:
+                pid, warmup, error = started.get(timeout=0.5)
+            except queue.Empty:
+                if startup.failed():
+                    break
+                continue
+            if error is not None:
+                logger.error(f"Parser worker {pid} failed to start: {error}")
+                startup.errors.append(error)
+                continue
+            startup.warmups[pid] = warmup
+            self._register(pid, warmup)
+        startup.done.set()
+
+    def _register(self, pid: int, warmup: dict[str, float] | None) -> None:
+        with self._lock:
+            stats = self._worker_stats.setdefault(
+                pid,
+                {
+                    "jobs": 0,
+                    "busy_seconds": 0.0,
+                    "last_job_seconds": None,
+                    "last_seen": time(),
+                },
+            )
+            stats["warmup"] = warmup
+
+    def warm_up(self, image: np.ndarray) -> dict[str, float]:
+        """
+        Waits until every worker has loaded its parser and warmed it up on its
+        own copy of the sample receipt. Returns the slowest worker's time for
+        each stage.
+        """
+        startup = self._startup
+        startup.done.wait()
+        for future in startup.pings:
+            # Raises BrokenProcessPool if a worker died while starting
+            future.result()
+        if startup.errors or len(startup.warmups) < self.workers:
+            raise RuntimeError(
+                f"{len(startup.warmups)} of {self.workers} parser workers started"
+                + (f": {startup.errors[0]}" if startup.errors else "")
+            )
+        timings: dict[str, float] = {}
+        for warmup in startup.warmups.values():
+            for stage, seconds in (warmup or {}).items():
+                timings[stage] = max(timings.get(stage, 0.0), seconds)
+        return timings
+
+    def parse(self, image: np.ndarray) -> dict:
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise WorkerPoolSaturatedError(
+                f"All {self.workers} parser workers busy, {self.max_pending} jobs pending."
+            )
+        with self._lock:
+            self._pending += 1
+        try:
+            with self._lock:
+                executor = self._executor
+            try:
+                # The decoded array is pickled to the worker, no temp file involved
+                future = executor.submit(_parse_in_worker, image)
+                result, pid, elapsed, ocr_stats, observations = future.result()
+            except BrokenProcessPool:
+                self._restart(executor)
+                raise
+            self._record(pid, elapsed, ocr_stats)
+            REGISTRY.replay(observations)
+            trace_replayed(observations)
+            return result
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def parse_batch(self, images: list[np.ndarray]) -> list[dict | Exception]:
+        """Spreads the batch over all workers, one receipt per worker at a time."""
+
+        def parse_one(image: np.ndarray) -> dict | Exception:
+            try:
+                return self.parse(image)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.workers) as submitters:
+            return list(submitters.map(parse_one, images))
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is not broken:
+                # Another caller that saw the same crash restarted it already
+                return
+            logger.error("A parser worker died, restarting the pool.")
+            self.restarts += 1
+            self._worker_stats.clear()
+            self._executor = self._start_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _record(self, pid: int, elapsed: float, ocr_stats: dict) -> None:
+        with self._lock:
+            stats = self._worker_stats.setdefault(pid, {"jobs": 0, "busy_seconds": 0.0})
+            stats["ocr"] = ocr_stats
+            stats["jobs"] += 1
+            stats["busy_seconds"] += elapsed
+            stats["last_job_seconds"] = round(elapsed, 3)
+            stats["last_seen"] = time()
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except OSError:
+            return False
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            workers = [
+                {
+                    "pid": pid,
+                    "alive": self._is_alive(pid),
+                    "jobs": stats["jobs"],
+                    "avg_job_seconds": (
+                        round(stats["busy_seconds"] / stats["jobs"], 3)
+                        if stats["jobs"]
+                        else None
+                    ),
+                    "last_job_seconds": stats["last_job_seconds"],
+                    "idle_seconds": round(time() - stats["last_seen"], 1),
+                    "ocr": stats.get("ocr"),
+                    "warmup": stats.get("warmup"),
+                }
+                for pid, stats in self._worker_stats.items()
+            ]
+            return {
+                "workers": self.workers,
+                "ready_workers": sum(worker["alive"] for worker in workers),
+                "threads_per_worker": self.threads_per_worker,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "per_worker": workers,
+            }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
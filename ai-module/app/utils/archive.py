@@ -0,0 +1,68 @@
+import io
+import zipfile
+from pathlib import PurePosixPath
+
+from app.utils.logger import get_logger
+
+logger = get_logger("Archive")
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+
+_ZIP_MAGIC = b"PK\x03\x04"
+
+
+class BatchTooLargeError(ValueError):
+    """Raised when a batch exceeds the configured file count or file size."""
+
+
+def _is_zip(filename: str, content: bytes) -> bool:
+    return filename.lower().endswith(".zip") or content.startswith(_ZIP_MAGIC)
+
+
+def _check_size(name: str, size: int, max_file_bytes: int) -> None:
+    if size > max_file_bytes:
+        raise BatchTooLargeError(
+            f"{name} is {size} bytes, the limit is {max_file_bytes} bytes."
+        )
+
+
+def expand_uploads(
+    uploads: list[tuple[str, bytes]], max_files: int, max_file_bytes: int
+) -> list[tuple[str, bytes]]:
+    """
+    Flattens uploaded files into (filename, content) images. Zip archives are
+    unpacked, keeping only image files; members are named "archive.zip/path".
+    """
+    images: list[tuple[str, bytes]] = []
+
+    def add(name: str, content: bytes) -> None:
+        if len(images) >= max_files:
+            raise BatchTooLargeError(f"A batch may contain at most {max_files} images.")
+        images.append((name, content))
+
+    for filename, content in uploads:
+        if not _is_zip(filename, content):
+            _check_size(filename, len(content), max_file_bytes)
+            add(filename, content)
+            continue
+
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(content))
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"{filename} is not a valid zip archive.") from e
+
+        with archive:
+            for info in archive.infolist():
+                path = PurePosixPath(info.filename)
+                # Skips folders, non-images and macOS metadata ("__MACOSX/", "._x.jpg")
+                if (
+                    info.is_dir()
+                    or path.suffix.lower() not in IMAGE_SUFFIXES
+                    or any(part.startswith((".", "__")) for part in path.parts)
+                ):
+                    continue
+                # Checked before reading, so a zip bomb is never inflated
+                _check_size(info.filename, info.file_size, max_file_bytes)
+                add(f"{filename}/{info.filename}", archive.read(info))
+
+    return images
@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import random
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from app.services.interfaces import BaseVisualizer
+from app.utils.logger import get_logger
+
+logger = get_logger("BackgroundVisualizer")
+
+# Visualizer owned by the current renderer process, created on first use
+_worker_visualizer = None
+
+
+def _init_renderer() -> None:
+    # Headless backend; pyplot is imported in the renderer process only
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+
+def _render_in_worker(
+    image: np.ndarray | None, raw_items: list, final_items: list, output_path: Path
+) -> Path:
+    global _worker_visualizer
+    if _worker_visualizer is None:
+        from app.utils.visualizer import Visualizer
+
+        _worker_visualizer = Visualizer()
+    _worker_visualizer.visualize(image, raw_items, final_items, output_path)
+    return output_path
+
+
+def is_suspicious(final_items: list) -> bool:
+    """A receipt worth a look: nothing parsed, or an item the categorizer gave up on."""
+    return not final_items or any(
+        item.get("categoryName") == "Other" for item in final_items
+    )
+
+
+class BackgroundVisualizer(BaseVisualizer):
+    """
+    Hands debug reports to a separate renderer process, so matplotlib never
+    runs on a request thread (pyplot's global state is not thread-safe
+    either). visualize() only decides and enqueues: a sample_rate share of
+    receipts is rendered, plus every failed or suspicious one when
+    render_suspicious is set. When max_pending reports are already waiting,
+    new ones are dropped instead of queueing behind them.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        render_suspicious: bool = True,
+        max_pending: int = 8,
+        workers: int = 1,
+        executor: Executor | None = None,
+        render: Callable = _render_in_worker,
+    ):
+        self.sample_rate = sample_rate
+        self.render_suspicious = render_suspicious
+        self.max_pending = max_pending
+        self._render = render
+        self._executor = executor or ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_renderer,
+        )
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.rendered = 0
+        self.failed = 0
+
+    def _wanted(self, final_items: list) -> bool:
+        if self.render_suspicious and is_suspicious(final_items):
+            return True
+        return random.random() < self.sample_rate
+
+    def visualize(
+        self,
+        image: np.ndarray | None,
+        raw_items: list,
+        final_items: list,
+        output_path: Path,
+    ) -> Path:
+        """Returns output_path at once; the file appears when (and if) it is rendered."""
+        with self._lock:
+            if not self._wanted(final_items):
+                self.skipped += 1
+                return output_path
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return output_path
+            self.pending += 1
+            self.submitted += 1
+        try:
+            # The decoded image and items are pickled to the renderer here
+            future = self._executor.submit(
+                self._render, image, raw_items, final_items, output_path
+            )
+        except RuntimeError as e:
+            # Executor already shut down or broken
+            logger.warning(f"Debug report for {output_path.name} not queued: {e}")
+            with self._lock:
+                self.pending -= 1
+                self.failed += 1
+            return output_path
+        future.add_done_callback(self._done)
+        return output_path
+
+    def _done(self, future) -> None:
+        if future.cancelled():
+            with self._lock:
+                self.pending -= 1
+                self.dropped += 1
+            return
+        error = future.exception()
+        with self._lock:
+            self.pending -= 1
+            if error is None:
+                self.rendered += 1
+            else:
+                self.failed += 1
+        if error is not None:
+            logger.warning(f"Debug report failed: {error}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "render_suspicious": self.render_suspicious,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "rendered": self.rendered,
+                "skipped": self.skipped,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
+
+    def close(self) -> None:
+        # Reports still queued are abandoned; debug output must not delay shutdown
+        self._executor.shutdown(wait=False, cancel_futures=True)
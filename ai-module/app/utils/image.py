@@ -0,0 +1,16 @@
+import cv2
+import numpy as np
+
+
+class InvalidImageError(ValueError):
+    """Raised when an uploaded file cannot be decoded as an image."""
+
+
+def decode_image(content: bytes) -> np.ndarray:
+    """Decodes an upload into a BGR array, the layout PaddleOCR and OpenCV expect."""
+    if not content:
+        raise InvalidImageError("Uploaded file is empty.")
+    image = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise InvalidImageError("Uploaded file is not a readable image.")
+    return image
@@ -0,0 +1,101 @@
+import re
+from collections import deque
+from typing import Iterable, Mapping
+
+_NO_MATCH = 1 << 30
+
+
+def compile_alternation(words: Iterable[str]) -> re.Pattern:
+    """
+    One compiled regex matching any of the words as a plain substring.
+    For a yes/no "contains any" check this is faster than the automaton below,
+    since the whole scan runs inside the regex engine.
+    """
+    escaped = sorted({re.escape(word) for word in words if word}, key=len, reverse=True)
+    return re.compile("|".join(escaped) if escaped else r"(?!)")
+
+
+class KeywordMatcher:
+    """
+    Aho–Corasick automaton over groups of keywords with plain substring semantics.
+    Groups are ranked by insertion order, so first_group() returns the same
+    answer as checking each group's keywords with `in`, one group after another,
+    while scanning the text only once.
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]):
+        self.groups = list(groups.keys())
+        self._delta, self._rank = self._build(groups)
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> "KeywordMatcher":
+        return cls({"match": words})
+
+    def _build(self, groups: Mapping[str, Iterable[str]]):
+        goto: list[dict[str, int]] = [{}]
+        rank = [_NO_MATCH]
+
+        for group_rank, words in enumerate(groups.values()):
+            for word in words:
+                if not word:
+                    continue
+                state = 0
+                for char in word:
+                    next_state = goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(goto)
+                        goto[state][char] = next_state
+                        goto.append({})
+                        rank.append(_NO_MATCH)
+                    state = next_state
+                rank[state] = min(rank[state], group_rank)
+
+        # Breadth-first pass: failure links, inherited ranks and a full transition
+        # table over the keyword alphabet (characters outside it reset to the root).
+        alphabet = {char for edges in goto for char in edges}
+        fail = [0] * len(goto)
+        delta: list[dict[str, int]] = [dict() for _ in goto]
+        for char in alphabet:
+            delta[0][char] = goto[0].get(char, 0)
+
+        pending = deque(goto[0].values())
+        while pending:
+            state = pending.popleft()
+            rank[state] = min(rank[state], rank[fail[state]])
+            for char in alphabet:
+                child = goto[state].get(char)
+                if child is None:
+                    delta[state][char] = delta[fail[state]][char]
+                else:
+                    fail[child] = delta[fail[state]][char]
+                    delta[state][char] = child
+                    pending.append(child)
+
+        # Drop transitions back to the root, .get(char, 0) covers them
+        delta = [
+            {char: target for char, target in edges.items() if target}
+            for edges in delta
+        ]
+        return delta, rank
+
+    def _best_rank(self, text: str) -> int:
+        delta = self._delta
+        rank = self._rank
+        state = 0
+        best = _NO_MATCH
+        for char in text:
+            state = delta[state].get(char, 0)
+            if rank[state] < best:
+                best = rank[state]
+                if best == 0:
+                    break
+        return best
+
+    def first_group(self, text: str) -> str | None:
+        """Highest-priority group with a keyword occurring in text, or None."""
+        best = self._best_rank(text)
+        return self.groups[best] if best != _NO_MATCH else None
+
+    def matches(self, text: str) -> bool:
+        """True when any keyword occurs in text."""
+        return self._best_rank(text) != _NO_MATCH
@@ -0,0 +1,221 @@
+"""
+In-process metrics rendered in the Prometheus text format (served on /metrics).
+Recording is a lock and a few additions, cheap enough for every stage of every
+receipt. Worker processes buffer their observations instead (see buffer() and
+replay()), and the parent process folds them into its own registry.
+"""
+
+import bisect
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator
+
+# Seconds: from cheap text cleaning up to multi-second LLM generations
+STAGE_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: tuple = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, registry, name, help_text):
+        super().__init__(registry, name, help_text)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if self.registry.record(self.name, amount, labels):
+            return
+        self._apply(self._key(labels), amount)
+
+    def _apply(self, key: Labels, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [
+            f"{self.name}{_format_labels(key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help_text, buckets=STAGE_BUCKETS):
+        super().__init__(registry, name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (count per bucket with +Inf last, [sum of observed values])
+        self._values: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        if self.registry.record(self.name, value, labels):
+            return
+        self._apply(self._key(labels), value)
+
+    def _apply(self, key: Labels, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = {key: (list(c), s[0]) for key, (c, s) in self._values.items()}
+        lines = self.header()
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._buffer: list[tuple[str, float, dict]] | None = None
+        self._buffer_lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(self, name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets=STAGE_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(self, name, help_text, buckets))
+
+    def buffer(self) -> None:
+        """From now on keep observations for take_buffered() instead of aggregating."""
+        self._buffer = []
+
+    def record(self, name: str, value: float, labels: dict) -> bool:
+        if self._buffer is None:
+            return False
+        with self._buffer_lock:
+            self._buffer.append((name, value, labels))
+        return True
+
+    def take_buffered(self) -> list[tuple[str, float, dict]]:
+        if self._buffer is None:
+            return []
+        with self._buffer_lock:
+            taken, self._buffer = self._buffer, []
+        return taken
+
+    def replay(self, observations: list[tuple[str, float, dict]]) -> None:
+        """Applies observations buffered by another process."""
+        for name, value, labels in observations:
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric._apply(metric._key(labels), value)
+
+    def render(self, extra: list[str] | None = None) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        lines.extend(extra or [])
+        return "\n".join(lines) + "\n"
+
+
+def scrape_lines(
+    name: str, help_text: str, samples: dict[Labels, float], kind: str = "gauge"
+) -> list[str]:
+    """A metric read at scrape time from a component's own stats() counters."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(
+        f"{name}{_format_labels(labels)} {_format_value(value)}"
+        for labels, value in samples.items()
+    )
+    return lines
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "smartreceipt_stage_seconds", "Time spent in each pipeline stage"
+)
+RECEIPT_SECONDS = REGISTRY.histogram(
+    "smartreceipt_receipt_seconds", "End-to-end processing time of a receipt"
+)
+RECEIPTS = REGISTRY.counter(
+    "smartreceipt_receipts_total", "Receipts processed, by outcome"
+)
+ITEMS_PER_RECEIPT = REGISTRY.histogram(
+    "smartreceipt_items_per_receipt", "Items returned per receipt", COUNT_BUCKETS
+)
+LLM_TOKENS = REGISTRY.counter(
+    "smartreceipt_llm_tokens_total", "LLM tokens processed, by kind (prompt/completion)"
+)
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "smartreceipt_llm_tokens_per_second",
+    "LLM generation speed (completion tokens per second)",
+    RATE_BUCKETS,
+)
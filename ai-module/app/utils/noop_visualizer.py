@@ -1,12 +1,16 @@
 from pathlib import Path
 
+import numpy as np
+
 from app.services.interfaces import BaseVisualizer
 
 
 class NoopVisualizer(BaseVisualizer):
+    enabled = False
+
     def visualize(
         self,
-        original_path: Path,
+        image: np.ndarray | None,
         raw_items: list,
         final_items: list,
         output_path: Path,
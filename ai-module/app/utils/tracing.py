@@ -0,0 +1,114 @@
+"""
+Request-scoped tracing. The HTTP middleware opens a Trace for each request;
+pipeline code records stages with stage()/record_stage(), which feed both the
+smartreceipt_stage_seconds histogram and the current trace. A trace becomes
+the response's Server-Timing header and, optionally, one trace log line keyed
+by request_id. Work outside a request (background jobs) only updates metrics.
+"""
+
+import json
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Iterator
+
+from app.utils.logger import get_logger
+from app.utils.metrics import STAGE_SECONDS
+
+logger = get_logger("Trace")
+
+# Client-supplied ids end up in log lines and debug file names
+_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+class Trace:
+    def __init__(self, request_id: str | None = None):
+        if request_id is None or not _REQUEST_ID.fullmatch(request_id):
+            request_id = uuid.uuid4().hex[:8]
+        self.request_id = request_id
+        self.started = perf_counter()
+        # (stage, offset from the request start, duration) in seconds
+        self.spans: list[tuple[str, float, float]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, end: float | None = None) -> None:
+        offset = (end or perf_counter()) - seconds - self.started
+        # Stages run on worker threads too (parser, categorizer)
+        with self._lock:
+            self.spans.append((name, max(0.0, offset), seconds))
+
+    def totals(self) -> dict[str, float]:
+        """Seconds per stage, summed when a stage ran several times."""
+        totals: dict[str, float] = {}
+        with self._lock:
+            for name, _, seconds in self.spans:
+                totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def server_timing(self) -> str:
+        entries = [
+            f"{name};dur={seconds * 1000:.1f}"
+            for name, seconds in self.totals().items()
+        ]
+        entries.append(f"total;dur={(perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def log(self, **fields) -> None:
+        with self._lock:
+            spans = [
+                {
+                    "stage": name,
+                    "start_ms": round(offset * 1000, 2),
+                    "ms": round(seconds * 1000, 2),
+                }
+                for name, offset, seconds in self.spans
+            ]
+        record = {
+            "request_id": self.request_id,
+            **fields,
+            "total_ms": round((perf_counter() - self.started) * 1000, 2),
+            "spans": spans,
+        }
+        logger.info(json.dumps(record, ensure_ascii=False))
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("trace", default=None)
+
+
+def start_trace(request_id: str | None = None) -> Trace:
+    trace = Trace(request_id)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, perf_counter() - start)
+
+
+def trace_replayed(observations: list[tuple[str, float, dict]]) -> None:
+    """Adds the stages measured in a worker process to the current trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    for name, value, labels in observations:
+        if name == STAGE_SECONDS.name:
+            trace.add(labels["stage"], value)
@@ -2,13 +2,14 @@ import matplotlib.pyplot as plt
 import cv2
 import json
 from pathlib import Path
+import numpy as np
 from app.services.interfaces import BaseVisualizer
 
 
 class Visualizer(BaseVisualizer):
     def visualize(
         self,
-        original_path: Path,
+        image: np.ndarray | None,
         raw_items: list,
         final_items: list,
         output_path: Path,
@@ -18,15 +19,13 @@ class Visualizer(BaseVisualizer):
         [ Original | YOLO Crop | Donut Raw JSON | Final Categorized ]
         """
         fig, axes = plt.subplots(1, 4, figsize=(24, 10))
-        fig.suptitle(f"SmartReceipt Debug: {original_path.name}", fontsize=16)
+        fig.suptitle(f"SmartReceipt Debug: {output_path.stem}", fontsize=16)
 
         # --- 1. Original Image ---
-        if original_path.exists():
-            img = cv2.imread(str(original_path))
-            if img is not None:
-                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                axes[0].imshow(img)
-                axes[0].set_title("1. Input (Raw)", fontsize=12, color="blue")
+        if image is not None:
+            img = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            axes[0].imshow(img)
+            axes[0].set_title("1. Input (Raw)", fontsize=12, color="blue")
         axes[0].axis("off")
 
         axes[1].text(0.5, 0.5, "No Crop (Using Original)", ha="center")
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Bundled sample receipt, regenerate with scripts/make_warmup_receipt.py
+WARMUP_IMAGE = Path(__file__).resolve().parent.parent / "assets" / "warmup_receipt.png"
+
+WARMUP_LINES = [
+    "SKLEP SPOZYWCZY SP. Z O.O.",
+    "UL. PRZYKLADOWA 1, WARSZAWA",
+    "PARAGON FISKALNY",
+    "MLEKO 3,2% 1L        1 x 3,99   3,99 C",
+    "CHLEB ZYTNI 500G     1 x 5,49   5,49 C",
+    "MASLO EXTRA 200G     1 x 7,99   7,99 C",
+    "BANANY LUZ           1 x 4,20   4,20 C",
+    "WODA MINERALNA 1,5L  2 x 1,89   3,78 A",
+    "SUMA PLN                       25,45",
+]
+
+# One categorizer batch worth of typical product names
+WARMUP_PRODUCTS = [
+    "MLEKO 3,2% 1L",
+    "CHLEB ZYTNI 500G",
+    "MASLO EXTRA 200G",
+    "BANANY LUZ",
+    "WODA MINERALNA 1,5L",
+    "SER GOUDA PLASTRY",
+    "PAPIER TOALETOWY 8 ROLEK",
+    "PIWO JASNE 0,5L",
+]
+
+
+def render_warmup_receipt() -> np.ndarray:
+    """Draws WARMUP_LINES as a plain white receipt on a dark background (BGR)."""
+    line_height = 44
+    paper = np.full((line_height * (len(WARMUP_LINES) + 2), 760, 3), 255, np.uint8)
+    for row, line in enumerate(WARMUP_LINES, start=1):
+        cv2.putText(
+            paper,
+            line,
+            (24, row * line_height + 12),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.8,
+            (0, 0, 0),
+            2,
+            cv2.LINE_AA,
+        )
+    # A dark margin so the receipt contour (crop, deskew) is exercised as well
+    return cv2.copyMakeBorder(
+        paper, 60, 60, 60, 60, cv2.BORDER_CONSTANT, value=(40, 40, 40)
+    )
+
+
+def load_warmup_image(path: Path | None = None) -> np.ndarray:
+    """Reads the warm-up receipt, drawing it when the file is missing or unreadable."""
+    image = cv2.imread(str(path or WARMUP_IMAGE), cv2.IMREAD_COLOR)
+    return image if image is not None else render_warmup_receipt()
@@ -0,0 +1,94 @@
+"""
+Per-receipt categorization latency: legacy predict() + predict_proba() versus
+the single-pass ProductCategorizer.predict().
+
+Requires the SetFit model in app/nlp/models/my-receipt-categorizer.
+
+    python -m benchmarks.bench_categorizer [--receipts 200] [--items 8]
+"""
+
+import argparse
+import random
+import statistics
+from time import perf_counter
+
+from app.nlp.categorizer import ProductCategorizer
+
+SAMPLE_NAMES = [
+    "MLEKO LACIATE 2%",
+    "BULKA KAIZERKA",
+    "CHLEB ZYTNI 500G",
+    "SER GOUDA PLASTRY",
+    "JOGURT NATURALNY",
+    "PIWO TYSKIE 0.5",
+    "WODA NIEGAZOWANA 1.5L",
+    "PAPIER TOALETOWY",
+    "PROSZEK DO PRANIA",
+    "BANANY LUZ",
+    "POMIDORY MALINOWE",
+    "KAWA MIELONA 250G",
+    "TORBA FOLIOWA",
+    "SZAMPON HEAD&SHOULDERS",
+    "CZEKOLADA MLECZNA",
+    "SOK POMARANCZOWY 1L",
+]
+
+
+def legacy_predict(categorizer: ProductCategorizer, names: list[str]):
+    categories = categorizer.model.predict(names)
+    probs = categorizer.model.predict_proba(names)
+    return [(str(categories[i]), probs[i].max().item()) for i in range(len(names))]
+
+
+def measure(fn, receipts: list[list[str]]) -> list[float]:
+    timings = []
+    for names in receipts:
+        start = perf_counter()
+        fn(names)
+        timings.append((perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(label: str, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<12} mean {statistics.mean(timings):7.2f} ms | "
+        f"p50 {statistics.median(timings):7.2f} ms | p95 {p95:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--receipts", type=int, default=200)
+    parser.add_argument("--items", type=int, default=8)
+    args = parser.parse_args()
+
+    random.seed(42)
+    receipts = [
+        random.choices(SAMPLE_NAMES, k=args.items) for _ in range(args.receipts)
+    ]
+
+    categorizer = ProductCategorizer()
+
+    # Warm-up so tokenizer and torch allocations do not skew the first run
+    categorizer.predict(SAMPLE_NAMES)
+    legacy_predict(categorizer, SAMPLE_NAMES)
+
+    mismatches = sum(
+        [label for label, _ in legacy_predict(categorizer, names)]
+        != [label for label, _ in categorizer.predict(names)]
+        for names in receipts[:20]
+    )
+
+    print(f"{args.receipts} receipts x {args.items} items")
+    before = measure(lambda names: legacy_predict(categorizer, names), receipts)
+    after = measure(categorizer.predict, receipts)
+    summarize("before", before)
+    summarize("after", after)
+    print(f"speedup      {statistics.mean(before) / statistics.mean(after):.2f}x")
+    print(f"label mismatches on 20 receipts: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
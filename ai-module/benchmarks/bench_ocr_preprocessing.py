@@ -0,0 +1,108 @@
+"""
+OCR latency and text recall of the pre-processing stage at several target
+resolutions (long side in pixels, 0 = original image without pre-processing).
+
+Recall is the share of reference tokens that OCR still finds. The reference is
+<image>.txt next to the image when present, otherwise the OCR output of the
+original, unprocessed image.
+
+Requires PaddleOCR and a folder of receipt photos.
+
+    python -m benchmarks.bench_ocr_preprocessing [--images tests/data]
+        [--sides 0 2400 1600 1200 960] [--no-crop] [--no-deskew] [--no-cls]
+"""
+
+import argparse
+import statistics
+from collections import Counter
+from pathlib import Path
+from time import perf_counter
+
+import cv2
+from paddleocr import PaddleOCR
+
+from app.ocr.preprocessing import PreprocessConfig, preprocess
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def run_ocr(ocr: PaddleOCR, image, cls: bool) -> str:
+    result = ocr.ocr(image, cls=cls)
+    if not result or not result[0]:
+        return ""
+    return "\n".join(line[1][0] for line in result[0])
+
+
+def tokens(text: str) -> Counter:
+    return Counter(text.upper().split())
+
+
+def recall(reference: Counter, found: Counter) -> float:
+    total = sum(reference.values())
+    if not total:
+        return 1.0
+    return sum(min(count, found[token]) for token, count in reference.items()) / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=Path, default=Path("tests/data"))
+    parser.add_argument(
+        "--sides", type=int, nargs="+", default=[0, 2400, 1600, 1200, 960]
+    )
+    parser.add_argument("--no-crop", action="store_true")
+    parser.add_argument("--no-deskew", action="store_true")
+    parser.add_argument("--no-cls", action="store_true")
+    args = parser.parse_args()
+
+    paths = sorted(
+        p for p in args.images.glob("*") if p.suffix.lower() in IMAGE_SUFFIXES
+    )
+    if not paths:
+        raise SystemExit(f"No images found in {args.images}")
+    images = {path: cv2.imread(str(path)) for path in paths}
+    cls = not args.no_cls
+
+    ocr = PaddleOCR(use_angle_cls=True, lang="pl", show_log=False, use_gpu=False)
+    # Warm-up so model initialization does not land in the first measurement
+    run_ocr(ocr, next(iter(images.values())), cls)
+
+    references = {}
+    for path, image in images.items():
+        truth = path.with_suffix(".txt")
+        if truth.exists():
+            references[path] = tokens(truth.read_text(encoding="utf-8"))
+        else:
+            references[path] = tokens(run_ocr(ocr, image, cls))
+
+    print(f"{len(paths)} images, angle classification {'on' if cls else 'off'}")
+    print(
+        f"{'long side':>10} | {'prep ms':>8} | {'ocr mean ms':>11} | "
+        f"{'ocr p50 ms':>10} | {'recall':>6}"
+    )
+    for side in args.sides:
+        config = PreprocessConfig(
+            max_side=side or None, crop=not args.no_crop, deskew=not args.no_deskew
+        )
+        prep_times, ocr_times, recalls = [], [], []
+        for path, image in images.items():
+            start = perf_counter()
+            prepared = preprocess(image, config) if side else image
+            prep_times.append((perf_counter() - start) * 1000)
+
+            start = perf_counter()
+            text = run_ocr(ocr, prepared, cls)
+            ocr_times.append((perf_counter() - start) * 1000)
+            recalls.append(recall(references[path], tokens(text)))
+
+        label = str(side) if side else "original"
+        print(
+            f"{label:>10} | {statistics.mean(prep_times):8.1f} | "
+            f"{statistics.mean(ocr_times):11.1f} | "
+            f"{statistics.median(ocr_times):10.1f} | "
+            f"{statistics.mean(recalls):6.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Model-free stand-ins for the offline benchmarks and the load test, replaying
+the recorded corpus (benchmarks/corpus/receipts.json) without real PaddleOCR,
+Llama or SetFit weights: a parser and a categorizer that only run the real
+cleaning and keyword rules, and fake engines to put under the real parser.
+"""
+
+import copy
+import json
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Iterator
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from app.nlp.categorizer import assign_categories
+from app.ocr.cleaning import clean_items, clean_raw_text
+from app.services.interfaces import BaseCategorizer, BaseParser
+
+CORPUS_PATH = Path(__file__).resolve().parent / "corpus/receipts.json"
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> list[dict]:
+    """Receipts as recorded: name, ocr_text (PaddleOCR lines) and llm_output (raw completion)."""
+    return json.loads(path.read_text(encoding="utf-8"))["receipts"]
+
+
+def raw_items(llm_output: str) -> list[dict]:
+    """Items from a raw completion, extracted the way LLMReceiptParser._complete does."""
+    start = llm_output.find("{")
+    end = llm_output.rfind("}") + 1
+    if start == -1 or end == 0:
+        return []
+    return json.loads(llm_output[start:end]).get("items", [])
+
+
+def receipt_image(index: int, nonce: int = 0) -> bytes:
+    """
+    A tiny PNG upload filled with the receipt's index, which is how the fakes
+    tell which receipt it is. One pixel carries the nonce: different nonces
+    give different bytes, so the result cache never hits.
+    """
+    image = np.full((8, 8, 3), index, dtype=np.uint8)
+    image[1, 0] = (nonce & 0xFF, (nonce >> 8) & 0xFF, (nonce >> 16) & 0xFF)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+def burn_cpu(seconds: float) -> None:
+    """Busy-waits in Python, holding the GIL the whole time."""
+    deadline = perf_counter() + seconds
+    while perf_counter() < deadline:
+        pass
+
+
+class FakePaddleOCR:
+    """
+    Stands in for paddleocr.PaddleOCR under the real AdaptiveOcr. The detector
+    finds one box per recorded line of the receipt the image stands for (its
+    most common pixel value, which survives pre-processing) and the recognizer
+    reads the recorded lines back. Detection sleeps 40% of `latency` (native
+    code releases the GIL), recognition the rest plus `cpu` seconds of busy
+    work that holds it. Like the real engine, it takes no lock.
+    """
+
+    drop_score = 0.5
+    args = SimpleNamespace(cls_thresh=0.9)
+
+    def __init__(
+        self,
+        corpus: list[dict],
+        latency: float = 0.08,
+        cpu: float = 0.01,
+        use_angle_cls: bool = True,
+        **options,
+    ):
+        self._lines = [r["ocr_text"].splitlines() for r in corpus]
+        self.latency = latency
+        self.cpu = cpu
+        self.text_classifier = self._classify if use_angle_cls else None
+
+    def _receipt_lines(self, image: np.ndarray) -> list[str]:
+        values = image[..., 0] if image.ndim == 3 else image
+        index = int(np.bincount(values.ravel()).argmax())
+        return self._lines[index % len(self._lines)]
+
+    def text_detector(self, image: np.ndarray) -> tuple[np.ndarray, float]:
+        start = perf_counter()
+        time.sleep(self.latency * 0.4)
+        height, width = image.shape[:2]
+        # The middle of the image: deskewing may fill the corners with white
+        box = np.array(
+            [[0.25, 0.25], [0.75, 0.25], [0.75, 0.75], [0.25, 0.75]], dtype=np.float32
+        ) * (width, height)
+        boxes = np.array([box] * len(self._receipt_lines(image)), dtype=np.float32)
+        return boxes, perf_counter() - start
+
+    def _classify(self, crops: list) -> tuple[list, list, float]:
+        return crops, [("0", 0.99)] * len(crops), 0.0
+
+    def text_recognizer(self, crops: list) -> tuple[list, float]:
+        start = perf_counter()
+        time.sleep(self.latency * 0.6)
+        burn_cpu(self.cpu)
+        lines = self._receipt_lines(crops[0]) if crops else []
+        return [(line, 0.99) for line in lines[: len(crops)]], perf_counter() - start
+
+    def ocr(self, image: np.ndarray, cls: bool = True) -> list:
+        """PaddleOCR.ocr(): what AdaptiveOcr falls back to without PaddleOCR's internals."""
+        boxes, _ = self.text_detector(image)
+        results, _ = self.text_recognizer([image] * len(boxes))
+        return [[[box.tolist(), result] for box, result in zip(boxes, results)]]
+
+
+class FakeLlama:
+    """
+    Stands in for llama_cpp.Llama in streaming chat mode. The recorded
+    completion for the OCR text in the prompt comes back in chunks of
+    chars_per_token characters, after `prompt_eval` seconds, with `per_token`
+    seconds of sleep and `cpu_per_token` seconds of busy work per chunk. Like
+    llama.cpp, it does nothing to make concurrent calls safe.
+    """
+
+    def __init__(
+        self,
+        corpus: list[dict],
+        prompt_eval: float = 0.06,
+        per_token: float = 0.0005,
+        cpu_per_token: float = 0.00002,
+        chars_per_token: int = 4,
+        **options,
+    ):
+        self._outputs = {clean_raw_text(r["ocr_text"]): r["llm_output"] for r in corpus}
+        self.prompt_eval = prompt_eval
+        self.per_token = per_token
+        self.cpu_per_token = cpu_per_token
+        self.chars_per_token = chars_per_token
+        self.n_tokens = 0
+
+    def _output_for(self, prompt: str) -> str:
+        for text, output in self._outputs.items():
+            if text in prompt:
+                return output
+        return '{"items": []}'
+
+    def create_chat_completion(self, messages: list[dict], **kwargs) -> Iterator[dict]:
+        output = self._output_for(messages[-1]["content"])
+        step = self.chars_per_token
+        time.sleep(self.prompt_eval)
+        for index in range(0, len(output), step):
+            time.sleep(self.per_token)
+            burn_cpu(self.cpu_per_token)
+            yield {"choices": [{"delta": {"content": output[index : index + step]}}]}
+        self.n_tokens = len(output) // step
+
+
+def simulated_parser(
+    corpus: list[dict],
+    ocr_options: dict | None = None,
+    llm_options: dict | None = None,
+    **parser_options,
+) -> BaseParser:
+    """
+    The real LLMReceiptParser (pre-processing, AdaptiveOcr, prompt building,
+    streamed parsing, cleaning) built on FakePaddleOCR and FakeLlama, patched
+    into app.ocr.llm_parser for the duration of the constructor.
+    """
+    from app.ocr import llm_parser
+
+    with tempfile.TemporaryDirectory() as models:
+        (Path(models) / "simulated.gguf").touch()
+        with (
+            patch.object(llm_parser, "MODEL_DIRECTORY", Path(models)),
+            patch.object(
+                llm_parser,
+                "PaddleOCR",
+                partial(FakePaddleOCR, corpus, **(ocr_options or {})),
+            ),
+            patch.object(
+                llm_parser, "Llama", partial(FakeLlama, corpus, **(llm_options or {}))
+            ),
+        ):
+            return llm_parser.LLMReceiptParser(**parser_options)
+
+
+class ReplayParser(BaseParser):
+    """
+    Returns the recorded receipt selected by the image's first pixel. Items are
+    cleaned once up front, so parse() itself costs next to nothing and the
+    service's own overhead is what gets measured.
+    """
+
+    def __init__(self, corpus: list[dict]):
+        self._items = [clean_items(raw_items(r["llm_output"])) for r in corpus]
+
+    def parse(self, image: np.ndarray) -> dict:
+        items = self._items[int(image[0, 0, 0]) % len(self._items)]
+        # The service categorizes in place
+        return {"items": copy.deepcopy(items)}
+
+
+class KeywordCategorizer(BaseCategorizer):
+    """The real keyword rules in front of a model that is never confident."""
+
+    def categorize_items(self, items: list[dict]) -> list[dict]:
+        return assign_categories(items, [("Other", 0.0)] * len(items))
@@ -0,0 +1,244 @@
+"""
+Concurrency load test of the FastAPI app without real models. app.main:app
+starts in-process (lifespan included, so admission control, caches and the
+warm-up behave as in production) with the real LLMReceiptParser running on
+FakePaddleOCR and FakeLlama from benchmarks.fakes, whose latency and CPU burn
+are configurable. An async HTTP client then keeps N uploads to
+/api/v1.0/ai/ocr/process in flight for each concurrency level.
+
+Reported per level: throughput, p50/p95/p99 latency, error rate by status,
+event-loop lag (how late a 10 ms timer fires; anything beyond a few ms means
+something blocks the loop) and threadpool usage (threads busy, tasks waiting
+for a thread).
+
+Requests go through httpx's ASGI transport, so sockets and HTTP parsing are
+not part of the numbers. Service settings come from the usual SR_* variables,
+e.g. SR_ADMISSION_MAX_IN_FLIGHT=8 python -m benchmarks.loadtest, except that
+the parser always runs in-process (the fakes are patched into this process
+only) and without the LLM cache (every upload has to reach the fake LLM).
+
+    python -m benchmarks.loadtest [--concurrency 5 20 100] [--requests 100]
+        [--ocr-latency-ms 80] [--ocr-cpu-ms 10] [--llm-prompt-ms 60]
+        [--llm-token-ms 0.5] [--llm-token-cpu-ms 0.02]
+        [--output benchmarks/results/loadtest.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+import httpx
+from anyio.to_thread import current_default_thread_limiter
+
+from app.config.settings import settings
+from app.services import factory
+from benchmarks.fakes import (
+    KeywordCategorizer,
+    load_corpus,
+    receipt_image,
+    simulated_parser,
+)
+
+PROCESS_URL = "/api/v1.0/ai/ocr/process"
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results/loadtest.json"
+LAG_INTERVAL = 0.01
+
+
+def percentile(values: list[float], share: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(share * len(ordered)) - 1))]
+
+
+class LoopMonitor:
+    """Samples event-loop lag and threadpool usage every LAG_INTERVAL seconds."""
+
+    def __init__(self):
+        self.lags: list[float] = []
+        self.threads_busy = 0
+        self.tasks_waiting = 0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        limiter = current_default_thread_limiter()
+        while True:
+            start = perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(max(0.0, perf_counter() - start - LAG_INTERVAL))
+            statistics = limiter.statistics()
+            self.threads_busy = max(self.threads_busy, statistics.borrowed_tokens)
+            self.tasks_waiting = max(self.tasks_waiting, statistics.tasks_waiting)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return {
+            "loop_lag_p50_ms": percentile(self.lags, 0.5) * 1000,
+            "loop_lag_p99_ms": percentile(self.lags, 0.99) * 1000,
+            "loop_lag_max_ms": max(self.lags, default=0.0) * 1000,
+            "threads_busy_max": self.threads_busy,
+            "threads_total": int(current_default_thread_limiter().total_tokens),
+            "tasks_waiting_for_thread_max": self.tasks_waiting,
+        }
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    concurrency: int,
+    requests: int,
+    corpus_size: int,
+    nonces: itertools.count,
+) -> dict:
+    """Keeps `concurrency` uploads in flight until `requests` have completed."""
+    remaining = iter(range(requests))
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+
+    async def user() -> None:
+        for index in remaining:
+            nonce = next(nonces)
+            image = receipt_image(index % corpus_size, nonce)
+            start = perf_counter()
+            try:
+                response = await client.post(
+                    PROCESS_URL, files={"image": (f"{nonce}.png", image, "image/png")}
+                )
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(perf_counter() - start)
+
+    monitor = LoopMonitor()
+    monitor.start()
+    start = perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    duration = perf_counter() - start
+    loop_stats = await monitor.stop()
+
+    succeeded = statuses.get("200", 0)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "duration_s": duration,
+        "throughput_rps": succeeded / duration,
+        "latency_p50_ms": percentile(latencies, 0.5) * 1000,
+        "latency_p95_ms": percentile(latencies, 0.95) * 1000,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+        "error_rate": 1 - succeeded / requests,
+        "statuses": dict(statuses),
+        **loop_stats,
+    }
+
+
+def print_report(levels: list[dict]) -> None:
+    print(
+        f"{'conc':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'errors':>7} {'lag p99':>8} {'lag max':>8} {'threads':>8} {'waiting':>8}"
+    )
+    for level in levels:
+        print(
+            f"{level['concurrency']:>5} {level['throughput_rps']:8.2f} "
+            f"{level['latency_p50_ms']:9.1f} {level['latency_p95_ms']:9.1f} "
+            f"{level['latency_p99_ms']:9.1f} {level['error_rate']:7.1%} "
+            f"{level['loop_lag_p99_ms']:8.1f} {level['loop_lag_max_ms']:8.1f} "
+            f"{level['threads_busy_max']:>8} {level['tasks_waiting_for_thread_max']:>8}"
+        )
+        errors = {k: v for k, v in level["statuses"].items() if k != "200"}
+        if errors:
+            print(f"      non-200 responses: {errors}")
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    corpus = load_corpus()
+    ocr_options = {
+        "latency": args.ocr_latency_ms / 1000,
+        "cpu": args.ocr_cpu_ms / 1000,
+    }
+    llm_options = {
+        "prompt_eval": args.llm_prompt_ms / 1000,
+        "per_token": args.llm_token_ms / 1000,
+        "cpu_per_token": args.llm_token_cpu_ms / 1000,
+    }
+    settings.parser_workers = 0
+    settings.llm_cache_enabled = False
+    # The app builds its components through the factory; swap in the fakes there
+    factory.build_parser = lambda: simulated_parser(
+        corpus, ocr_options, llm_options, **factory.parser_options()
+    )
+    factory.build_categorizer = KeywordCategorizer
+
+    from app.main import app
+
+    nonces = itertools.count()
+    levels = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadtest", timeout=None
+        ) as client:
+            for concurrency in args.concurrency:
+                level = await run_level(
+                    client, concurrency, args.requests, len(corpus), nonces
+                )
+                levels.append(level)
+                print(
+                    f"concurrency {concurrency}: {level['throughput_rps']:.2f} req/s, "
+                    f"p99 {level['latency_p99_ms']:.0f} ms"
+                )
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--ocr-latency-ms", type=float, default=80)
+    parser.add_argument("--ocr-cpu-ms", type=float, default=10)
+    parser.add_argument("--llm-prompt-ms", type=float, default=60)
+    parser.add_argument("--llm-token-ms", type=float, default=0.5)
+    parser.add_argument("--llm-token-cpu-ms", type=float, default=0.02)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument(
+        "--with-logs",
+        action="store_true",
+        help="Keep the service's INFO logs (their cost depends on the terminal)",
+    )
+    args = parser.parse_args()
+
+    if not args.with_logs:
+        logging.disable(logging.INFO)
+    levels = asyncio.run(run(args))
+    print_report(levels)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "fakes": {
+            key: value
+            for key, value in vars(args).items()
+            if key.startswith(("ocr_", "llm_"))
+        },
+        "levels": levels,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Records the benchmark corpus from real receipt photos: the PaddleOCR text and
+the raw LLM completion of each image, as LLMReceiptParser produces them.
+
+Requires PaddleOCR, llama-cpp-python and the GGUF model.
+
+    python -m benchmarks.record_corpus [--images tests/data] [--output benchmarks/corpus/receipts.json]
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import cv2
+
+from benchmarks.fakes import CORPUS_PATH
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=Path, default=Path("tests/data"))
+    parser.add_argument("--output", type=Path, default=CORPUS_PATH)
+    args = parser.parse_args()
+
+    paths = sorted(
+        p for p in args.images.glob("*") if p.suffix.lower() in IMAGE_SUFFIXES
+    )
+    if not paths:
+        raise SystemExit(f"No images found in {args.images}")
+
+    from app.ocr.llm_parser import LLMReceiptParser
+    from app.services.factory import parser_options
+
+    # Production pre-processing, but no LLM cache: every completion is recorded
+    receipt_parser = LLMReceiptParser(**parser_options())
+    receipts = []
+    for path in paths:
+        ocr_text = receipt_parser._extract_text(cv2.imread(str(path)))
+        llm_output = "".join(
+            receipt_parser._generate(receipt_parser._text_for_llm(ocr_text))
+        )
+        receipts.append(
+            {"name": path.stem, "ocr_text": ocr_text, "llm_output": llm_output}
+        )
+        print(f"{path.name}: {len(ocr_text)} chars of OCR text")
+
+    args.output.write_text(
+        json.dumps({"receipts": receipts}, ensure_ascii=False, indent=2) + "\n",
+        encoding="utf-8",
+    )
+    print(f"{len(receipts)} receipts written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Offline micro-benchmarks of the CPU-side pipeline stages, runnable on any
+machine without model downloads: text and item cleaning, keyword matching,
+response serialization and the InferenceService orchestration around the
+models (decode, threadpool hops, categorization, metrics), with the models
+replaced by benchmarks.fakes replaying the recorded corpus.
+
+Results are written as JSON and compared with a baseline; the run fails when
+a benchmark's median time per operation grew by more than --threshold.
+Baselines are only comparable on the machine that recorded them, so each
+machine records its own (--update-baseline) and a baseline from another
+machine is reported but not compared.
+
+    python -m benchmarks.suite [--copies 50] [--repeat 7] [--only clean_items ...]
+        [--output benchmarks/results/latest.json]
+        [--baseline benchmarks/results/baseline.json]
+        [--threshold 0.25] [--update-baseline] [--with-logs]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from fastapi.responses import JSONResponse
+
+from app.config.rules import get_rules
+from app.nlp.categorizer import _check_keywords
+from app.ocr.cleaning import clean_items, clean_raw_text
+from app.utils.matcher import KeywordMatcher
+from app.schemas.ocr import OcrExpenseItem, OcrResult
+from app.services.inference_service import InferenceService
+from app.utils.noop_visualizer import NoopVisualizer
+from benchmarks.fakes import (
+    KeywordCategorizer,
+    ReplayParser,
+    load_corpus,
+    raw_items,
+    receipt_image,
+)
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = BENCH_DIR / "results/latest.json"
+DEFAULT_BASELINE = BENCH_DIR / "results/baseline.json"
+
+# Padding around generated product names for the keyword benchmarks
+FILLERS = ["500G", "1L", "BIO", "2%", "XXL", "PROMO", "NATURALNY", "ZESTAW", "A", "B"]
+
+# name -> setup(corpus, copies) returning (run one round, operations per round)
+Benchmark = Callable[[list[dict], int], tuple[Callable[[], None], int]]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+@benchmark("clean_raw_text")
+def bench_clean_raw_text(corpus, copies):
+    texts = [receipt["ocr_text"] for receipt in corpus] * copies
+
+    def run():
+        for text in texts:
+            clean_raw_text(text)
+
+    return run, len(texts)
+
+
+@benchmark("clean_items")
+def bench_clean_items(corpus, copies):
+    item_lists = [raw_items(receipt["llm_output"]) for receipt in corpus] * copies
+
+    def run():
+        for items in item_lists:
+            clean_items(items)
+
+    return run, len(item_lists)
+
+
+@benchmark("check_keywords")
+def bench_check_keywords(corpus, copies):
+    names = [
+        item["productName"]
+        for receipt in corpus
+        for item in raw_items(receipt["llm_output"])
+    ] * copies
+    matcher = get_rules().keyword_matcher
+
+    def run():
+        for name in names:
+            _check_keywords(name, matcher)
+
+    return run, len(names)
+
+
+def generate_names(keywords: dict, count: int) -> list[str]:
+    """Random product names; about half contain no keyword, the matcher's worst case."""
+    rng = random.Random(42)
+    words = [word for group in keywords.values() for word in group]
+    names = []
+    for _ in range(count):
+        parts = rng.choices(FILLERS, k=rng.randint(1, 3))
+        if rng.random() < 0.5:
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(words))
+        names.append(" ".join(parts))
+    return names
+
+
+@benchmark("check_keywords_generated")
+def bench_check_keywords_generated(corpus, copies):
+    rules = get_rules()
+    names = generate_names(rules.keywords, 100 * copies)
+    matcher = rules.keyword_matcher
+
+    def run():
+        for name in names:
+            _check_keywords(name, matcher)
+
+    return run, len(names)
+
+
+@benchmark("build_keyword_matcher")
+def bench_build_keyword_matcher(corpus, copies):
+    # Paid on every rules file reload
+    keywords = get_rules().keywords
+
+    def run():
+        for _ in range(copies):
+            KeywordMatcher(keywords)
+
+    return run, copies
+
+
+@benchmark("serialize_response")
+def bench_serialize_response(corpus, copies):
+    parser, categorizer = ReplayParser(corpus), KeywordCategorizer()
+    receipts = [categorizer.categorize_items(items) for items in parser._items]
+    receipts *= copies
+
+    def run():
+        # Same steps as the /process endpoint
+        for items in receipts:
+            expenses = [OcrExpenseItem.from_dict(item) for item in items]
+            result = OcrResult(expenses=expenses)
+            JSONResponse(content=result.model_dump(mode="json", by_alias=True))
+
+    return run, len(receipts)
+
+
+def _service_benchmark(corpus, copies, concurrent: bool):
+    service = InferenceService(
+        parser=ReplayParser(corpus),
+        categorizer=KeywordCategorizer(),
+        visualizer=NoopVisualizer(),
+    )
+    uploads = [
+        (receipt_image(index), f"{receipt['name']}.png")
+        for index, receipt in enumerate(corpus)
+    ] * copies
+    loop = asyncio.new_event_loop()
+
+    async def sequential():
+        for content, filename in uploads:
+            await service.process_bytes(content, filename)
+
+    async def gathered():
+        await asyncio.gather(
+            *(service.process_bytes(content, filename) for content, filename in uploads)
+        )
+
+    def run():
+        loop.run_until_complete(gathered() if concurrent else sequential())
+
+    return run, len(uploads)
+
+
+@benchmark("service_process_bytes")
+def bench_service_sequential(corpus, copies):
+    return _service_benchmark(corpus, copies, concurrent=False)
+
+
+@benchmark("service_process_bytes_concurrent")
+def bench_service_concurrent(corpus, copies):
+    return _service_benchmark(corpus, copies, concurrent=True)
+
+
+def measure(run: Callable[[], None], operations: int, repeat: int) -> dict:
+    # One untimed round: imports, regex caches and the threadpool warm up
+    run()
+    rounds = []
+    for _ in range(repeat):
+        start = perf_counter()
+        run()
+        rounds.append(perf_counter() - start)
+    median = statistics.median(rounds)
+    return {
+        "operations": operations,
+        "repeat": repeat,
+        "median_us": median / operations * 1e6,
+        "best_us": min(rounds) / operations * 1e6,
+        "ops_per_second": operations / median,
+    }
+
+
+def run_suite(names: list[str], copies: int, repeat: int) -> dict:
+    corpus = load_corpus()
+    results = {}
+    for name in names:
+        run, operations = BENCHMARKS[name](corpus, copies)
+        results[name] = measure(run, operations, repeat)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "corpus_receipts": len(corpus),
+        "benchmarks": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[dict]:
+    """One row per current benchmark; regressed when median_us grew beyond threshold."""
+    rows = []
+    for name, result in current["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        ratio = result["median_us"] / base["median_us"] if base else None
+        rows.append(
+            {
+                "name": name,
+                "baseline_us": base["median_us"] if base else None,
+                "current_us": result["median_us"],
+                "ratio": ratio,
+                "regressed": ratio is not None and ratio > 1 + threshold,
+            }
+        )
+    return rows
+
+
+def print_results(current: dict) -> None:
+    for name, result in current["benchmarks"].items():
+        print(f"{name:<34} {result['median_us']:12.2f} us")
+
+
+def print_comparison(rows: list[dict], threshold: float) -> None:
+    print(f"{'benchmark':<34} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for row in rows:
+        if row["ratio"] is None:
+            print(f"{row['name']:<34} {'-':>12} {row['current_us']:12.2f} {'new':>8}")
+            continue
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(
+            f"{row['name']:<34} {row['baseline_us']:12.2f} {row['current_us']:12.2f} "
+            f"{row['ratio'] - 1:+8.1%}{flag}"
+        )
+    print(f"threshold: +{threshold:.0%} median time per operation")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--copies", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS))
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write this run as the new baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--with-logs",
+        action="store_true",
+        help="Keep the service's INFO logs (their cost depends on the terminal)",
+    )
+    args = parser.parse_args()
+
+    if not args.with_logs:
+        logging.disable(logging.INFO)
+    current = run_suite(args.only or list(BENCHMARKS), args.copies, args.repeat)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(
+            f"No baseline at {args.baseline}; run with --update-baseline to record one"
+        )
+        print_results(current)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("machine") != current["machine"]:
+        # Timings from different hardware say nothing about the code
+        print(
+            f"Baseline was recorded on {baseline.get('machine')}, this machine is "
+            f"{current['machine']}; not comparing. Record a local baseline with "
+            "--update-baseline."
+        )
+        print_results(current)
+        return 0
+    rows = compare(current, baseline, args.threshold)
+    print_comparison(rows, args.threshold)
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
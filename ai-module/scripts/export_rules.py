@@ -0,0 +1,36 @@
+"""
+Writes the built-in cleaning and keyword rules as a rules file, as a starting
+point for live tuning. The service picks up edits without a restart.
+
+    python scripts/export_rules.py [--version 2024-06-01.1] [--output data/rules.json]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from app.config.rules import RuleSet  # noqa: E402
+from app.config.settings import settings  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--version", default="1")
+    parser.add_argument("--output", type=Path, default=settings.data_dir / "rules.json")
+    args = parser.parse_args()
+
+    rules = RuleSet.builtin().to_dict()
+    rules["version"] = args.version
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(rules, f, ensure_ascii=False, indent=2)
+    print(f"Wrote rules version {args.version} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Writes the synthetic receipt used for the start-up warm-up inference.
+
+    python scripts/make_warmup_receipt.py [--output app/assets/warmup_receipt.png]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import cv2
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from app.utils.warmup import WARMUP_IMAGE, render_warmup_receipt  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", type=Path, default=WARMUP_IMAGE)
+    args = parser.parse_args()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    # Stored single-channel to keep the file small; it is read back as BGR
+    gray = cv2.cvtColor(render_warmup_receipt(), cv2.COLOR_BGR2GRAY)
+    cv2.imwrite(str(args.output), gray, [cv2.IMWRITE_PNG_COMPRESSION, 9])
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
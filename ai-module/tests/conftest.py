@@ -5,6 +5,7 @@ import os
 from pathlib import Path
 from app.nlp.categorizer import ProductCategorizer
 from app.services.inference_service import InferenceService
+from app.services.interfaces import BaseCategorizer
 from app.ocr.llm_parser import LLMReceiptParser
 from app.utils.visualizer import Visualizer
 
@@ -16,7 +17,6 @@ if "SR_GPU_LAYERS" not in os.environ:
     os.environ["SR_GPU_LAYERS"] = "0"
 
 
-
 @pytest.fixture(scope="module")
 def categorizer():
     """Initializes the categorization model only (lightweight)."""
@@ -24,6 +24,25 @@ def categorizer():
     return ProductCategorizer()
 
 
+class FakeCategorizer(BaseCategorizer):
+    """Puts every product in "Food" and records the size of each call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def categorize_items(self, items):
+        self.calls.append(len(items))
+        for item in items:
+            item["categoryName"] = "Food"
+        return items
+
+
+@pytest.fixture
+def fake_categorizer():
+    """Stands in for the SetFit categorizer in service tests."""
+    return FakeCategorizer()
+
+
 @pytest.fixture(scope="module")
 def inference_service():
     """
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from app.ocr import adaptive_ocr
+from app.ocr.adaptive_ocr import AdaptiveOcr
+
+
+class FakeEngine:
+    """PaddleOCR stand-in: one box per text line, upside-down lines marked by index."""
+
+    drop_score = 0.5
+    args = SimpleNamespace(cls_thresh=0.9)
+
+    def __init__(self, lines: int, upside_down: set[int]):
+        self.lines = lines
+        self.upside_down = upside_down
+        self.classified = []
+
+    def text_detector(self, image):
+        boxes = [
+            np.array([[0, 10 * i], [40, 10 * i], [40, 10 * i + 8], [0, 10 * i + 8]])
+            for i in range(self.lines)
+        ]
+        return np.array(boxes, dtype=np.float32), 0.01
+
+    def text_classifier(self, crops):
+        self.classified.append(len(crops))
+        labels = [
+            ("180", 0.99) if int(crop[0, 0, 0]) in self.upside_down else ("0", 0.99)
+            for crop in crops
+        ]
+        return crops, labels, 0.001
+
+    def text_recognizer(self, crops):
+        return [(f"LINE {int(crop[0, 0, 0])}", 0.9) for crop in crops], 0.02
+
+
+def receipt_image(lines: int) -> np.ndarray:
+    # Each box's pixels carry its line number, so fakes can tell crops apart
+    image = np.zeros((10 * lines, 40, 3), dtype=np.uint8)
+    for i in range(lines):
+        image[10 * i : 10 * i + 10] = i
+    return image
+
+
+def test_upright_receipt_only_classifies_a_sample():
+    engine = FakeEngine(lines=30, upside_down=set())
+    ocr = AdaptiveOcr(engine, mode="adaptive", sample_size=5)
+
+    lines = ocr(receipt_image(30))
+
+    assert lines[:2] == ["LINE 0", "LINE 1"] and len(lines) == 30
+    assert engine.classified == [5]
+    assert ocr.stats()["cls_skipped"] == 1
+
+
+@pytest.mark.parametrize(
+    "mode, upside_down, expected",
+    [
+        ("adaptive", set(range(30)), [5, 30]),
+        ("always", set(), [30]),
+        ("off", set(range(30)), []),
+    ],
+)
+def test_classifier_runs_on_every_box_only_when_needed(mode, upside_down, expected):
+    engine = FakeEngine(lines=30, upside_down=upside_down)
+    ocr = AdaptiveOcr(engine, mode=mode, sample_size=5)
+    ocr(receipt_image(30))
+
+    assert engine.classified == expected
+    assert set(ocr.stats()["avg_ms"]) == {"det", "cls", "rec", "all"}
+
+
+def test_falls_back_to_plain_ocr_without_paddle_internals(monkeypatch):
+    monkeypatch.setattr(adaptive_ocr, "sorted_boxes", None)
+    engine = FakeEngine(lines=3, upside_down=set())
+    calls = []
+
+    def ocr(image, cls):
+        calls.append(cls)
+        return [[[None, (f"LINE {i}", 0.9)] for i in range(3)]]
+
+    engine.ocr = ocr
+    ocr_pipeline = AdaptiveOcr(engine, mode="adaptive")
+
+    assert ocr_pipeline(receipt_image(3)) == ["LINE 0", "LINE 1", "LINE 2"]
+    assert calls == [True]
+    assert engine.classified == []
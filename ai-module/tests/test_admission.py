@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from app.services.admission import AdmissionController, AdmissionRejectedError
+
+
+async def hold(controller, release: asyncio.Event):
+    async with controller.admit():
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_retry_after():
+    """Beyond max_in_flight + max_queue, callers get a fast 429."""
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5)
+    release = asyncio.Event()
+    running = asyncio.create_task(hold(controller, release))
+    waiting = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0.01)
+
+    assert controller.stats()["in_flight"] == 1
+    assert controller.stats()["queue_depth"] == 1
+
+    with pytest.raises(AdmissionRejectedError) as rejected:
+        async with controller.admit():
+            pass
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after >= 1
+
+    release.set()
+    await asyncio.gather(running, waiting)
+    assert controller.stats()["admitted"] == 2
+    assert controller.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_burst_of_arrivals_respects_the_queue_limit():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5)
+    release = asyncio.Event()
+    # All four reach admit() in the same event-loop iteration
+    burst = [asyncio.create_task(hold(controller, release)) for _ in range(4)]
+    await asyncio.sleep(0.01)
+
+    assert controller.stats()["in_flight"] == 1
+    assert controller.stats()["queue_depth"] == 1
+
+    release.set()
+    outcomes = await asyncio.gather(*burst, return_exceptions=True)
+    rejected = [o for o in outcomes if isinstance(o, AdmissionRejectedError)]
+    assert len(rejected) == 2
+    assert controller.stats()["admitted"] == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_returns_503():
+    controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=0.05)
+    release = asyncio.Event()
+    running = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(AdmissionRejectedError) as rejected:
+        async with controller.admit():
+            pass
+    assert rejected.value.status_code == 503
+
+    release.set()
+    await running
+    assert controller.stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_closed_controller_rejects_new_work_and_drains_admitted():
+    controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=5)
+    release = asyncio.Event()
+    running = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0.01)
+
+    controller.close()
+    with pytest.raises(AdmissionRejectedError) as rejected:
+        async with controller.admit():
+            pass
+    assert rejected.value.status_code == 503
+
+    assert await controller.drain(timeout=0.05) is False
+    release.set()
+    assert await controller.drain(timeout=1) is True
+    await running
@@ -0,0 +1,57 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.utils.background_visualizer import BackgroundVisualizer
+
+GOOD = [{"productName": "MLEKO", "price": 3.99, "categoryName": "Food"}]
+UNSURE = [{"productName": "XQZ", "price": 1.0, "categoryName": "Other"}]
+
+
+class BlockingRenderer:
+    def __init__(self):
+        self.release = threading.Event()
+        self.rendered = []
+
+    def __call__(self, image, raw_items, final_items, output_path):
+        self.release.wait(timeout=5)
+        self.rendered.append(output_path.name)
+        return output_path
+
+
+def make(renderer, **kwargs):
+    return BackgroundVisualizer(
+        executor=ThreadPoolExecutor(max_workers=1), render=renderer, **kwargs
+    )
+
+
+def test_only_sampled_and_suspicious_receipts_are_rendered():
+    renderer = BlockingRenderer()
+    renderer.release.set()
+    visualizer = make(renderer, sample_rate=0.0, render_suspicious=True)
+
+    visualizer.visualize(None, GOOD, GOOD, Path("good.jpg"))
+    visualizer.visualize(None, UNSURE, UNSURE, Path("unsure.jpg"))
+    visualizer.visualize(None, [], [], Path("empty.jpg"))
+    visualizer._executor.shutdown(wait=True)
+
+    assert sorted(renderer.rendered) == ["empty.jpg", "unsure.jpg"]
+    stats = visualizer.stats()
+    assert stats["skipped"] == 1
+    assert stats["rendered"] == 2
+    assert stats["pending"] == 0
+
+
+def test_reports_are_dropped_when_the_renderer_is_behind():
+    renderer = BlockingRenderer()
+    visualizer = make(renderer, sample_rate=1.0, max_pending=2)
+
+    for index in range(5):
+        # Returns at once even though the renderer is stuck
+        visualizer.visualize(None, GOOD, GOOD, Path(f"{index}.jpg"))
+
+    assert visualizer.stats()["dropped"] == 3
+    renderer.release.set()
+    visualizer._executor.shutdown(wait=True)
+    assert renderer.rendered == ["0.jpg", "1.jpg"]
+    assert visualizer.stats()["pending"] == 0
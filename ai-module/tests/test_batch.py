@@ -0,0 +1,98 @@
+import io
+import zipfile
+import cv2
+import numpy as np
+import pytest
+from app.services.inference_service import InferenceService
+from app.services.interfaces import BaseParser
+from app.services.result_cache import ResultCache
+from app.utils.archive import BatchTooLargeError, expand_uploads
+from app.utils.image import InvalidImageError
+from app.utils.noop_visualizer import NoopVisualizer
+
+
+NAMES = {1: "milk", 2: "tea"}
+
+
+def png(value: int) -> bytes:
+    """Tiny receipt stand-in; the fake parser reads the product from its pixels."""
+    return cv2.imencode(".png", np.full((4, 4, 3), value, dtype=np.uint8))[1].tobytes()
+
+
+class FakeParser(BaseParser):
+    """Returns one item named after the pixel value; unknown values raise."""
+
+    def __init__(self):
+        self.batches = []
+
+    def parse(self, image):
+        value = int(image[0, 0, 0])
+        if value not in NAMES:
+            raise ValueError("unreadable receipt")
+        return {"items": [{"productName": NAMES[value], "price": 1.0}]}
+
+    def parse_batch(self, image_paths):
+        self.batches.append(len(image_paths))
+        return super().parse_batch(image_paths)
+
+
+def make_zip(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_expand_uploads_unpacks_zip_images_only():
+    archive = make_zip(
+        {
+            "jan/01.jpg": b"a",
+            "jan/notes.txt": b"skip",
+            "__MACOSX/jan/._01.jpg": b"skip",
+        }
+    )
+    images = expand_uploads(
+        [("single.png", b"b"), ("month.zip", archive)], max_files=10, max_file_bytes=10
+    )
+    assert images == [("single.png", b"b"), ("month.zip/jan/01.jpg", b"a")]
+
+    with pytest.raises(BatchTooLargeError):
+        expand_uploads([("month.zip", archive)], max_files=10, max_file_bytes=0)
+    with pytest.raises(BatchTooLargeError):
+        expand_uploads([("a.jpg", b"a"), ("b.jpg", b"b")], 1, 10)
+
+
+@pytest.mark.asyncio
+async def test_process_batch_reports_per_receipt_results_and_errors(
+    fake_categorizer,
+):
+    parser = FakeParser()
+    service = InferenceService(
+        parser, fake_categorizer, NoopVisualizer(), result_cache=ResultCache()
+    )
+
+    outcomes = await service.process_batch(
+        [
+            ("1.png", png(1)),
+            ("2.png", png(9)),
+            ("3.png", png(1)),
+            ("4.png", png(2)),
+            ("5.txt", b"not an image"),
+        ]
+    )
+
+    assert outcomes[0] == [
+        {"productName": "milk", "price": 1.0, "categoryName": "Food"}
+    ]
+    assert isinstance(outcomes[1], ValueError)
+    assert outcomes[2] == outcomes[0]
+    assert outcomes[3][0]["productName"] == "tea"
+    assert isinstance(outcomes[4], InvalidImageError)
+    # Duplicates parsed once, all names categorized in a single pass
+    assert parser.batches == [3]
+    assert fake_categorizer.calls == [2]
+
+    # Successful receipts are cached, failed ones are retried
+    await service.process_batch([("6.png", png(2)), ("7.png", png(9))])
+    assert parser.batches == [3, 1]
@@ -0,0 +1,46 @@
+import threading
+from app.nlp.batching import MicroBatcher
+
+
+def test_concurrent_requests_share_one_forward_pass():
+    """Names from concurrent callers are merged and each caller gets its own slice."""
+    calls = []
+
+    def predict(names):
+        calls.append(list(names))
+        return [(name.lower(), 0.9) for name in names]
+
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=100)
+    receipts = [["MLEKO", "CHLEB"], ["PIWO"], ["SER", "MASLO", "JAJA"]]
+    results = [None] * len(receipts)
+
+    def worker(i):
+        results[i] = batcher.predict(receipts[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    for names, predictions in zip(receipts, results):
+        assert [label for label, _ in predictions] == [n.lower() for n in names]
+    assert len(calls) < len(receipts)
+
+
+def test_batch_never_exceeds_max_size():
+    """A request that would overflow the batch is carried over to the next one."""
+    sizes = []
+
+    def predict(names):
+        sizes.append(len(names))
+        return [("Groceries", 1.0)] * len(names)
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(["A", "B", "C"]) for _ in range(3)]
+    for future in futures:
+        assert len(future.result(timeout=5)) == 3
+    batcher.close()
+
+    assert max(sizes) <= 4
@@ -0,0 +1,59 @@
+import asyncio
+
+from app.services.inference_service import InferenceService
+from app.utils.image import decode_image
+from app.utils.noop_visualizer import NoopVisualizer
+from benchmarks.fakes import (
+    KeywordCategorizer,
+    ReplayParser,
+    load_corpus,
+    receipt_image,
+    simulated_parser,
+)
+from benchmarks.suite import compare
+
+
+def results(**medians):
+    return {"benchmarks": {name: {"median_us": us} for name, us in medians.items()}}
+
+
+def test_only_slowdowns_beyond_the_threshold_are_regressions():
+    baseline = results(clean_items=100.0, clean_raw_text=50.0)
+    current = results(clean_items=120.0, clean_raw_text=70.0, check_keywords=4.0)
+
+    rows = {row["name"]: row for row in compare(current, baseline, threshold=0.25)}
+
+    assert not rows["clean_items"]["regressed"]
+    assert rows["clean_raw_text"]["regressed"]
+    # Not in the baseline yet
+    assert rows["check_keywords"]["ratio"] is None
+    assert not rows["check_keywords"]["regressed"]
+
+
+def test_recorded_corpus_replays_through_the_service():
+    corpus = load_corpus()
+    service = InferenceService(
+        parser=ReplayParser(corpus),
+        categorizer=KeywordCategorizer(),
+        visualizer=NoopVisualizer(),
+    )
+    index = next(i for i, r in enumerate(corpus) if r["name"] == "biedronka_groceries")
+
+    items = asyncio.run(service.process_bytes(receipt_image(index), "receipt.png"))
+
+    names = [item["productName"] for item in items]
+    assert "SUMA PLN" not in names
+    assert all("categoryName" in item for item in items)
+
+
+def test_real_parser_over_simulated_models_returns_the_recorded_items():
+    corpus = load_corpus()
+    parser = simulated_parser(
+        corpus,
+        ocr_options={"latency": 0, "cpu": 0},
+        llm_options={"prompt_eval": 0, "per_token": 0, "cpu_per_token": 0},
+    )
+    for index in range(len(corpus)):
+        image = decode_image(receipt_image(index, nonce=index))
+        # Same items as the recorded completion parsed in one piece
+        assert parser.parse(image)["items"] == ReplayParser(corpus)._items[index]
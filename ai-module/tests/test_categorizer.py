@@ -1,3 +1,7 @@
+import json
+from app.nlp.categorizer import ProductCategorizer
+
+
 def test_model_is_real(categorizer):
     """Checks if the model loaded correctly and is not a dummy."""
     assert categorizer.model is not None
@@ -61,3 +65,53 @@ def test_batch_processing(categorizer):
     assert len(results) == 5
     for res in results:
         assert "category" in res
+
+
+def test_name_cache_skips_model_for_repeated_names(tmp_path):
+    """Repeated (normalized) product names are answered from the cache."""
+    cached = ProductCategorizer(cache_max_entries=16)
+
+    first = cached.predict(["MLEKO LACIATE 2%", "BULKA KAIZERKA"])
+    second = cached.predict(["mleko  laciate 2%", "BULKA KAIZERKA"])
+
+    assert first == second
+    assert cached.name_cache.stats()["hits"] == 2
+
+    export_path = tmp_path / "names.json"
+    assert cached.export_cache(export_path) == 2
+
+    warmed = ProductCategorizer(cache_max_entries=16)
+    assert warmed.warm_up_cache(export_path) == 2
+    assert warmed.predict(["BULKA KAIZERKA"]) == [first[1]]
+    assert warmed.name_cache.stats()["misses"] == 0
+
+
+def test_exported_predictions_load_without_running_the_model(tmp_path):
+    """An export from the same model fills the cache as it is."""
+    cached = ProductCategorizer(cache_max_entries=16)
+    expected = cached.predict(["MLEKO LACIATE 2%", "BULKA KAIZERKA"])
+    export_path = tmp_path / "names.json"
+    cached.export_cache(export_path)
+
+    def fail(names):
+        raise AssertionError("exported predictions should be reused")
+
+    warmed = ProductCategorizer(cache_max_entries=16)
+    warmed.predict_uncached = fail
+    assert warmed.warm_up_cache(export_path) == 2
+    assert warmed.predict(["MLEKO LACIATE 2%", "BULKA KAIZERKA"]) == expected
+
+
+def test_export_of_another_model_is_re_predicted_up_to_the_cap(tmp_path):
+    """Stale predictions are dropped and only max_predict names hit the model."""
+    export_path = tmp_path / "names.json"
+    entries = [
+        {"productName": name, "categoryName": "Stale", "confidence": 1.0}
+        for name in ["MLEKO LACIATE 2%", "BULKA KAIZERKA", "CHLEB ZYTNI"]
+    ]
+    export_path.write_text(json.dumps({"model": "other", "entries": entries}))
+
+    warmed = ProductCategorizer(cache_max_entries=16)
+    assert warmed.warm_up_cache(export_path, max_predict=2) == 2
+    assert warmed.name_cache.get("CHLEB ZYTNI") is None
+    assert warmed.name_cache.get("MLEKO LACIATE 2%")[0] != "Stale"
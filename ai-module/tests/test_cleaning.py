@@ -0,0 +1,20 @@
+import copy
+import json
+from pathlib import Path
+import pytest
+from app.ocr.cleaning import clean_items, clean_raw_text
+
+# Outputs recorded from the original (uncompiled) cleaning implementation
+GOLDEN = json.loads(
+    (Path(__file__).parent / "golden" / "cleaning.json").read_text(encoding="utf-8")
+)
+
+
+@pytest.mark.parametrize("case", GOLDEN["raw_text"])
+def test_clean_raw_text_matches_golden_output(case):
+    assert clean_raw_text(case["input"]) == case["expected"]
+
+
+@pytest.mark.parametrize("case", GOLDEN["items"])
+def test_clean_items_matches_golden_output(case):
+    assert clean_items(copy.deepcopy(case["input"])) == case["expected"]
@@ -41,24 +41,20 @@ async def test_full_inference_process(inference_service, file_path):
 
             # --- ASSERTIONS (Check if result makes sense) ---
 
-            # 1. Is the result a dictionary?
-            assert isinstance(result, dict)
+            # 1. process_receipt returns the list of categorized items
+            assert isinstance(result, list)
 
-            # 2. Does it contain key fields?
-            assert "receipt_id" in result
-            assert "items" in result
-            assert "summary" in result
-
-            # 3. Were any products detected? (Warning instead of error, as receipt might be unreadable)
-            if not result["items"]:
+            # 2. Were any products detected? (Warning instead of error, as receipt might be unreadable)
+            if not result:
                 print(f"⚠️ Warning: No products detected on {file_path.name}")
             else:
                 # Check structure of the first product
-                first_item = result["items"][0]
+                first_item = result[0]
                 assert "productName" in first_item
-                assert "category" in first_item
+                assert "price" in first_item
+                assert "categoryName" in first_item
                 print(
-                    f"✅ Detected {len(result['items'])} products. First: {first_item['productName']} -> {first_item['category']}"
+                    f"✅ Detected {len(result)} products. First: {first_item['productName']} -> {first_item['categoryName']}"
                 )
 
         finally:
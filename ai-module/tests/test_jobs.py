@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from app.services.jobs import (
+    JobManager,
+    JobManagerClosedError,
+    JobQueueFullError,
+    JobStatus,
+)
+
+
+class FakeService:
+    """Stands in for InferenceService; records the order jobs are processed in."""
+
+    def __init__(self, fail_on: str | None = None):
+        self.release = asyncio.Event()
+        self.processed = []
+        self.fail_on = fail_on
+
+    async def process_bytes(self, content, filename, wait_for_slot=False):
+        await self.release.wait()
+        self.processed.append(filename)
+        if filename == self.fail_on:
+            raise ValueError("unreadable receipt")
+        return [{"productName": filename, "price": 1.0, "quantity": 1.0}]
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_by_priority_and_report_results():
+    service = FakeService(fail_on="bad.jpg")
+    manager = JobManager(service, workers=1, max_queued=10)
+    await manager.start()
+
+    blocker = manager.submit(b"0", "first.jpg")
+    await asyncio.sleep(0)
+    low = manager.submit(b"1", "low.jpg", priority=5)
+    high = manager.submit(b"2", "high.jpg", priority=0)
+    bad = manager.submit(b"3", "bad.jpg", priority=9)
+
+    states = []
+
+    async def follow():
+        async for job in manager.watch(high.id):
+            states.append(job.status)
+
+    follower = asyncio.create_task(follow())
+    service.release.set()
+    await asyncio.wait_for(follower, 1)
+    while not bad.done:
+        await asyncio.sleep(0.01)
+
+    assert service.processed == ["first.jpg", "high.jpg", "low.jpg", "bad.jpg"]
+    # Subscribers see the latest state; quick transitions may be coalesced
+    assert states[0] is JobStatus.QUEUED and states[-1] is JobStatus.SUCCEEDED
+    assert manager.get(low.id).items[0]["productName"] == "low.jpg"
+    assert bad.status is JobStatus.FAILED and bad.error == "unreadable receipt"
+    assert blocker.content is None  # uploads are dropped once processed
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_and_finished_jobs_expire():
+    service = FakeService()
+    manager = JobManager(service, workers=1, max_queued=1, retention_seconds=0.05)
+    await manager.start()
+
+    running = manager.submit(b"0", "a.jpg")
+    await asyncio.sleep(0)
+    manager.submit(b"1", "b.jpg")
+    with pytest.raises(JobQueueFullError):
+        manager.submit(b"2", "c.jpg")
+
+    service.release.set()
+    await asyncio.sleep(0.2)
+    assert manager.get(running.id) is None
+    assert manager.stats()["expired"] == 2
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_closed_manager_rejects_jobs_and_drains_accepted_ones():
+    service = FakeService()
+    manager = JobManager(service, workers=1)
+    await manager.start()
+    accepted = [manager.submit(b"0", "a.jpg"), manager.submit(b"1", "b.jpg")]
+
+    manager.close()
+    with pytest.raises(JobManagerClosedError):
+        manager.submit(b"2", "c.jpg")
+
+    assert await manager.drain(timeout=0.05) is False
+    service.release.set()
+    assert await manager.drain(timeout=1) is True
+    assert all(job.status is JobStatus.SUCCEEDED for job in accepted)
+    await manager.stop()
@@ -0,0 +1,32 @@
+from app.ocr.llm_cache import LLMResponseCache, normalize_text
+
+
+def test_whitespace_variants_share_a_key():
+    """Two OCR runs differing only in spacing must hit the same entry."""
+    a = LLMResponseCache.key_for("model:prompt", "MLEKO  3,99\n\n CHLEB 4,50 ")
+    b = LLMResponseCache.key_for("model:prompt", "MLEKO 3,99\nCHLEB 4,50")
+
+    assert a == b
+    assert normalize_text(" A  B \n\n C ") == "A B\nC"
+
+
+def test_namespace_change_invalidates_entries(tmp_path):
+    """A different model/prompt fingerprint must not return old answers."""
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3")
+    cache.put(cache.key_for("v1", "MLEKO 3,99"), [{"productName": "MLEKO"}])
+
+    assert cache.get(cache.key_for("v1", "MLEKO 3,99")) == [{"productName": "MLEKO"}]
+    assert cache.get(cache.key_for("v2", "MLEKO 3,99")) is None
+
+
+def test_entries_survive_restart_and_are_bounded(tmp_path):
+    """Entries persist across instances and the table is pruned to max_entries."""
+    db_path = tmp_path / "llm.sqlite3"
+    cache = LLMResponseCache(db_path, max_entries=2)
+    for i in range(3):
+        cache.put(cache.key_for("ns", f"text {i}"), [{"productName": f"P{i}"}])
+
+    reopened = LLMResponseCache(db_path, max_entries=2)
+
+    assert reopened.stats()["size"] == 2
+    assert reopened.get(reopened.key_for("ns", "text 2")) == [{"productName": "P2"}]
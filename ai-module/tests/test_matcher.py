@@ -0,0 +1,43 @@
+import random
+from app.nlp.config import KEYWORDS
+from app.utils.matcher import KeywordMatcher
+
+
+def naive_first_group(groups, text):
+    """Reference implementation: the original nested `in` loop."""
+    for group, words in groups.items():
+        if any(word in text for word in words):
+            return group
+    return None
+
+
+def test_matches_nested_loop_on_config_keywords():
+    """The automaton must agree with the nested loop, including category priority."""
+    matcher = KeywordMatcher(KEYWORDS)
+    words = [w for ws in KEYWORDS.values() for w in ws]
+    random.seed(0)
+    names = [
+        " ".join(random.choice(words + ["XYZ", "500G", "BIO", "2%"]) for _ in range(3))
+        for _ in range(500)
+    ] + ["TOTALNA BZDURA XYZ 123", "", "LACIATEHEKOBUTELKA2PEC", "FRANCZAK BUKA"]
+
+    for name in names:
+        assert matcher.first_group(name) == naive_first_group(KEYWORDS, name), name
+
+
+def test_overlapping_keywords_respect_priority():
+    """A lower-priority keyword inside a higher-priority one must not win."""
+    matcher = KeywordMatcher({"first": ["SER"], "second": ["SEREK", "PIWO"]})
+
+    assert matcher.first_group("SEREK WIEJSKI") == "first"
+    assert matcher.first_group("PIWOSER") == "first"
+    assert matcher.first_group("PIWO") == "second"
+    assert matcher.first_group("WODA") is None
+
+
+def test_from_words_matches_any_substring():
+    matcher = KeywordMatcher.from_words(["DO ZAPLATY", "PTU", "NIP"])
+
+    assert matcher.matches("SUMA DO ZAPLATY 12,50")
+    assert matcher.matches("ABCNIPDEF")
+    assert not matcher.matches("MLEKO 3,99")
@@ -0,0 +1,42 @@
+from app.utils.metrics import MetricsRegistry, scrape_lines
+
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    registry = MetricsRegistry()
+    stages = registry.histogram("stage_seconds", "Stage time", buckets=(0.1, 1.0))
+    stages.observe(0.05, stage="ocr")
+    stages.observe(0.5, stage="ocr")
+    stages.observe(3.0, stage="ocr")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE stage_seconds histogram" in lines
+    assert 'stage_seconds_bucket{stage="ocr",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="ocr",le="1.0"} 2' in lines
+    assert 'stage_seconds_bucket{stage="ocr",le="+Inf"} 3' in lines
+    assert 'stage_seconds_sum{stage="ocr"} 3.55' in lines
+    assert 'stage_seconds_count{stage="ocr"} 3' in lines
+
+
+def test_worker_observations_are_replayed_into_the_parent():
+    worker, parent = MetricsRegistry(), MetricsRegistry()
+    for registry in (worker, parent):
+        registry.counter("tokens_total", "Tokens")
+    worker.buffer()
+
+    worker._metrics["tokens_total"].inc(40, kind="prompt")
+    worker._metrics["tokens_total"].inc(12, kind="completion")
+    # Buffered, not aggregated, in the worker
+    assert 'tokens_total{kind="prompt"}' not in worker.render()
+
+    parent.replay(worker.take_buffered())
+    parent.replay(worker.take_buffered())
+
+    lines = parent.render().splitlines()
+    assert 'tokens_total{kind="completion"} 12' in lines
+    assert 'tokens_total{kind="prompt"} 40' in lines
+
+
+def test_scraped_values_are_escaped():
+    lines = scrape_lines("depth", "Queue depth", {(("queue", 'a"b'),): 3})
+    assert lines[-1] == 'depth{queue="a\\"b"} 3'
@@ -0,0 +1,60 @@
+import time
+
+from app.services import factory
+from app.config.settings import settings
+from app.utils.noop_visualizer import NoopVisualizer
+
+
+def slow_builder(component, seconds=0.2):
+    def build():
+        time.sleep(seconds)
+        return component
+
+    return build
+
+
+def test_components_load_concurrently_and_report_times(monkeypatch):
+    parser, categorizer, visualizer = object(), object(), object()
+    monkeypatch.setattr(factory, "build_parser", slow_builder(parser))
+    monkeypatch.setattr(factory, "build_categorizer", slow_builder(categorizer))
+    monkeypatch.setattr(factory, "build_visualizer", slow_builder(visualizer))
+
+    components, load_times = factory.load_components()
+
+    assert components == {
+        "parser": parser,
+        "categorizer": categorizer,
+        "visualizer": visualizer,
+    }
+    assert {"parser", "categorizer", "visualizer", "total"} == load_times.keys()
+    assert load_times["parser"] >= 0.2
+    # Three 0.2 s loads side by side, not one after another
+    assert load_times["total"] < 0.5
+
+
+def test_disabled_components_are_not_loaded(monkeypatch):
+    monkeypatch.setattr(settings, "enable_categorizer", False)
+    monkeypatch.setattr(settings, "enable_visualizer", False)
+
+    assert factory.build_categorizer() is None
+    assert isinstance(factory.build_visualizer(), NoopVisualizer)
+
+
+def test_production_never_builds_the_matplotlib_visualizer(monkeypatch):
+    monkeypatch.setattr(settings, "enable_visualizer", True)
+    monkeypatch.setattr(settings, "environment", "production")
+
+    assert isinstance(factory.build_visualizer(), NoopVisualizer)
+
+
+def test_in_process_parser_admits_one_receipt_at_a_time(monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_in_flight", None)
+    monkeypatch.setattr(settings, "parser_workers", 0)
+    assert factory.build_admission().max_in_flight == 1
+
+    monkeypatch.setattr(settings, "parser_workers", 3)
+    monkeypatch.setattr(settings, "parser_max_pending", None)
+    assert factory.build_admission().max_in_flight == 6
+
+    monkeypatch.setattr(settings, "admission_max_in_flight", 4)
+    assert factory.build_admission().max_in_flight == 4
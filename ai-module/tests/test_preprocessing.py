@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+import pytest
+from app.ocr.preprocessing import (
+    PreprocessConfig,
+    crop_to_receipt,
+    estimate_skew,
+    find_receipt,
+    preprocess,
+    resize_long_side,
+    rotate,
+)
+
+
+def synthetic_receipt() -> np.ndarray:
+    """White paper with black bars standing in for printed lines."""
+    receipt = np.full((800, 500, 3), 255, dtype=np.uint8)
+    for i, y in enumerate(range(60, 740, 40)):
+        cv2.rectangle(receipt, (50, y), (450 - (i * 13) % 120, y + 14), (0, 0, 0), -1)
+    return receipt
+
+
+def test_resize_only_downscales_keeping_aspect_ratio():
+    image = np.zeros((4000, 3000, 3), dtype=np.uint8)
+    assert resize_long_side(image, 1600).shape == (1600, 1200, 3)
+    assert resize_long_side(image, None) is image
+    assert resize_long_side(image, 5000) is image
+
+
+@pytest.mark.parametrize("angle", [-10, -3, 4, 12])
+def test_deskew_straightens_rotated_text(angle):
+    rotated = rotate(synthetic_receipt(), angle)
+    assert estimate_skew(rotated) == pytest.approx(angle, abs=0.5)
+
+    config = PreprocessConfig(max_side=None, grayscale=False, crop=False)
+    assert estimate_skew(preprocess(rotated, config)) == pytest.approx(0, abs=0.5)
+
+
+def test_crop_keeps_receipt_and_output_stays_bgr():
+    photo = np.full((1200, 1000, 3), 60, dtype=np.uint8)
+    photo[200:1000, 250:750] = synthetic_receipt()
+
+    cropped = crop_to_receipt(photo)
+    assert 800 <= cropped.shape[0] < 900 and 500 <= cropped.shape[1] < 600
+
+    result = preprocess(photo, PreprocessConfig(max_side=600))
+    assert result.ndim == 3 and result.shape[2] == 3
+    assert max(result.shape[:2]) <= 600
+
+    # A photo that is all paper is left uncropped
+    assert crop_to_receipt(synthetic_receipt()).shape == (800, 500, 3)
+
+
+def test_skew_of_photographed_receipt_comes_from_paper_edges():
+    photo = np.full((1200, 1000, 3), 60, dtype=np.uint8)
+    photo[200:1000, 250:750] = synthetic_receipt()
+    matrix = cv2.getRotationMatrix2D((500, 600), 6, 1.0)
+    photo = cv2.warpAffine(photo, matrix, (1000, 1200), borderValue=(60, 60, 60))
+
+    assert estimate_skew(photo, find_receipt(photo)) == pytest.approx(6, abs=0.5)
+    straightened = preprocess(photo, PreprocessConfig(max_side=None))
+    assert estimate_skew(straightened) == pytest.approx(0, abs=0.5)
@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from app.services.inference_service import InferenceService
+from app.services.result_cache import ResultCache
+from app.utils.cache import LRUCache
+from app.utils.noop_visualizer import NoopVisualizer
+from benchmarks.fakes import (
+    KeywordCategorizer,
+    load_corpus,
+    receipt_image,
+    simulated_parser,
+)
+
+
+def test_lru_evicts_least_recently_used():
+    """Checks that the cache stays bounded and drops the oldest entry."""
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_repeated_upload_is_served_from_cache():
+    """The second request with the same bytes must not recompute."""
+    cache = ResultCache(max_entries=8, ttl_seconds=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return [{"productName": "MLEKO", "price": 3.99, "quantity": 1.0}]
+
+    key = ResultCache.key_for(b"receipt-bytes")
+    first = await cache.get_or_compute(key, compute)
+    second = await cache.get_or_compute(key, compute)
+
+    assert first == second
+    assert calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_are_coalesced():
+    """Concurrent uploads of the same image share one in-flight computation."""
+    cache = ResultCache(max_entries=8, ttl_seconds=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return [{"productName": "CHLEB", "price": 4.5, "quantity": 1.0}]
+
+    key = ResultCache.key_for(b"same-photo")
+    results = await asyncio.gather(
+        *[cache.get_or_compute(key, compute) for _ in range(5)]
+    )
+
+    assert calls == 1
+    assert all(r == results[0] for r in results)
+    assert cache.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_does_not_fail_its_duplicates():
+    """A client disconnecting mid-computation leaves the other uploads unharmed."""
+    cache = ResultCache(max_entries=8, ttl_seconds=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return [{"productName": "SER", "price": 6.49, "quantity": 1.0}]
+
+    key = ResultCache.key_for(b"disconnect")
+    leader = asyncio.create_task(cache.get_or_compute(key, compute))
+    await asyncio.sleep(0)
+    duplicate = asyncio.create_task(cache.get_or_compute(key, compute))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    items = await duplicate
+
+    assert items[0]["productName"] == "SER"
+    assert leader.cancelled()
+    assert calls == 1
+    assert cache.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_results_persist_on_disk(tmp_path):
+    """A fresh cache instance answers from the on-disk store."""
+
+    async def compute():
+        return [{"productName": "MASLO", "price": 7.99, "quantity": 1.0}]
+
+    key = ResultCache.key_for(b"persisted")
+    await ResultCache(disk_dir=tmp_path).get_or_compute(key, compute)
+
+    async def fail():
+        raise AssertionError("should be served from disk")
+
+    restored = ResultCache(disk_dir=tmp_path)
+    items = await restored.get_or_compute(key, fail)
+
+    assert items[0]["productName"] == "MASLO"
+    assert restored.stats()["disk_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_failure_is_an_error_not_a_cached_empty_receipt():
+    """A transient engine failure must not be served to later uploads."""
+    parser = simulated_parser(
+        load_corpus(),
+        ocr_options={"latency": 0, "cpu": 0},
+        llm_options={"prompt_eval": 0, "per_token": 0, "cpu_per_token": 0},
+    )
+    service = InferenceService(
+        parser, KeywordCategorizer(), NoopVisualizer(), result_cache=ResultCache()
+    )
+    complete = parser.llm.create_chat_completion
+
+    def fail_once(messages, **kwargs):
+        parser.llm.create_chat_completion = complete
+        raise RuntimeError("llama_decode returned -1")
+
+    parser.llm.create_chat_completion = fail_once
+    with pytest.raises(RuntimeError):
+        await service.process_bytes(receipt_image(0), "r.png")
+    assert len(service.result_cache.memory) == 0
+
+    items = await service.process_bytes(receipt_image(0), "r.png")
+    assert items and len(service.result_cache.memory) == 1
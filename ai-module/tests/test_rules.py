@@ -0,0 +1,81 @@
+import json
+import os
+import pytest
+from app.config import rules
+from app.config.rules import RuleStore
+from app.ocr.cleaning import clean_items, clean_raw_text
+
+
+@pytest.fixture
+def rule_store(tmp_path, monkeypatch):
+    """A store reading tmp_path/rules.json on every call."""
+    store = RuleStore(tmp_path / "rules.json", check_interval=0)
+    monkeypatch.setattr(rules, "_store", store)
+    return store
+
+
+def write_rules(store, **sections):
+    store.path.write_text(json.dumps(sections), encoding="utf-8")
+
+
+def test_builtin_rules_without_file(rule_store):
+    assert rule_store.get().version == rules.DEFAULT_VERSION
+    assert clean_raw_text("NIP 123\nMLEKO 3,99") == "MLEKO 3,99"
+
+
+def test_rules_file_changes_are_picked_up_live(rule_store):
+    items = [{"productName": "TORBA FOLIOWA", "price": 0.5}]
+    assert clean_items(items)
+
+    write_rules(rule_store, version="2", blacklist=["TORBA"])
+    assert clean_items(items) == []
+    assert rule_store.get().version == "2"
+
+    write_rules(rule_store, version="3", keywords={"Bags": ["TORBA"]})
+    assert rule_store.get().keyword_matcher.first_group("TORBA FOLIOWA") == "Bags"
+    # Sections missing from the file fall back to the built-in rules
+    assert "RABAT" in rule_store.get().blacklist
+
+
+def test_invalid_file_keeps_previous_rules(rule_store):
+    write_rules(rule_store, version="7", blacklist=["TORBA"])
+    assert rule_store.get().version == "7"
+
+    rule_store.path.write_text("{not json", encoding="utf-8")
+
+    assert rule_store.get().version == "7"
+    assert rule_store.stats()["last_error"] is not None
+
+
+@pytest.mark.parametrize(
+    "sections",
+    [
+        {"blacklist": "TORBA"},
+        {"blacklist": [1]},
+        {"garbage_markers": None},
+        {"keywords": {"Bags": "TORBA"}},
+    ],
+)
+def test_sections_must_be_lists_of_strings(rule_store, sections):
+    write_rules(rule_store, version="7", blacklist=["TORBA"])
+    assert rule_store.get().version == "7"
+
+    write_rules(rule_store, version="8", **sections)
+
+    assert rule_store.get().version == "7"
+    assert "list of strings" in rule_store.stats()["last_error"]
+    assert clean_raw_text("NIP 123\nMLEKO 3,99") == "MLEKO 3,99"
+
+
+def test_rejected_file_is_retried(rule_store):
+    write_rules(rule_store, version="8", blacklist=[123])
+    assert rule_store.get().version == rules.DEFAULT_VERSION
+    stat = rule_store.path.stat()
+
+    # Fixed in place with the same size and mtime
+    write_rules(rule_store, version="8", blacklist=["X"])
+    os.utime(rule_store.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert rule_store.path.stat().st_size == stat.st_size
+
+    assert rule_store.get().version == "8"
+    assert rule_store.stats()["last_error"] is None
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app import main
+from app.config.settings import settings
+from app.services import factory, inference_service, jobs
+from app.services.interfaces import BaseParser
+from app.services.lifecycle import get_lifecycle
+from app.utils.noop_visualizer import NoopVisualizer
+from benchmarks.fakes import receipt_image
+
+
+class BlockingParser(BaseParser):
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def parse(self, image):
+        self.started.set()
+        self.release.wait(timeout=5)
+        return {"items": []}
+
+
+@pytest.fixture
+def fresh_app(monkeypatch):
+    monkeypatch.setattr(settings, "warmup_enabled", False)
+    monkeypatch.setattr(settings, "result_cache_enabled", False)
+    monkeypatch.setattr(settings, "enable_categorizer", False)
+    monkeypatch.setattr(factory, "build_visualizer", NoopVisualizer)
+    monkeypatch.setattr(inference_service, "_inference_service_instance", None)
+    monkeypatch.setattr(jobs, "_job_manager", None)
+    get_lifecycle.cache_clear()
+    yield main.app
+    get_lifecycle.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_ready_fails_while_accepted_receipts_are_still_running(
+    fresh_app, monkeypatch
+):
+    parser = BlockingParser()
+    monkeypatch.setattr(factory, "build_parser", lambda: parser)
+    stopped = asyncio.Event()
+
+    async with fresh_app.router.lifespan_context(fresh_app):
+        transport = httpx.ASGITransport(app=fresh_app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            while not get_lifecycle().ready:
+                await asyncio.sleep(0.01)
+            upload = asyncio.create_task(
+                client.post(
+                    "/api/v1.0/ai/ocr/process",
+                    files={"image": ("r.png", receipt_image(0), "image/png")},
+                )
+            )
+            await asyncio.to_thread(parser.started.wait, 5)
+
+            # What SIGTERM does before uvicorn gets to close the socket
+            main.start_draining(stopped.set)
+            ready = await client.get("/ready")
+
+            assert ready.status_code == 503
+            assert ready.json()["status"] == "draining"
+            assert not upload.done() and not stopped.is_set()
+
+            parser.release.set()
+            assert (await upload).status_code == 200
+            await asyncio.wait_for(stopped.wait(), timeout=5)
+            assert get_lifecycle().drained is True
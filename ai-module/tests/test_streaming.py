@@ -0,0 +1,115 @@
+import json
+import cv2
+import numpy as np
+import pytest
+from app.config.rules import get_rules
+from app.ocr.stream_json import IncrementalItemParser
+from app.services.inference_service import InferenceService
+from app.services.interfaces import BaseParser
+from app.services.result_cache import ResultCache
+from app.utils.noop_visualizer import NoopVisualizer
+
+COMPLETION = (
+    'Oto wynik: {"items": [{"productName": "MLEKO \\"ŁACIATE\\" {3.2%}", '
+    '"price": 3.99, "quantity": 1.0}, {"productName": "CHLEB [RAZOWY]", '
+    '"price": 5.49, "quantity": 2}]}'
+)
+
+
+def test_items_are_emitted_as_soon_as_they_close():
+    expected = json.loads(COMPLETION[COMPLETION.index("{") :])["items"]
+
+    # Every possible split into two chunks must give the same items
+    for split in range(len(COMPLETION)):
+        parser = IncrementalItemParser()
+        items = parser.feed(COMPLETION[:split]) + parser.feed(COMPLETION[split:])
+        assert items == expected
+
+    parser = IncrementalItemParser()
+    first_close = COMPLETION.index("}, {") + 1
+    assert parser.feed(COMPLETION[:first_close]) == expected[:1]
+
+
+def test_malformed_item_is_skipped():
+    parser = IncrementalItemParser()
+    items = parser.feed('{"items": [{"productName": tak}, {"productName": "OK"}]}')
+    assert items == [{"productName": "OK"}]
+
+
+RECEIPT = cv2.imencode(".png", np.zeros((4, 4, 3), dtype=np.uint8))[1].tobytes()
+
+
+class StreamingParser(BaseParser):
+    def parse(self, image):
+        return {"items": list(self.parse_stream(image))}
+
+    def parse_stream(self, image):
+        yield {"productName": "MLEKO", "price": 3.99, "quantity": 1.0}
+        yield {"productName": "CHLEB", "price": 5.49, "quantity": 1.0}
+
+
+class RecordingVisualizer(NoopVisualizer):
+    enabled = True
+
+    def visualize(self, image, raw_items, final_items, output_path):
+        self.raw_items = raw_items
+        return output_path
+
+
+@pytest.mark.asyncio
+async def test_stream_receipt_yields_categorized_items_and_caches_them(
+    fake_categorizer,
+):
+    visualizer = RecordingVisualizer()
+    service = InferenceService(
+        StreamingParser(), fake_categorizer, visualizer, result_cache=ResultCache()
+    )
+
+    items = [item async for item in service.stream_receipt(RECEIPT, "a.jpg")]
+    assert [item["productName"] for item in items] == ["MLEKO", "CHLEB"]
+    assert all(item["categoryName"] == "Food" for item in items)
+    assert "categoryName" not in visualizer.raw_items[0]
+
+    assert (
+        await service.result_cache.get(
+            ResultCache.key_for(RECEIPT, get_rules().version)
+        )
+        == items
+    )
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_is_not_cached(fake_categorizer):
+    service = InferenceService(
+        StreamingParser(),
+        fake_categorizer,
+        NoopVisualizer(),
+        result_cache=ResultCache(),
+    )
+    events = service.stream_receipt(RECEIPT, "a.jpg")
+    assert (await anext(events))["productName"] == "MLEKO"
+    await events.aclose()
+    assert len(service.result_cache.memory) == 0
+
+
+class FailingStreamParser(StreamingParser):
+    def parse_stream(self, image):
+        yield {"productName": "MLEKO", "price": 3.99, "quantity": 1.0}
+        raise RuntimeError("llama.cpp failed mid-completion")
+
+
+@pytest.mark.asyncio
+async def test_stream_that_fails_midway_raises_and_is_not_cached(fake_categorizer):
+    service = InferenceService(
+        FailingStreamParser(),
+        fake_categorizer,
+        NoopVisualizer(),
+        result_cache=ResultCache(),
+    )
+    received = []
+    with pytest.raises(RuntimeError):
+        async for item in service.stream_receipt(RECEIPT, "a.jpg"):
+            received.append(item)
+
+    assert [item["productName"] for item in received] == ["MLEKO"]
+    assert len(service.result_cache.memory) == 0
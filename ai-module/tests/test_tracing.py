@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.utils import tracing
+from app.utils.metrics import STAGE_SECONDS
+
+
+def test_server_timing_sums_repeated_stages():
+    trace = tracing.Trace("abc123")
+    trace.add("ocr_rec", 0.010)
+    trace.add("ocr_rec", 0.005)
+    trace.add("llm_generate", 0.25)
+
+    entries = trace.server_timing().split(", ")
+
+    assert entries[:2] == ["ocr_rec;dur=15.0", "llm_generate;dur=250.0"]
+    assert entries[-1].startswith("total;dur=")
+
+
+def test_stages_recorded_on_worker_threads_reach_the_request_trace():
+    async def handle_request():
+        trace = tracing.start_trace("req-1")
+        with tracing.stage("decode"):
+            pass
+        await run_in_threadpool(tracing.record_stage, "ocr_det", 0.2)
+        # Stages measured in a parser worker process come back as observations
+        tracing.trace_replayed([(STAGE_SECONDS.name, 0.3, {"stage": "llm_generate"})])
+        return trace
+
+    trace = asyncio.run(handle_request())
+
+    assert trace.request_id == "req-1"
+    assert set(trace.totals()) == {"decode", "ocr_det", "llm_generate"}
+    assert trace.totals()["ocr_det"] == 0.2
+    # Outside a request only the histogram is updated
+    assert tracing.current_trace() is None
+
+
+def test_unsafe_client_request_ids_are_replaced():
+    """Ids reach debug file names, so only short path-safe ones are kept."""
+    assert tracing.Trace("gw-1.retry_2").request_id == "gw-1.retry_2"
+    for unsafe in ["../../etc/passwd", "a/b", "x" * 65, "", "id with spaces"]:
+        request_id = tracing.Trace(unsafe).request_id
+        assert request_id != unsafe and len(request_id) == 8
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import numpy as np
+
+from app.services.inference_service import InferenceService
+from app.services.interfaces import BaseCategorizer, BaseParser
+from app.utils.warmup import WARMUP_IMAGE, WARMUP_PRODUCTS, load_warmup_image
+
+
+class StagedParser(BaseParser):
+    def __init__(self):
+        self.images = []
+
+    def parse(self, image):
+        return {"items": []}
+
+    def warm_up(self, image):
+        self.images.append(image.shape)
+        return {"ocr": 0.25, "llm": 1.5}
+
+
+class RecordingCategorizer(BaseCategorizer):
+    def __init__(self):
+        self.batches = []
+
+    def categorize_items(self, items):
+        self.batches.append([item["productName"] for item in items])
+        return items
+
+
+def test_warm_up_reports_each_stage_in_ms():
+    parser, categorizer = StagedParser(), RecordingCategorizer()
+    service = InferenceService(parser, categorizer, visualizer=None)
+
+    timings = service.warm_up()
+
+    assert timings["ocr_ms"] == 250.0
+    assert timings["llm_ms"] == 1500.0
+    assert {"categorizer_ms", "total_ms"} <= timings.keys()
+    assert service.warmup_timings == timings
+    # The bundled sample receipt went through OCR, all names in one batch
+    assert parser.images == [load_warmup_image().shape]
+    assert categorizer.batches == [WARMUP_PRODUCTS]
+
+
+def test_warmup_image_is_bundled_and_has_a_fallback():
+    assert WARMUP_IMAGE.exists()
+    bundled = load_warmup_image()
+    assert bundled.ndim == 3 and bundled.shape[2] == 3
+
+    drawn = load_warmup_image(Path("does-not-exist.png"))
+    assert drawn.shape == bundled.shape
+    assert np.array_equal(drawn.min(axis=(0, 1)), [0, 0, 0])
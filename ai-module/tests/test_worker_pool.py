@@ -0,0 +1,93 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from app.services.interfaces import BaseParser
+from app.services.worker_pool import ParserWorkerPool
+
+CRASH = 255
+
+
+class EchoParser(BaseParser):
+    """Cheap stand-in built in each worker; the first pixel picks the item."""
+
+    def __init__(self, llm_cache=None, n_threads=None, startup_seconds=0.0):
+        time.sleep(startup_seconds)
+
+    def parse(self, image):
+        if image[0, 0] == CRASH:
+            # Let every concurrent caller submit before the worker dies
+            time.sleep(0.2)
+            os._exit(1)
+        return {"items": [{"productName": f"item-{image[0, 0]}", "pid": os.getpid()}]}
+
+    def warm_up(self, image):
+        return {"ocr": 0.01, "llm": 0.02}
+
+
+def image(value: int) -> np.ndarray:
+    return np.full((2, 2), value, dtype=np.uint8)
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(**kwargs):
+        pool = ParserWorkerPool(parser_factory=EchoParser, **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def test_warm_up_waits_for_every_worker(make_pool):
+    pool = make_pool(
+        workers=3,
+        parser_options={"startup_seconds": 0.3},
+        warmup_image=None,
+    )
+
+    assert pool.warm_up(image(0)) == {}
+
+    stats = pool.stats()
+    assert len({worker["pid"] for worker in stats["per_worker"]}) == 3
+    assert stats["ready_workers"] == 3
+
+
+def test_parse_runs_in_the_workers_and_is_counted(make_pool):
+    pool = make_pool(workers=2)
+    pool.warm_up(image(0))
+
+    results = pool.parse_batch([image(i) for i in range(6)])
+
+    assert [r["items"][0]["productName"] for r in results] == [
+        f"item-{i}" for i in range(6)
+    ]
+    pids = {r["items"][0]["pid"] for r in results}
+    assert pids <= {worker["pid"] for worker in pool.stats()["per_worker"]}
+    assert sum(worker["jobs"] for worker in pool.stats()["per_worker"]) == 6
+
+
+def test_crashed_worker_restarts_the_pool_once(make_pool):
+    pool = make_pool(workers=2)
+    pool.warm_up(image(0))
+
+    def parse_crash(_):
+        with pytest.raises(BrokenProcessPool):
+            pool.parse(image(CRASH))
+
+    # Every caller sees the same crash; only the first one restarts the pool
+    with ThreadPoolExecutor(max_workers=3) as callers:
+        list(callers.map(parse_crash, range(3)))
+
+    assert pool.restarts == 1
+    assert pool.parse(image(7))["items"][0]["productName"] == "item-7"
+    pool.warm_up(image(0))
+    assert pool.stats()["ready_workers"] == 2